@@ -1,4 +1,10 @@
+from django import forms
 from django.contrib import admin
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+from . import subidas
+from .enlaces import DOC_MODELOS
 from .models import (
     Datospersonales,
     Experiencialaboral,
@@ -7,6 +13,7 @@ from .models import (
     Productosacademicos,
     Productoslaborales,
     Ventagarage,
+    Trabajopdf,
 )
 
 # ==========================================
@@ -17,6 +24,55 @@ admin.site.site_title = "Admin CV"
 admin.site.index_title = "Panel de Control"
 
 
+# ==========================================
+# SUBIDA POR PARTES DE CERTIFICADOS (subidas.py)
+# ==========================================
+
+class SubidaPorPartesWidget(forms.ClearableFileInput):
+    """Input de archivo normal; el JS lo sube por partes y deja el token en <campo>_subida."""
+
+    def __init__(self, campo, attrs=None):
+        super().__init__(attrs)
+        self.campo = campo
+
+    def get_context(self, name, value, attrs):
+        attrs = {**(attrs or {}), "data-subida-campo": self.campo, "data-subida-url": reverse("cv_upload")}
+        return super().get_context(name, value, attrs)
+
+    class Media:
+        js = ("js/subida_por_partes.js",)
+
+
+class CertificadoAdminForm(forms.ModelForm):
+    # Token de una subida ya completada; si viene, reemplaza al archivo del formulario
+    archivo_digital_subida = forms.UUIDField(required=False, widget=forms.HiddenInput)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        campo = next(k for k, m in DOC_MODELOS.items() if m is self._meta.model)
+        self.fields["archivo_digital"].widget = SubidaPorPartesWidget(campo)
+        self.subida = None
+
+    def _post_clean(self):
+        super()._post_clean()
+        token = self.cleaned_data.get("archivo_digital_subida")
+        if not token: return
+        try:
+            # Solo se apunta al archivo ya guardado: nada que subir ni normalizar al guardar
+            self.subida = subidas.asignar(self.instance, token)
+        except ValidationError as e:
+            self.add_error("archivo_digital", e)
+
+
+class CertificadoAdmin(admin.ModelAdmin):
+    form = CertificadoAdminForm
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # La fila se queda con las referencias de la subida (ver storage.py)
+        if form.subida: form.subida.delete()
+
+
 @admin.register(Datospersonales)
 class DatospersonalesAdmin(admin.ModelAdmin):
     list_display = (
@@ -69,7 +125,7 @@ class DatospersonalesAdmin(admin.ModelAdmin):
 
 
 @admin.register(Experiencialaboral)
-class ExperiencialaboralAdmin(admin.ModelAdmin):
+class ExperiencialaboralAdmin(CertificadoAdmin):
     list_display = ("cargodesempenado", "nombrempresa", "fechainiciogestion", "fechafingestion", "activarparaqueseveaenfront")
     list_filter = ("activarparaqueseveaenfront",)
     search_fields = ("cargodesempenado", "nombrempresa")
@@ -77,14 +133,14 @@ class ExperiencialaboralAdmin(admin.ModelAdmin):
 
 
 @admin.register(Cursosrealizados)
-class CursosrealizadosAdmin(admin.ModelAdmin):
+class CursosrealizadosAdmin(CertificadoAdmin):
     list_display = ("nombrecurso", "entidadpatrocinadora", "fechainicio", "totalhoras")
     list_filter = ("activarparaqueseveaenfront",)
     search_fields = ("nombrecurso",)
 
 
 @admin.register(Reconocimientos)
-class ReconocimientosAdmin(admin.ModelAdmin):
+class ReconocimientosAdmin(CertificadoAdmin):
     list_display = ("tiporeconocimiento", "entidadpatrocinadora", "fechareconocimiento")
     list_filter = ("activarparaqueseveaenfront",)
 
@@ -101,7 +157,14 @@ class ProductoslaboralesAdmin(admin.ModelAdmin):
 
 
 @admin.register(Ventagarage)
-class VentagarageAdmin(admin.ModelAdmin):
+class VentagarageAdmin(CertificadoAdmin):
     list_display = ("nombreproducto", "precio", "estado", "fechapublicacion", "activo")
     list_filter = ("estado", "activo")
-    search_fields = ("nombreproducto",)
\ No newline at end of file
+    search_fields = ("nombreproducto",)
+
+
+@admin.register(Trabajopdf)
+class TrabajopdfAdmin(admin.ModelAdmin):
+    list_display = ("idtrabajo", "idperfil", "secciones", "estado", "intentos", "creado", "terminado")
+    list_filter = ("estado",)
+    readonly_fields = ("token", "version", "base_url", "tomado", "terminado", "error")
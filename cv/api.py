@@ -0,0 +1,118 @@
+import base64
+import hashlib
+import json
+from collections import defaultdict
+
+from django.conf import settings
+
+from .loaders import SECCIONES
+from .models import Datospersonales
+
+
+# ============================================================
+# API JSON de solo lectura (v1)
+# ============================================================
+# Se serializa con .values(): sin instanciar modelos y solo con las
+# columnas pedidas. Las secciones usan el mismo filtro de visibilidad y
+# orden que la web (cv.loaders) y se cargan con una consulta por sección
+# para toda la página de perfiles.
+
+CAMPOS_PERFIL = (
+    "idperfil", "nombres", "apellidos", "descripcionperfil", "foto_perfil_url", "nacionalidad", "lugarnacimiento",
+    "fechanacimiento", "numerocedula", "sexo", "estadocivil", "licenciaconducir", "telefonoconvencional",
+    "telefonofijo", "direcciontrabajo", "direcciondomiciliaria", "sitioweb", "actualizado",
+)
+
+_CERTIFICADO = ("final_url", "thumbnail", "is_pdf")
+CAMPOS_SECCION = {
+    "experiencias": ("cargodesempenado", "nombrempresa", "lugarempresa", "fechainiciogestion", "fechafingestion", "descripcionfunciones", *_CERTIFICADO),
+    "cursos": ("nombrecurso", "entidadpatrocinadora", "fechainicio", "fechafin", "totalhoras", "descripcioncurso", *_CERTIFICADO),
+    "productos_academicos": ("nombrerecurso", "clasificador", "descripcion"),
+    "productos_laborales": ("nombreproducto", "fechaproducto", "descripcion"),
+    "reconocimientos": ("tiporeconocimiento", "fechareconocimiento", "descripcionreconocimiento", "entidadpatrocinadora", *_CERTIFICADO),
+    "ventas_garage": ("nombreproducto", "precio", "estado", "fechapublicacion", "descripcion", "imagen", *_CERTIFICADO),
+}
+RELACIONES = {related_name: (modelo, filtro, orden) for related_name, modelo, filtro, orden in SECCIONES.values()}
+
+
+class ParametrosInvalidos(ValueError):
+    pass
+
+
+def _lista(valor, permitidos, nombre):
+    elegidos = [v for v in valor.split(",") if v]
+    desconocidos = [v for v in elegidos if v not in permitidos]
+    if desconocidos: raise ParametrosInvalidos(f"{nombre}: valores desconocidos {', '.join(desconocidos)}")
+    return tuple(dict.fromkeys(elegidos))
+
+
+def parse_params(params, include_por_defecto):
+    """``(campos_perfil, {seccion: campos})`` a partir de ``?fields=``, ``?include=`` y ``?fields[<seccion>]=``."""
+    campos = _lista(params["fields"], CAMPOS_PERFIL, "fields") if "fields" in params else CAMPOS_PERFIL
+    if "idperfil" not in campos: campos = ("idperfil", *campos)
+    include = _lista(params["include"], CAMPOS_SECCION, "include") if "include" in params else include_por_defecto
+    secciones = {}
+    for seccion in include:
+        clave = f"fields[{seccion}]"
+        secciones[seccion] = _lista(params[clave], CAMPOS_SECCION[seccion], clave) if clave in params else CAMPOS_SECCION[seccion]
+    return campos, secciones
+
+
+def firma_params(campos, secciones):
+    """Parte de la ETag/clave de caché que depende de la representación pedida."""
+    data = json.dumps([campos, sorted(secciones.items())])
+    return hashlib.sha256(data.encode()).hexdigest()[:12]
+
+
+def serializar(perfiles, secciones):
+    """Añade a cada dict de perfil sus secciones pedidas (una consulta por sección)."""
+    ids = [p["idperfil"] for p in perfiles]
+    for seccion, campos in secciones.items():
+        modelo, filtro, orden = RELACIONES[seccion]
+        por_perfil = defaultdict(list)
+        filas = (modelo.objects.filter(idperfilconqueestaactivo__in=ids, **filtro).order_by(*orden)
+                 .values("pk", "idperfilconqueestaactivo", *campos))
+        for fila in filas:
+            idperfil = fila.pop("idperfilconqueestaactivo")
+            fila["id"] = fila.pop("pk")
+            por_perfil[idperfil].append(fila)
+        for perfil in perfiles:
+            perfil[seccion] = por_perfil.get(perfil["idperfil"], [])
+    return perfiles
+
+
+def perfil(idperfil, campos, secciones):
+    fila = Datospersonales.objects.filter(pk=idperfil, activarparaqueseveaenfront=True).values(*campos).first()
+    return serializar([fila], secciones)[0] if fila else None
+
+
+def encode_cursor(idperfil):
+    return base64.urlsafe_b64encode(str(idperfil).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise ParametrosInvalidos("cursor inválido")
+
+
+def parse_limit(valor):
+    """``?limit=`` como entero positivo (None si no viene); el tope lo pone lista()."""
+    if valor is None: return None
+    try:
+        limit = int(valor)
+    except ValueError:
+        limit = 0
+    if limit < 1: raise ParametrosInvalidos("limit debe ser un entero mayor que 0")
+    return limit
+
+
+def lista(campos, secciones, cursor=None, limit=None):
+    """Página de perfiles activos por ``idperfil``. Devuelve ``(perfiles, siguiente_cursor)``."""
+    limit = max(1, min(limit or settings.CV_API_PAGE_SIZE, settings.CV_API_MAX_PAGE_SIZE))
+    qs = Datospersonales.objects.filter(activarparaqueseveaenfront=True).order_by("idperfil")
+    if cursor: qs = qs.filter(idperfil__gt=decode_cursor(cursor))
+    filas = list(qs.values(*campos)[:limit + 1])
+    siguiente = encode_cursor(filas[limit - 1]["idperfil"]) if len(filas) > limit else None
+    return serializar(filas[:limit], secciones), siguiente
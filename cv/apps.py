@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class CvConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cv'
+
+    def ready(self):
+        from django.core.checks import register
+
+        from . import signals  # noqa: F401
+        from .caches import check_cache
+        from .vendor import check_vendor
+        register(check_vendor)
+        register(check_cache)
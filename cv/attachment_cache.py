@@ -0,0 +1,154 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+CHUNK_SIZE = 64 * 1024
+
+
+# ============================================================
+# Caché en disco de anexos remotos (por URL, con LRU)
+# ============================================================
+# Cada entrada son dos archivos: el contenido tal cual (<sha256 de la url>)
+# y sus metadatos al lado (<sha256>.json: url, etag, last_modified, fetched).
+# El contenido empieza en el byte 0, así que pypdf (que resuelve los offsets
+# del xref desde el inicio) y el sendfile de gunicorn lo leen directamente.
+# Ambos se escriben en temporales y se publican con os.replace; el .json
+# guarda el inodo y el tamaño del contenido que describe, y open() descarta
+# la entrada si no coinciden (un lector que cae entre los dos os.replace ve
+# un fallo de caché, nunca metadatos de otro contenido).
+# El mtime del contenido hace de "último uso" para el desalojo LRU.
+
+META = ".json"
+
+
+class AttachmentCache:
+
+    def __init__(self, directory=None, max_bytes=None, ttl=None):
+        self.directory = Path(directory or settings.CV_ATTACHMENT_CACHE_DIR)
+        self.max_bytes = settings.CV_ATTACHMENT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.ttl = settings.CV_ATTACHMENT_CACHE_TTL if ttl is None else ttl
+
+    def _path(self, url):
+        return self.directory / hashlib.sha256(url.encode()).hexdigest()
+
+    def open(self, url):
+        """Devuelve ``(meta, archivo)`` con el archivo abierto al inicio del contenido, o ``None``."""
+        path = self._path(url)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            meta = json.loads(path.with_suffix(META).read_bytes())
+        except (FileNotFoundError, ValueError):
+            f.close()
+            return None
+        st = os.fstat(f.fileno())
+        if meta.get("url") != url or meta.get("ino") != st.st_ino or meta.get("size") != st.st_size:
+            f.close()
+            return None
+        self.touch(url)
+        return meta, f
+
+    def is_fresh(self, meta):
+        return time.time() - meta.get("fetched", 0) < self.ttl
+
+    def touch(self, url, meta=None):
+        try:
+            os.utime(self._path(url))
+            # Revalidación (304): solo se reescriben los metadatos con la nueva hora
+            if meta is not None: self._write_meta(self._path(url), {**meta, "fetched": time.time()})
+        except FileNotFoundError:
+            pass
+
+    def _write_meta(self, path, meta):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps(meta).encode())
+            os.replace(tmp, path.with_suffix(META))
+        except BaseException:
+            try: os.unlink(tmp)
+            except FileNotFoundError: pass
+            raise
+
+    def set(self, url, source, etag=None, last_modified=None):
+        """Guarda ``source`` (bytes o archivo) sin cargarlo entero en memoria."""
+        if isinstance(source, bytes): source = io.BytesIO(source)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(url)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                shutil.copyfileobj(source, f, CHUNK_SIZE)
+                f.flush()
+                st = os.fstat(f.fileno())
+            if self.max_bytes and st.st_size > self.max_bytes:
+                os.unlink(tmp)
+                return False
+            os.replace(tmp, path)
+        except BaseException:
+            try: os.unlink(tmp)
+            except FileNotFoundError: pass
+            raise
+        self._write_meta(path, {
+            "url": url, "etag": etag, "last_modified": last_modified, "fetched": time.time(),
+            "ino": st.st_ino, "size": st.st_size,
+        })
+        self.evict()
+        return True
+
+    def _entries(self):
+        entries = []
+        if not self.directory.is_dir(): return entries
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(".tmp-") or entry.name.endswith(META) or not entry.is_file(): continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes: return
+        for _, size, path in sorted(entries):
+            self._unlink(path)
+            total -= size
+            if total <= self.max_bytes: break
+
+    def stats(self):
+        entries = self._entries()
+        return {
+            "directory": str(self.directory),
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+    def purge(self):
+        removed = 0
+        for _, _, path in self._entries():
+            if self._unlink(path): removed += 1
+        return removed
+
+    @staticmethod
+    def _unlink(path):
+        try:
+            os.unlink(path + META)
+        except FileNotFoundError:
+            pass
+        try:
+            os.unlink(path)
+            return True
+        except FileNotFoundError:
+            return False
@@ -0,0 +1,185 @@
+import logging
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+
+from .attachment_cache import CHUNK_SIZE, AttachmentCache
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# Descarga concurrente de anexos (cv_print)
+# ============================================================
+
+_host_locks = {}
+_host_locks_guard = threading.Lock()
+
+
+def _host_semaphore(url):
+    host = urlsplit(url).netloc.lower()
+    with _host_locks_guard:
+        sem = _host_locks.get(host)
+        if sem is None:
+            sem = _host_locks[host] = threading.BoundedSemaphore(settings.CV_ATTACHMENT_PER_HOST)
+        return sem
+
+
+def attachment_url(item):
+    # Copia normalizada al subir (models.CertificadoMixin); las filas antiguas usan el original
+    if getattr(item, 'archivo_pdf_url', None): return item.archivo_pdf_url
+    if item.archivo_digital: return item.archivo_digital.url
+    link = getattr(item, 'rutacertificado', None)
+    if link and link.lower().strip().endswith('.pdf'): return link
+    return None
+
+
+class ByteBudget:
+    """Tope de bytes compartido por todas las descargas de una misma petición."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def take(self, n):
+        with self._lock:
+            if self.used + n > self.limit:
+                raise ValueError(f"Se supera el tope de {self.limit} bytes por petición")
+            self.used += n
+
+    def release(self, n):
+        with self._lock:
+            self.used -= n
+
+
+def _spool():
+    return tempfile.SpooledTemporaryFile(max_size=settings.CV_PRINT_SPOOL_BYTES)
+
+
+def _from_cache(meta, f, budget):
+    try:
+        if budget: budget.take(meta["size"])
+    except BaseException:
+        f.close()
+        raise
+    return f
+
+
+def _download(url, deadline, cache=None, budget=None):
+    meta = None
+    if cache:
+        cached = cache.open(url)
+        if cached:
+            meta, f = cached
+            if cache.is_fresh(meta): return _from_cache(meta, f, budget)
+            f.close()
+
+    restante = deadline - time.monotonic()
+    sem = _host_semaphore(url)
+    if restante <= 0 or not sem.acquire(timeout=restante):
+        raise TimeoutError("Sin tiempo para iniciar la descarga")
+    try:
+        restante = deadline - time.monotonic()
+        if restante <= 0: raise TimeoutError("Sin tiempo para iniciar la descarga")
+        headers = {}
+        if meta:
+            if meta.get("etag"): headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"): headers["If-Modified-Since"] = meta["last_modified"]
+        with requests.get(url, headers=headers, stream=True,
+                          timeout=min(settings.CV_ATTACHMENT_TIMEOUT, restante)) as response:
+            if response.status_code == 304 and meta:
+                cache.touch(url, meta)
+                cached = cache.open(url)
+                if cached is None: raise ValueError("La entrada de caché desapareció tras el 304")
+                return _from_cache(*cached, budget)
+            if response.status_code != 200:
+                raise ValueError(f"HTTP {response.status_code}")
+            body = _read_capped(response, deadline, budget)
+    finally:
+        sem.release()
+
+    if cache:
+        try:
+            cache.set(url, body, etag=response.headers.get("ETag"), last_modified=response.headers.get("Last-Modified"))
+        except OSError as e:
+            logger.warning("No se pudo guardar en caché %s: %s", url, e)
+        body.seek(0)
+    return body
+
+
+def _close_result(future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def _read_capped(response, deadline, budget):
+    limite = settings.CV_ATTACHMENT_MAX_BYTES
+    declarado = response.headers.get("Content-Length")
+    if declarado and declarado.isdigit() and int(declarado) > limite:
+        raise ValueError(f"Anexo de {declarado} bytes supera el tope de {limite}")
+
+    body = _spool()
+    leidos = 0
+    try:
+        for chunk in response.iter_content(CHUNK_SIZE):
+            if leidos + len(chunk) > limite:
+                raise ValueError(f"Anexo supera el tope de {limite} bytes")
+            if time.monotonic() > deadline:
+                raise TimeoutError("Tiempo agotado durante la descarga")
+            if budget: budget.take(len(chunk))
+            leidos += len(chunk)
+            body.write(chunk)
+        body.seek(0)
+        return body
+    except BaseException:
+        # Lo descargado de un anexo descartado no cuenta para el tope de la petición
+        if budget: budget.release(leidos)
+        body.close()
+        raise
+
+
+class AttachmentBatch:
+    """Descargas en paralelo de los anexos; ``results()`` respeta el orden de envío."""
+
+    def __init__(self, urls, deadline=None, cache=None):
+        self.urls = list(urls)
+        self.cache = cache if cache is not None else AttachmentCache()
+        self.deadline = time.monotonic() + (deadline or settings.CV_ATTACHMENT_DEADLINE)
+        self.skipped = []
+        self.budget = ByteBudget(settings.CV_PRINT_MAX_BYTES)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, min(settings.CV_ATTACHMENT_WORKERS, len(self.urls) or 1)))
+        self._futures = [self._executor.submit(_download, url, self.deadline, self.cache, self.budget) for url in self.urls]
+
+    def results(self):
+        """Lista alineada con ``urls``: un archivo abierto por anexo, o ``None`` si se omitió."""
+        restante = max(0, self.deadline - time.monotonic())
+        wait(self._futures, timeout=restante)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+        contenidos = []
+        for url, future in zip(self.urls, self._futures):
+            if not future.done():
+                if not future.cancel(): future.add_done_callback(_close_result)
+                self.skip(url, "tiempo agotado")
+                contenidos.append(None)
+                continue
+            try:
+                contenidos.append(future.result())
+            except Exception as e:
+                self.skip(url, str(e) or e.__class__.__name__)
+                contenidos.append(None)
+        return contenidos
+
+    def close(self):
+        for future in self._futures:
+            if future.done(): _close_result(future)
+
+    def skip(self, url, motivo):
+        logger.warning("Anexo omitido %s: %s", url, motivo)
+        self.skipped.append(url)
@@ -0,0 +1,173 @@
+import io
+import os
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from pypdf import PdfWriter
+
+from .models import (
+    Datospersonales, Experiencialaboral, Cursosrealizados,
+    Productosacademicos, Productoslaborales, Reconocimientos, Ventagarage
+)
+
+
+# ============================================================
+# Servidor local de anexos (sustituto de Cloudinary para medir)
+# ============================================================
+
+def pdf_de_tamano(n_bytes):
+    """PDF válido de una página que pesa aproximadamente ``n_bytes``."""
+    writer = PdfWriter()
+    writer.add_blank_page(width=595, height=842)
+    if n_bytes > 1024:
+        writer.add_attachment("relleno.bin", os.urandom(n_bytes - 1024))
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+class AttachmentServer:
+    """Sirve ``/<nombre>.pdf?size=N`` con latencia y tasa de fallos configurables.
+
+    Responde con ETag y atiende If-None-Match, igual que Cloudinary, para
+    poder medir también la revalidación de la caché de anexos. ``&delay=S``
+    retrasa solo esa URL (descargas que terminan fuera de orden) y
+    ``max_concurrent`` guarda el máximo de peticiones atendidas a la vez.
+    """
+
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.requests = 0
+        self.bytes_sent = 0
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self._random = random.Random(seed)
+        self._pdfs = {}
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def url(self, nombre, size):
+        return f"{self.base_url}/{nombre}.pdf?size={size}"
+
+    def _handle(self, req):
+        try:
+            self._responder(req)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # el cliente abandonó la descarga (p. ej. agotó su plazo)
+
+    def _responder(self, req):
+        query = parse_qs(urlsplit(req.path).query)
+        espera = self.latency + float(query.get("delay", ["0"])[0])
+        with self._lock:
+            self.requests += 1
+            falla = self._random.random() < self.failure_rate
+            # Concurrencia medida mientras se retiene la petición (antes de responder)
+            self.concurrent += 1
+            self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        try:
+            if espera: time.sleep(espera)
+        finally:
+            with self._lock:
+                self.concurrent -= 1
+        if falla:
+            req.send_response(503)
+            req.end_headers()
+            return
+
+        size = int(query.get("size", ["0"])[0])
+        with self._lock:
+            body = self._pdfs.get(size)
+            if body is None: body = self._pdfs[size] = pdf_de_tamano(size)
+        etag = f'"{size}"'
+        if req.headers.get("If-None-Match") == etag:
+            req.send_response(304)
+            req.send_header("ETag", etag)
+            req.end_headers()
+            return
+
+        req.send_response(200)
+        req.send_header("Content-Type", "application/pdf")
+        req.send_header("Content-Length", str(len(body)))
+        req.send_header("ETag", etag)
+        req.end_headers()
+        req.wfile.write(body)
+        with self._lock:
+            self.bytes_sent += len(body)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+# ============================================================
+# Perfiles sintéticos
+# ============================================================
+
+def build_profile(server, experiencias=5, cursos=10, reconocimientos=3, garage=2, productos=3,
+                  attachments=0, attachment_size=200 * 1024):
+    """Crea un perfil de prueba; los ``attachments`` primeros cursos/experiencias/... llevan anexo."""
+    hoy = date.today()
+    perfil = Datospersonales.objects.create(
+        nombres="Perfil", apellidos="Benchmark", descripcionperfil="Perfil sintético",
+        nacionalidad="Ecuatoriana", numerocedula="0102030405",
+    )
+
+    filas = []
+    for i in range(experiencias):
+        filas.append(Experiencialaboral(
+            idperfilconqueestaactivo=perfil, cargodesempenado=f"Cargo {i}", nombrempresa=f"Empresa {i}",
+            fechainiciogestion=hoy - timedelta(days=400 * (i + 1)), descripcionfunciones="Funciones " * 8,
+        ))
+    for i in range(cursos):
+        filas.append(Cursosrealizados(
+            idperfilconqueestaactivo=perfil, nombrecurso=f"Curso {i}", entidadpatrocinadora="Entidad",
+            fechainicio=hoy - timedelta(days=90 * (i + 1)), totalhoras=40,
+        ))
+    for i in range(reconocimientos):
+        filas.append(Reconocimientos(
+            idperfilconqueestaactivo=perfil, tiporeconocimiento="Academico", entidadpatrocinadora="Entidad",
+            fechareconocimiento=hoy - timedelta(days=200 * (i + 1)), descripcionreconocimiento="Logro",
+        ))
+    for i in range(garage):
+        filas.append(Ventagarage(
+            idperfilconqueestaactivo=perfil, nombreproducto=f"Producto {i}", precio=10 + i,
+            estado="Bueno", fechapublicacion=hoy - timedelta(days=i), descripcion="Descripción",
+        ))
+    for i in range(productos):
+        filas.append(Productosacademicos(idperfilconqueestaactivo=perfil, nombrerecurso=f"Artículo {i}", clasificador="Libro"))
+        filas.append(Productoslaborales(idperfilconqueestaactivo=perfil, nombreproducto=f"Entregable {i}", fechaproducto=hoy))
+
+    # bulk_create: los datos sintéticos no necesitan full_clean ni las señales de versión
+    pendientes = attachments
+    for modelo in (Cursosrealizados, Experiencialaboral, Reconocimientos, Ventagarage, Productosacademicos, Productoslaborales):
+        lote = [f for f in filas if isinstance(f, modelo)]
+        for fila in lote:
+            if pendientes and hasattr(fila, "archivo_pdf_url"):
+                fila.archivo_pdf_url = server.url(f"{modelo.__name__.lower()}-{pendientes}", attachment_size)
+                pendientes -= 1
+        modelo.objects.bulk_create(lote)
+    return perfil
@@ -0,0 +1,112 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .loaders import section_prefetches
+from .models import Busquedaperfil, Datospersonales
+
+
+# ============================================================
+# Búsqueda de texto completo sobre perfiles y secciones
+# ============================================================
+# Un documento por perfil activo en la tabla "busquedaperfil" (titulo con
+# peso alto + documento con el texto de las secciones visibles). La
+# migración 0015 añade el índice según la BD: columna tsvector generada +
+# GIN en Postgres, tabla FTS5 con triggers en SQLite. Con otra BD se cae a
+# icontains sin ranking.
+
+CAMPOS = {
+    "experiencias": ("cargodesempenado", "nombrempresa", "lugarempresa", "descripcionfunciones"),
+    "cursos": ("nombrecurso", "entidadpatrocinadora", "descripcioncurso"),
+    "reconocimientos": ("tiporeconocimiento", "descripcionreconocimiento", "entidadpatrocinadora"),
+    "productos_academicos": ("nombrerecurso", "clasificador", "descripcion"),
+    "productos_laborales": ("nombreproducto", "descripcion"),
+}
+
+
+def _unir(valores):
+    return " ".join(str(v) for v in valores if v)
+
+
+def documento_perfil(perfil):
+    """``(titulo, documento)`` de un perfil con sus secciones visibles ya cargadas."""
+    titulo = _unir((perfil.nombres, perfil.apellidos, perfil.descripcionperfil))
+    partes = [_unir((perfil.nacionalidad, perfil.lugarnacimiento))]
+    for related_name, campos in CAMPOS.items():
+        for fila in getattr(perfil, f"{related_name}_visibles"):
+            partes.append(_unir(getattr(fila, c) for c in campos))
+    return titulo, "\n".join(p for p in partes if p)
+
+
+def indexar_perfil(idperfil):
+    """Rehace el documento de un perfil; lo borra si el perfil ya no existe o no está activo."""
+    perfil = Datospersonales.objects.prefetch_related(*section_prefetches()).filter(pk=idperfil).first()
+    if perfil is None or not perfil.activarparaqueseveaenfront:
+        Busquedaperfil.objects.filter(pk=idperfil).delete()
+        return
+    titulo, documento = documento_perfil(perfil)
+    Busquedaperfil.objects.update_or_create(idperfil_id=idperfil, defaults={"titulo": titulo, "documento": documento})
+
+
+def _consulta_fts5(q):
+    # Cada palabra entre comillas (sin sintaxis FTS5) y como prefijo; todas deben aparecer
+    return " ".join(f'"{t}"*' for t in re.findall(r"\w+", q))
+
+
+def buscar(q, page=1, page_size=None):
+    """Perfiles ordenados por relevancia. Devuelve ``(perfiles, hay_mas)``."""
+    page_size = page_size or settings.CV_SEARCH_PAGE_SIZE
+    offset = (page - 1) * page_size
+    if not re.search(r"\w", q): return [], False
+
+    if connection.vendor == "postgresql":
+        sql = (
+            "SELECT b.idperfil FROM busquedaperfil b, websearch_to_tsquery('spanish', %s) q "
+            "WHERE b.vector @@ q ORDER BY ts_rank(b.vector, q) DESC, b.idperfil LIMIT %s OFFSET %s"
+        )
+        params = [q, page_size + 1, offset]
+    elif connection.vendor == "sqlite":
+        sql = (
+            "SELECT rowid FROM busquedaperfil_fts WHERE busquedaperfil_fts MATCH %s "
+            "ORDER BY bm25(busquedaperfil_fts, 10.0, 1.0), rowid LIMIT %s OFFSET %s"
+        )
+        params = [_consulta_fts5(q), page_size + 1, offset]
+    else:
+        sql = None
+
+    if sql:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            ids = [fila[0] for fila in cursor.fetchall()]
+    else:
+        ids = list(
+            Busquedaperfil.objects.filter(Q(titulo__icontains=q) | Q(documento__icontains=q))
+            .order_by("pk").values_list("pk", flat=True)[offset:offset + page_size + 1]
+        )
+
+    hay_mas = len(ids) > page_size
+    ids = ids[:page_size]
+    perfiles = Datospersonales.objects.only(
+        "idperfil", "nombres", "apellidos", "descripcionperfil", "foto_perfil_url", "nacionalidad",
+    ).in_bulk(ids)
+    return [perfiles[i] for i in ids if i in perfiles], hay_mas
+
+
+def reconstruir_indice(lote=200):
+    """Reindexa todos los perfiles activos. Devuelve cuántos quedaron indexados."""
+    activos = Datospersonales.objects.filter(activarparaqueseveaenfront=True).order_by("pk")
+    Busquedaperfil.objects.exclude(pk__in=activos.values("pk")).delete()
+    total = 0
+    ids = list(activos.values_list("pk", flat=True))
+    for i in range(0, len(ids), lote):
+        perfiles = Datospersonales.objects.filter(pk__in=ids[i:i + lote]).prefetch_related(*section_prefetches())
+        for perfil in perfiles:
+            titulo, documento = documento_perfil(perfil)
+            Busquedaperfil.objects.update_or_create(idperfil_id=perfil.pk, defaults={"titulo": titulo, "documento": documento})
+            total += 1
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO busquedaperfil_fts(busquedaperfil_fts) VALUES ('rebuild')")
+    return total
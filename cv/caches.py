@@ -0,0 +1,34 @@
+from django.conf import settings
+
+
+# ============================================================
+# ¿La caché de Django la ven todos los procesos?
+# ============================================================
+# Las invalidaciones de signals.py (cache.delete) solo llegan a los otros
+# workers si el backend es compartido (Redis, Memcached, archivos, BD). Con
+# la LocMemCache por defecto cada worker tiene la suya: lo que depende de una
+# invalidación se guarda solo CV_LOCAL_CACHE_TTL segundos y el check cv.W002
+# avisa fuera de DEBUG.
+
+POR_PROCESO = {"django.core.cache.backends.locmem.LocMemCache"}
+
+
+def compartida():
+    return settings.CACHES["default"]["BACKEND"] not in POR_PROCESO
+
+
+def ttl(segundos):
+    """``segundos`` con caché compartida; como mucho CV_LOCAL_CACHE_TTL si cada proceso tiene la suya."""
+    return segundos if compartida() else min(segundos, settings.CV_LOCAL_CACHE_TTL)
+
+
+def check_cache(app_configs, **kwargs):
+    from django.core.checks import Warning
+
+    if settings.DEBUG or compartida(): return []
+    return [Warning(
+        "La caché por defecto es local de cada proceso: con varios workers las invalidaciones no les llegan "
+        f"y enlaces/portada pueden quedar desactualizados hasta {settings.CV_LOCAL_CACHE_TTL} s.",
+        hint="Define CACHE_BACKEND (p. ej. django.core.cache.backends.redis.RedisCache) y CACHE_LOCATION.",
+        id="cv.W002",
+    )]
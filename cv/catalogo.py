@@ -0,0 +1,106 @@
+import base64
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django import forms
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Ventagarage
+
+
+# ============================================================
+# Catálogo de garage (todas las ventas activas, paginación por cursor)
+# ============================================================
+# Cada orden tiene su índice parcial (WHERE activo) en Ventagarage.Meta;
+# la página siguiente busca "después de (valor, id)" en vez de usar OFFSET
+# y solo se leen las columnas del listado (sin la descripción TextField).
+
+ORDENES = {
+    # clave: (campo, descendente)
+    "-fecha": ("fechapublicacion", True),
+    "fecha": ("fechapublicacion", False),
+    "precio": ("precio", False),
+    "-precio": ("precio", True),
+}
+
+COLUMNAS = (
+    "idventagaraje", "nombreproducto", "precio", "estado", "fechapublicacion",
+    "imagen", "final_url", "thumbnail", "is_pdf", "idperfilconqueestaactivo",
+)
+
+
+class CatalogoForm(forms.Form):
+    estado = forms.ChoiceField(choices=[("", "Todos")] + Ventagarage.ESTADO_CHOICES, required=False)
+    precio_min = forms.DecimalField(min_value=0, max_digits=10, decimal_places=2, required=False)
+    precio_max = forms.DecimalField(min_value=0, max_digits=10, decimal_places=2, required=False)
+    desde = forms.DateField(required=False)
+    hasta = forms.DateField(required=False)
+    orden = forms.ChoiceField(choices=[(k, k) for k in ORDENES], required=False)
+    cursor = forms.CharField(required=False, max_length=200)
+
+    def clean(self):
+        datos = super().clean()
+        if datos.get("precio_min") is not None and datos.get("precio_max") is not None and datos["precio_min"] > datos["precio_max"]:
+            raise forms.ValidationError("precio_min no puede ser mayor que precio_max.")
+        datos["orden"] = datos.get("orden") or "-fecha"
+        return datos
+
+
+def items_activos():
+    return Ventagarage.objects.filter(activo=True, idperfilconqueestaactivo__activarparaqueseveaenfront=True)
+
+
+def filtrar(qs, datos):
+    if datos.get("estado"): qs = qs.filter(estado=datos["estado"])
+    if datos.get("precio_min") is not None: qs = qs.filter(precio__gte=datos["precio_min"])
+    if datos.get("precio_max") is not None: qs = qs.filter(precio__lte=datos["precio_max"])
+    if datos.get("desde"): qs = qs.filter(fechapublicacion__gte=datos["desde"])
+    if datos.get("hasta"): qs = qs.filter(fechapublicacion__lte=datos["hasta"])
+    return qs
+
+
+def encode_cursor(item, orden):
+    campo, _ = ORDENES[orden]
+    data = json.dumps([orden, str(getattr(item, campo)), item.pk], separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, orden):
+    """``(valor, id)`` del último item visto, o None si el cursor no vale para este orden."""
+    try:
+        orden_cursor, valor, pk = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if orden_cursor != orden or not isinstance(pk, int): return None
+        campo, _ = ORDENES[orden]
+        return (date.fromisoformat(valor) if campo == "fechapublicacion" else Decimal(valor)), pk
+    except (ValueError, TypeError, InvalidOperation):
+        return None
+
+
+def pagina(qs, orden, cursor=None, page_size=None):
+    """Una página tras ``cursor``. Devuelve ``(items, siguiente_cursor)``."""
+    page_size = page_size or settings.CV_CATALOG_PAGE_SIZE
+    campo, desc = ORDENES[orden]
+    posicion = decode_cursor(cursor, orden) if cursor else None
+    if posicion:
+        valor, pk = posicion
+        op = "lt" if desc else "gt"
+        qs = qs.filter(Q(**{f"{campo}__{op}": valor}) | Q(**{campo: valor, f"pk__{op}": pk}))
+    prefijo = "-" if desc else ""
+    items = list(qs.order_by(f"{prefijo}{campo}", f"{prefijo}pk").only(*COLUMNAS)[:page_size + 1])
+    siguiente = encode_cursor(items[page_size - 1], orden) if len(items) > page_size else None
+    return items[:page_size], siguiente
+
+
+def item_json(item):
+    return {
+        "id": item.pk,
+        "nombre": item.nombreproducto,
+        "precio": str(item.precio),
+        "estado": item.estado,
+        "fechapublicacion": item.fechapublicacion.isoformat(),
+        "imagen": item.thumbnail or item.imagen,
+        "url": item.final_url,
+        "perfil": item.idperfilconqueestaactivo_id,
+    }
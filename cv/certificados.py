@@ -0,0 +1,94 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from PIL import Image, ImageOps, UnidentifiedImageError
+from pypdf import PdfReader, PdfWriter
+from pypdf.errors import PdfReadError
+
+
+# ============================================================
+# Normalización de certificados a PDF listo para fusionar
+# ============================================================
+# Se lee del archivo subido (en disco para subidas grandes) y se escribe en
+# un temporal que pasa a disco al superar CV_PRINT_SPOOL_BYTES: ni el
+# original ni el resultado se cargan enteros en memoria.
+
+def _spool():
+    return tempfile.SpooledTemporaryFile(max_size=settings.CV_PRINT_SPOOL_BYTES)
+
+
+def _imagen_a_pdf(archivo):
+    dpi = settings.CV_CERTIFICADO_DPI
+    # Como máximo una hoja A4 a la resolución configurada
+    limite = (round(8.27 * dpi), round(11.69 * dpi))
+    try:
+        img = Image.open(archivo)
+        # JPEG: decodifica ya reducido (1/2, 1/4, 1/8) si sobra resolución
+        img.draft("RGB", (max(limite), max(limite)))
+        img = ImageOps.exif_transpose(img)
+
+        if img.mode in ("RGBA", "LA", "P"):
+            img = img.convert("RGBA")
+            fondo = Image.new("RGB", img.size, "white")
+            fondo.paste(img, mask=img.split()[-1])
+            img = fondo
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+    except Image.DecompressionBombError:
+        # Más del doble de Image.MAX_IMAGE_PIXELS: no se decodifica
+        raise ValidationError("La imagen tiene demasiados píxeles; súbela a menor resolución.")
+    except (UnidentifiedImageError, OSError) as e:
+        # OSError también cubre imágenes truncadas, que fallan al decodificar
+        raise ValidationError(f"La imagen no se pudo leer ({e}).")
+
+    if img.width > img.height: limite = limite[::-1]
+    img.thumbnail(limite, Image.LANCZOS)
+
+    out = _spool()
+    img.save(out, format="PDF", resolution=dpi, quality=85)
+    return out, 1
+
+
+def _reparar_pdf(archivo):
+    out = _spool()
+    try:
+        reader = PdfReader(archivo, strict=False)
+        if reader.is_encrypted and not reader.decrypt(""):
+            raise ValidationError("El PDF está protegido con contraseña.")
+        paginas = len(reader.pages)
+        if not paginas: raise ValidationError("El PDF no tiene páginas.")
+        # Reescribirlo con pypdf reconstruye la tabla xref y descarta basura
+        writer = PdfWriter(clone_from=reader)
+        writer.compress_identical_objects()
+        writer.write(out)
+    except ValidationError:
+        out.close()
+        raise
+    except (PdfReadError, ValueError, KeyError, OSError) as e:
+        out.close()
+        raise ValidationError(f"El PDF está dañado y no se pudo reparar ({e}).")
+    return out, paginas
+
+
+def normalizar_certificado(archivo):
+    """Convierte un PDF o imagen subido en ``(pdf, paginas)`` o lanza ValidationError.
+
+    ``pdf`` es un archivo temporal al inicio; lo cierra quien lo sube (subir_pdf_normalizado).
+    """
+    archivo.seek(0)
+    cabecera = archivo.read(1024)
+    archivo.seek(0)
+
+    try:
+        pdf, paginas = (_reparar_pdf if b"%PDF-" in cabecera else _imagen_a_pdf)(archivo)
+    finally:
+        archivo.seek(0)
+
+    tamano = pdf.seek(0, os.SEEK_END)
+    pdf.seek(0)
+    if tamano > settings.CV_ATTACHMENT_MAX_BYTES:
+        pdf.close()
+        raise ValidationError(f"El archivo normalizado pesa {tamano // 1024} KB; el máximo es {settings.CV_ATTACHMENT_MAX_BYTES // 1024} KB.")
+    return pdf, paginas
@@ -0,0 +1,107 @@
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+
+from . import caches
+from .loaders import SECCIONES
+from .models import Datospersonales, orden_apellidos
+
+
+# ============================================================
+# Directorio público de perfiles (paginación por cursor / keyset)
+# ============================================================
+# Orden estable (apellidos, idperfil) servido por el índice parcial
+# "perfil_directorio"; cada página busca "después de la última fila vista"
+# en lugar de usar OFFSET, así que cuesta lo mismo en la página 1 que en la 500.
+
+CLAVE_PERFIL_POR_DEFECTO = "cv:perfil_por_defecto"
+
+
+def perfiles_activos():
+    return (Datospersonales.objects.filter(activarparaqueseveaenfront=True)
+            .annotate(orden_apellidos=orden_apellidos()))
+
+
+def filtrar(qs, params):
+    """Aplica ``nacionalidad``, ``licencia`` y ``con`` (secciones con filas visibles, p. ej. ``con=exp,edu``)."""
+    if params.get("nacionalidad"): qs = qs.filter(nacionalidad=params["nacionalidad"])
+    if params.get("licencia"): qs = qs.filter(licenciaconducir=params["licencia"])
+    for clave in secciones_pedidas(params):
+        _, modelo, filtro, _ = SECCIONES[clave]
+        qs = qs.filter(Exists(modelo.objects.filter(idperfilconqueestaactivo=OuterRef("pk"), **filtro)))
+    return qs
+
+
+def secciones_pedidas(params):
+    return [c for c in params.get("con", "").split(",") if c in SECCIONES]
+
+
+def encode_cursor(perfil):
+    data = json.dumps([perfil.orden_apellidos, perfil.idperfil], separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """``(apellidos, idperfil)`` o None si el cursor no es válido."""
+    try:
+        apellidos, idperfil = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if isinstance(apellidos, str) and isinstance(idperfil, int): return apellidos, idperfil
+    except (ValueError, TypeError):
+        pass
+    return None
+
+
+def pagina(qs, cursor=None, page_size=None):
+    """Una página tras ``cursor``. Devuelve ``(perfiles, siguiente_cursor)``."""
+    page_size = page_size or settings.CV_DIRECTORY_PAGE_SIZE
+    posicion = decode_cursor(cursor) if cursor else None
+    if posicion:
+        apellidos, idperfil = posicion
+        qs = qs.filter(Q(orden_apellidos__gt=apellidos) | Q(orden_apellidos=apellidos, idperfil__gt=idperfil))
+    filas = list(qs.order_by("orden_apellidos", "idperfil").only(
+        "idperfil", "nombres", "apellidos", "descripcionperfil", "foto_perfil_url", "nacionalidad", "licenciaconducir",
+    )[:page_size + 1])
+    siguiente = encode_cursor(filas[page_size - 1]) if len(filas) > page_size else None
+    return filas[:page_size], siguiente
+
+
+def total(qs, params):
+    """Conteo acotado (``CV_DIRECTORY_COUNT_CAP``) y cacheado por combinación de filtros.
+
+    Devuelve ``(n, exacto)``; con ``exacto=False`` hay al menos ``n`` perfiles.
+    """
+    filtros = json.dumps({k: params.get(k, "") for k in ("nacionalidad", "licencia", "con")}, sort_keys=True)
+    key = "cv:directorio:total:" + hashlib.sha256(filtros.encode()).hexdigest()[:16]
+    cached = cache.get(key)
+    if cached is not None: return tuple(cached)
+    cap = settings.CV_DIRECTORY_COUNT_CAP
+    n = qs.order_by()[:cap + 1].count()
+    resultado = (min(n, cap), n <= cap)
+    cache.set(key, resultado, settings.CV_DIRECTORY_COUNT_TTL)
+    return resultado
+
+
+def nacionalidades():
+    opciones = cache.get("cv:directorio:nacionalidades")
+    if opciones is None:
+        opciones = list(
+            Datospersonales.objects.filter(activarparaqueseveaenfront=True).exclude(nacionalidad__isnull=True)
+            .exclude(nacionalidad="").order_by("nacionalidad").values_list("nacionalidad", flat=True).distinct()
+        )
+        cache.set("cv:directorio:nacionalidades", opciones, settings.CV_DIRECTORY_COUNT_TTL)
+    return opciones
+
+
+def perfil_por_defecto():
+    """``idperfil`` del perfil de portada (el activo más antiguo), cacheado; None si no hay."""
+    idperfil = cache.get(CLAVE_PERFIL_POR_DEFECTO)
+    if idperfil is None:
+        idperfil = (Datospersonales.objects.filter(activarparaqueseveaenfront=True)
+                    .order_by("idperfil").values_list("idperfil", flat=True).first()) or 0
+        # Plazo explícito: con caché por proceso el delete de signals.py no llega a otros workers
+        cache.set(CLAVE_PERFIL_POR_DEFECTO, idperfil, caches.ttl(settings.CV_HOME_CACHE_TTL))
+    return idperfil or None
@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import caches
+from .models import Experiencialaboral, Cursosrealizados, Reconocimientos, Ventagarage
+
+
+# ============================================================
+# Resolución (modelo, pk) -> URL del documento para doc_redirect
+# ============================================================
+# Dos niveles: LRU acotada en el proceso (TTL corto, porque otros procesos
+# no ven las invalidaciones locales) y la caché compartida de Django, que
+# signals.py invalida al guardar o borrar la fila (si la caché es local de
+# cada proceso, la entrada dura poco: caches.ttl). En la BD solo se lee la
+# columna final_url.
+
+DOC_MODELOS = {"exp": Experiencialaboral, "cursos": Cursosrealizados, "rec": Reconocimientos, "garage": Ventagarage}
+_SIN_DOCUMENTO = ""
+
+
+class LRUCache:
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None: return None
+            if item[1] < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return item[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local = LRUCache(settings.CV_DOC_CACHE_ENTRIES, settings.CV_DOC_CACHE_LOCAL_TTL)
+
+
+def _key(modelo, pk): return f"cv:doc:{modelo}:{pk}"
+
+
+def resolver_documento(modelo, pk):
+    """URL del documento, ``""`` si la fila no tiene archivo o None si no existe."""
+    key = _key(modelo, pk)
+    url = _local.get(key)
+    if url is not None: return url
+
+    url = cache.get(key)
+    if url is None:
+        fila = DOC_MODELOS[modelo].objects.filter(pk=pk).values_list("pk", "final_url").first()
+        if fila is None: return None
+        url = fila[1] or _SIN_DOCUMENTO
+        cache.set(key, url, caches.ttl(settings.CV_DOC_CACHE_TTL))
+    _local.set(key, url)
+    return url
+
+
+def invalidar_documento(model_class, pk):
+    for modelo, clase in DOC_MODELOS.items():
+        if clase is model_class:
+            _local.delete(_key(modelo, pk))
+            cache.delete(_key(modelo, pk))
@@ -0,0 +1,168 @@
+import csv
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .busqueda import indexar_perfil
+from .directorio import CLAVE_PERFIL_POR_DEFECTO
+from .loaders import SECCIONES
+from .models import Datospersonales, CertificadoMixin, enlaces_archivo
+from .signals import bump_version
+
+
+# ============================================================
+# Importación masiva de perfiles (manage.py import_cv)
+# ============================================================
+# Misma validación que CleanSaveMixin.save() -> full_clean() (validadores de
+# campo + clean() del modelo) pero sin la consulta de existencia del FK por
+# fila: el perfil destino se busca una vez por lote. Se escribe con
+# bulk_create dentro de una transacción; como bulk_create no emite señales,
+# al final se actualizan a mano versión, índice de búsqueda y portada.
+#
+# Formato JSON: un objeto (o lista) con los campos del perfil y una lista por
+# sección con su related_name (el mismo formato que devuelve /cv/api/v1/).
+# Formato CSV: columna "seccion" ("perfil" o un related_name) y una columna
+# por campo; las filas de sección pertenecen al último "perfil" leído.
+
+MODELOS = {related_name: modelo for related_name, modelo, _, _ in SECCIONES.values()}
+FK = "idperfilconqueestaactivo"
+# Columnas que exporta la API o que se calculan solas; se ignoran al importar
+IGNORADOS = {"id", "pk", "idperfil", FK, "version", "actualizado", "final_url", "thumbnail", "is_pdf",
+             "archivo_digital", "archivo_pdf_url", "archivo_pdf_paginas", "archivo_pdf_bytes"}
+
+
+class Fila:
+    def __init__(self, origen, seccion, datos, perfil=None):
+        self.origen = origen        # "archivo:línea" para los mensajes de error
+        self.seccion = seccion      # "perfil" o related_name
+        self.datos = datos
+        self.perfil = perfil        # Fila "perfil" a la que pertenece
+        self.objeto = None
+
+
+class Resultado:
+    def __init__(self):
+        self.perfiles = 0
+        self.filas = {}
+        self.errores = []
+
+
+def _vacio_a_none(datos):
+    return {k: (None if v == "" else v) for k, v in datos.items() if k}
+
+
+def leer_json(f, nombre):
+    data = json.load(f)
+    filas = []
+    for n, item in enumerate(data if isinstance(data, list) else [data], start=1):
+        perfil = Fila(f"{nombre}[{n}]", "perfil", {k: v for k, v in item.items() if k not in MODELOS})
+        filas.append(perfil)
+        for seccion in MODELOS:
+            for m, datos in enumerate(item.get(seccion) or [], start=1):
+                filas.append(Fila(f"{nombre}[{n}].{seccion}[{m}]", seccion, datos, perfil))
+    return filas
+
+
+def leer_csv(f, nombre):
+    filas, perfil = [], None
+    for n, datos in enumerate(csv.DictReader(f), start=2):
+        seccion = (datos.pop("seccion", None) or "").strip()
+        fila = Fila(f"{nombre}:{n}", seccion, _vacio_a_none(datos), perfil)
+        if seccion == "perfil": perfil = fila
+        filas.append(fila)
+    return filas
+
+
+def _construir(fila):
+    """Instancia validada de la fila o ValidationError con los mensajes por campo."""
+    modelo = Datospersonales if fila.seccion == "perfil" else MODELOS.get(fila.seccion)
+    if modelo is None: raise ValidationError(f"Sección desconocida «{fila.seccion}».")
+    campos = {f.name for f in modelo._meta.concrete_fields}
+    # En un CSV con columnas de varias secciones, las celdas vacías de otra sección no cuentan
+    desconocidos = [k for k, v in fila.datos.items() if k not in campos and k not in IGNORADOS and v is not None]
+    if desconocidos: raise ValidationError(f"Campos desconocidos: {', '.join(desconocidos)}.")
+
+    obj = modelo(**{k: v for k, v in fila.datos.items() if k in campos and k not in IGNORADOS})
+    # full_clean() sin validate_unique ni el FK (no hay restricciones únicas en estas tablas)
+    errores = {}
+    try:
+        obj.clean_fields(exclude=[FK])
+    except ValidationError as e:
+        errores = e.update_error_dict(errores)
+    if not errores:
+        try:
+            obj.clean()
+        except ValidationError as e:
+            errores = e.update_error_dict(errores)
+    if errores: raise ValidationError(errores)
+    if isinstance(obj, CertificadoMixin): obj.final_url, obj.is_pdf, obj.thumbnail = enlaces_archivo(obj)
+    return obj
+
+
+def _mensajes(error):
+    if hasattr(error, "error_dict"):
+        return "; ".join(f"{campo}: {' '.join(m)}" if campo != "__all__" else " ".join(m)
+                         for campo, m in error.message_dict.items())
+    return " ".join(error.messages)
+
+
+def importar(filas, idperfil=None, omitir_invalidas=False, dry_run=False, batch_size=500):
+    """Valida todas las filas y, si no hay errores (o se omiten), las inserta en una transacción."""
+    resultado = Resultado()
+    destino = None
+    if idperfil is not None:
+        # Única consulta del FK para todo el lote
+        destino = Datospersonales.objects.filter(pk=idperfil).only("pk").first()
+        if destino is None:
+            resultado.errores.append(f"El perfil {idperfil} no existe.")
+            return resultado
+
+    invalidas, contenedores = set(), set()
+    for fila in filas:
+        if fila.seccion != "perfil" and fila.perfil is None and destino is None:
+            resultado.errores.append(f"{fila.origen}: fila de «{fila.seccion}» sin perfil (usa --perfil o una fila «perfil» antes).")
+            invalidas.add(id(fila))
+            continue
+        if fila.seccion == "perfil" and destino is not None:
+            # Un objeto JSON que solo trae secciones es un contenedor; con datos, es un error
+            if any(k not in IGNORADOS for k in fila.datos):
+                resultado.errores.append(f"{fila.origen}: con --perfil no se admiten filas «perfil».")
+                invalidas.add(id(fila))
+            else:
+                contenedores.add(id(fila))
+            continue
+        try:
+            fila.objeto = _construir(fila)
+        except ValidationError as e:
+            resultado.errores.append(f"{fila.origen} ({fila.seccion}): {_mensajes(e)}")
+            invalidas.add(id(fila))
+
+    # Las secciones de un perfil inválido tampoco se importan
+    validas = [f for f in filas if id(f) not in invalidas | contenedores and (f.perfil is None or id(f.perfil) not in invalidas)]
+    if dry_run or (resultado.errores and not omitir_invalidas): return resultado
+
+    with transaction.atomic():
+        perfiles = [f for f in validas if f.seccion == "perfil"]
+        Datospersonales.objects.bulk_create([f.objeto for f in perfiles], batch_size=batch_size)
+        resultado.perfiles = len(perfiles)
+        for seccion, modelo in MODELOS.items():
+            lote = [f for f in validas if f.seccion == seccion]
+            for f in lote:
+                f.objeto.idperfilconqueestaactivo = destino or f.perfil.objeto
+            modelo.objects.bulk_create([f.objeto for f in lote], batch_size=batch_size)
+            if lote: resultado.filas[seccion] = len(lote)
+
+        afectados = {f.objeto.pk for f in perfiles}
+        if destino:
+            afectados.add(destino.pk)
+            bump_version(destino.pk)
+        transaction.on_commit(lambda: _tras_importar(afectados))
+    return resultado
+
+
+def _tras_importar(afectados):
+    cache.delete(CLAVE_PERFIL_POR_DEFECTO)
+    for idperfil in afectados:
+        indexar_perfil(idperfil)
@@ -0,0 +1,94 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Trabajopdf
+from .pdf import generate_cv_pdf
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# Cola de PDFs en base de datos (sin broker externo)
+# ============================================================
+
+def _abandonado():
+    return timezone.now() - timedelta(seconds=settings.CV_PDF_JOB_TIMEOUT)
+
+
+def expirar_abandonados():
+    """Pasa a ERROR los trabajos cuyo worker murió (OOM, timeout) en el último intento.
+
+    Sin esto se quedan en "procesando" para siempre: claim_next ya no los
+    toma (intentos agotados) y el cliente sigue consultando el estado.
+    """
+    return Trabajopdf.objects.filter(
+        estado=Trabajopdf.PROCESANDO, tomado__lt=_abandonado(), intentos__gte=settings.CV_PDF_JOB_MAX_INTENTOS,
+    ).update(estado=Trabajopdf.ERROR, error="El worker no terminó el trabajo en ningún intento", terminado=timezone.now())
+
+
+def enqueue(perfil, secciones, base_url):
+    # Si ya hay un trabajo vivo para la misma variante, se reutiliza. Uno
+    # "procesando" abandonado solo sirve si le quedan intentos (claim_next lo retoma).
+    secciones = ",".join(sorted(secciones))
+    expirar_abandonados()
+    vivo = Q(estado__in=[Trabajopdf.PENDIENTE, Trabajopdf.LISTO]) | Q(
+        Q(tomado__gte=_abandonado()) | Q(intentos__lt=settings.CV_PDF_JOB_MAX_INTENTOS),
+        estado=Trabajopdf.PROCESANDO,
+    )
+    existente = Trabajopdf.objects.filter(
+        vivo, idperfil=perfil, version=perfil.version, secciones=secciones,
+    ).order_by("-creado").first()
+    if existente: return existente
+    return Trabajopdf.objects.create(idperfil=perfil, version=perfil.version, secciones=secciones, base_url=base_url)
+
+
+def claim_next():
+    """Reserva el siguiente trabajo pendiente (o abandonado) para este worker.
+
+    La reserva es un UPDATE condicionado al estado que se leyó, así que
+    solo un worker puede ganarla aunque la base (SQLite) no soporte
+    SELECT ... FOR UPDATE SKIP LOCKED.
+    """
+    expirar_abandonados()
+    ahora = timezone.now()
+    abandonado = ahora - timedelta(seconds=settings.CV_PDF_JOB_TIMEOUT)
+    disponibles = Trabajopdf.objects.filter(
+        Q(estado=Trabajopdf.PENDIENTE) | Q(estado=Trabajopdf.PROCESANDO, tomado__lt=abandonado),
+        intentos__lt=settings.CV_PDF_JOB_MAX_INTENTOS,
+    ).order_by("creado")
+
+    for trabajo in disponibles.only("idtrabajo", "estado", "tomado")[:10]:
+        ganado = Trabajopdf.objects.filter(
+            pk=trabajo.pk, estado=trabajo.estado, tomado=trabajo.tomado,
+        ).update(estado=Trabajopdf.PROCESANDO, tomado=ahora, intentos=F("intentos") + 1)
+        if ganado: return Trabajopdf.objects.select_related("idperfil").get(pk=trabajo.pk)
+    return None
+
+
+def run(trabajo):
+    perfil = trabajo.idperfil
+    secciones = set(filter(None, trabajo.secciones.split(",")))
+    try:
+        archivo, _, omitidos = generate_cv_pdf(perfil, secciones, trabajo.base_url)
+        with archivo:
+            trabajo.archivo.save(f"CV_{perfil.pk}_{trabajo.token.hex}.pdf", File(archivo), save=False)
+    except Exception as e:
+        logger.exception("Fallo generando el PDF del trabajo %s", trabajo.pk)
+        # Se reintenta hasta agotar CV_PDF_JOB_MAX_INTENTOS
+        reintentar = trabajo.intentos < settings.CV_PDF_JOB_MAX_INTENTOS
+        Trabajopdf.objects.filter(pk=trabajo.pk).update(
+            estado=Trabajopdf.PENDIENTE if reintentar else Trabajopdf.ERROR,
+            error=str(e), terminado=None if reintentar else timezone.now(),
+        )
+        return False
+
+    if omitidos: logger.warning("Trabajo %s: anexos omitidos %s", trabajo.pk, " ".join(omitidos))
+    Trabajopdf.objects.filter(pk=trabajo.pk).update(
+        estado=Trabajopdf.LISTO, archivo=trabajo.archivo.name, error=" ".join(omitidos) or None, terminado=timezone.now(),
+    )
+    return True
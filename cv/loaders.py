@@ -0,0 +1,60 @@
+from django.db.models import Prefetch, prefetch_related_objects
+from django.shortcuts import get_object_or_404
+
+from .models import (
+    Datospersonales, Experiencialaboral, Cursosrealizados,
+    Productosacademicos, Productoslaborales, Reconocimientos, Ventagarage
+)
+
+
+# ============================================================
+# Carga del perfil con sus secciones visibles (perfil_detail y cv_print)
+# ============================================================
+# Una consulta para el perfil y una por sección vía Prefetch, sea cual sea
+# el número de filas. Cada sección queda en ``perfil.<related_name>_visibles``
+# con el mismo filtro y orden en la web y en el PDF.
+
+SECCIONES = {
+    # clave del modal: (related_name, modelo, filtro de visibilidad, orden)
+    "exp": ("experiencias", Experiencialaboral, {"activarparaqueseveaenfront": True}, ("-fechainiciogestion", "-pk")),
+    "edu": ("cursos", Cursosrealizados, {"activarparaqueseveaenfront": True}, ("-fechainicio", "-pk")),
+    "acad": ("productos_academicos", Productosacademicos, {"activarparaqueseveaenfront": True}, ("-pk",)),
+    "lab": ("productos_laborales", Productoslaborales, {"activarparaqueseveaenfront": True}, ("-fechaproducto", "-pk")),
+    "rec": ("reconocimientos", Reconocimientos, {"activarparaqueseveaenfront": True}, ("-fechareconocimiento", "-pk")),
+    "garage": ("ventas_garage", Ventagarage, {"activo": True}, ("-fechapublicacion", "-pk")),
+}
+
+
+def _attr(related_name): return f"{related_name}_visibles"
+
+
+def section_prefetches(secciones=None):
+    """Prefetch filtrados y ordenados de las secciones pedidas (todas por defecto)."""
+    claves = SECCIONES if secciones is None else [k for k in SECCIONES if k in secciones]
+    prefetches = []
+    for clave in claves:
+        related_name, modelo, filtro, orden = SECCIONES[clave]
+        prefetches.append(Prefetch(related_name, queryset=modelo.objects.filter(**filtro).order_by(*orden), to_attr=_attr(related_name)))
+    return prefetches
+
+
+def load_profile(idperfil, secciones=None):
+    """Perfil con sus secciones visibles ya cargadas; 404 si no existe."""
+    qs = Datospersonales.objects.prefetch_related(*section_prefetches(secciones))
+    return get_object_or_404(qs, idperfil=idperfil)
+
+
+def load_sections(perfil, secciones=None):
+    """Carga sobre un perfil ya obtenido las secciones que aún no tenga."""
+    pendientes = [p for p in section_prefetches(secciones) if not hasattr(perfil, p.to_attr)]
+    if pendientes: prefetch_related_objects([perfil], *pendientes)
+    return perfil
+
+
+def profile_context(perfil, secciones=None):
+    """Contexto de plantilla; las secciones no pedidas van vacías."""
+    context = {"perfil": perfil}
+    for clave, (related_name, *_) in SECCIONES.items():
+        pedida = secciones is None or clave in secciones
+        context[related_name] = getattr(perfil, _attr(related_name)) if pedida else []
+    return context
@@ -0,0 +1,203 @@
+import io
+import json
+import math
+import os
+import platform
+import resource
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.test import override_settings
+from pypdf import PdfWriter
+
+from cv.attachments import AttachmentBatch, attachment_url
+from cv.benchmarks import AttachmentServer, build_profile
+from cv.loaders import SECCIONES, load_profile, profile_context
+from cv.models import Datospersonales
+from cv.pdf import documentos, generate_cv_pdf, render_fragment
+from cv.pdf_cache import FragmentCache, SECCIONES_MODAL
+
+
+def percentil(valores, p):
+    orden = sorted(valores)
+    return orden[max(0, math.ceil(p / 100 * len(orden)) - 1)]
+
+
+def rss_kb():
+    """RSS actual del proceso (Linux, /proc); None si no se puede leer."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        return None
+
+
+class MuestreoRss(threading.Thread):
+    """Pico de RSS mientras dura una etapa, muestreado en segundo plano.
+
+    A diferencia de ru_maxrss (máximo del proceso desde que arrancó, solo
+    crece) y de tracemalloc (solo el heap de Python), incluye la memoria
+    nativa de WeasyPrint, pypdf o Pillow. Es RSS de todo el proceso: cuenta
+    también lo que hagan a la vez otros hilos, como el servidor de anexos.
+    """
+
+    def __init__(self, intervalo=0.001):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.inicio = self.pico = rss_kb()
+        self._fin = threading.Event()
+
+    def run(self):
+        while not self._fin.wait(self.intervalo):
+            self.pico = max(self.pico, rss_kb())
+
+    def parar(self):
+        """Crecimiento del pico de RSS sobre el valor al entrar en la etapa (KB)."""
+        self._fin.set()
+        self.join()
+        self.pico = max(self.pico, rss_kb())
+        return self.pico - self.inicio
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el pipeline de cv_print por etapas (consultas, render, descargas, fusión y total) "
+        "sobre un perfil sintético y un servidor local de anexos. Imprime JSON. Con --memory, "
+        "cada etapa informa cuánto crece el pico de RSS durante ella; process_peak_rss_kb es el "
+        "máximo de todo el proceso."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("-n", "--repeat", type=int, default=5)
+        parser.add_argument("--experiencias", type=int, default=5)
+        parser.add_argument("--cursos", type=int, default=10)
+        parser.add_argument("--reconocimientos", type=int, default=3)
+        parser.add_argument("--garage", type=int, default=2)
+        parser.add_argument("--productos", type=int, default=3)
+        parser.add_argument("--attachments", type=int, default=5, help="Cuántas filas llevan anexo PDF.")
+        parser.add_argument("--attachment-kb", type=int, default=200)
+        parser.add_argument("--latency", type=float, default=0.05, help="Latencia del servidor de anexos (s).")
+        parser.add_argument("--failure-rate", type=float, default=0.0)
+        parser.add_argument("--memory", action="store_true", help=(
+            "Mide por etapa el crecimiento del pico de RSS del proceso (incluye memoria nativa; "
+            "muestreo de /proc cada 1 ms, solo Linux)."))
+        parser.add_argument("--python-heap", action="store_true", help="Mide por etapa el pico del heap de Python (tracemalloc, más lento).")
+        parser.add_argument("--output", help="Escribe el JSON en este archivo en lugar de stdout.")
+
+    def handle(self, *args, **options):
+        if options["memory"] and rss_kb() is None:
+            raise CommandError("--memory necesita /proc/self/statm (Linux).")
+        self.memory = options["memory"]
+        self.python_heap = options["python_heap"]
+        self.stages = {}
+        cache_dir = tempfile.mkdtemp(prefix="bench-cv-")
+
+        with AttachmentServer(latency=options["latency"], failure_rate=options["failure_rate"]) as server, \
+                override_settings(
+                    CV_ATTACHMENT_CACHE_DIR=f"{cache_dir}/anexos", CV_PDF_CACHE_DIR=f"{cache_dir}/pdf",
+                    CV_PDF_FRAGMENT_CACHE_DIR=f"{cache_dir}/fragmentos",
+                ), transaction.atomic():
+            perfil = build_profile(
+                server, experiencias=options["experiencias"], cursos=options["cursos"],
+                reconocimientos=options["reconocimientos"], garage=options["garage"],
+                productos=options["productos"], attachments=options["attachments"],
+                attachment_size=options["attachment_kb"] * 1024,
+            )
+            for i in range(options["repeat"]):
+                self.run_once(perfil, i)
+            transaction.set_rollback(True)
+            bytes_servidos = server.bytes_sent
+
+        resultado = {
+            "params": {k: options[k] for k in (
+                "repeat", "experiencias", "cursos", "reconocimientos", "garage", "productos",
+                "attachments", "attachment_kb", "latency", "failure_rate",
+            )},
+            "python": platform.python_version(),
+            "stages": {nombre: self.resumen(m) for nombre, m in self.stages.items()},
+            "attachment_server_bytes": bytes_servidos,
+            # Máximo de todo el proceso (servidor de anexos incluido), no de una etapa
+            "process_peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        }
+        salida = json.dumps(resultado, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f: f.write(salida + "\n")
+        else:
+            self.stdout.write(salida)
+
+    @contextmanager
+    def stage(self, nombre):
+        medidas = self.stages.setdefault(nombre, {"ms": [], "rss_kb": [], "heap_kb": [], "output_bytes": []})
+        if self.python_heap:
+            tracemalloc.start()
+        if self.memory:
+            muestreo = MuestreoRss()
+            muestreo.start()
+        inicio = time.perf_counter()
+        try:
+            yield medidas
+        finally:
+            medidas["ms"].append((time.perf_counter() - inicio) * 1000)
+            if self.memory:
+                medidas["rss_kb"].append(muestreo.parar())
+            if self.python_heap:
+                medidas["heap_kb"].append(tracemalloc.get_traced_memory()[1] // 1024)
+                tracemalloc.stop()
+
+    def resumen(self, medidas):
+        r = {
+            "n": len(medidas["ms"]),
+            "p50_ms": round(percentil(medidas["ms"], 50), 2),
+            "p95_ms": round(percentil(medidas["ms"], 95), 2),
+        }
+        if medidas["rss_kb"]: r["peak_rss_growth_kb"] = max(medidas["rss_kb"])
+        if medidas["heap_kb"]: r["python_heap_peak_kb"] = max(medidas["heap_kb"])
+        if medidas["output_bytes"]: r["output_bytes"] = max(medidas["output_bytes"])
+        return r
+
+    def run_once(self, perfil, i):
+        with self.stage("queries"):
+            context = profile_context(load_profile(perfil.pk))
+
+        docs = documentos(context, [s for s in SECCIONES_MODAL if context[SECCIONES[s][0]]])
+        with self.stage("template"):
+            for plantilla, contexto in docs:
+                render_to_string(plantilla, contexto)
+
+        # Caché de fragmentos nueva en cada vuelta: se mide la maquetación en frío
+        with self.stage("weasyprint"), tempfile.TemporaryDirectory() as d:
+            cache = FragmentCache(directory=d)
+            fragmentos = []
+            for plantilla, contexto in docs:
+                with render_fragment(plantilla, contexto, None, cache) as f: fragmentos.append(f.read())
+
+        anexos = context["cursos"] + context["experiencias"] + context["reconocimientos"] + context["ventas_garage"]
+        with self.stage("download") as m:
+            batch = AttachmentBatch((u for u in map(attachment_url, anexos) if u), cache=False)
+            descargados = [f.read() for f in batch.results() if f is not None]
+            batch.close()
+            m["output_bytes"].append(sum(map(len, descargados)))
+
+        with self.stage("merge") as m:
+            merger = PdfWriter()
+            for data in fragmentos + descargados:
+                merger.append(io.BytesIO(data))
+            out = io.BytesIO()
+            merger.write(out)
+            merger.close()
+            m["output_bytes"].append(out.tell())
+
+        # Extremo a extremo: la primera vuelta llega con las cachés vacías
+        nombre = "total_cold" if i == 0 else "total_warm"
+        with self.stage(nombre) as m:
+            # Instancia nueva: como en cv_print, las secciones se consultan dentro
+            pdf, _, _ = generate_cv_pdf(Datospersonales.objects.get(pk=perfil.pk), set(SECCIONES_MODAL), None)
+            pdf.seek(0, io.SEEK_END)
+            m["output_bytes"].append(pdf.tell())
+            pdf.close()
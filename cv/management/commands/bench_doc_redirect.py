@@ -0,0 +1,60 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.shortcuts import get_object_or_404, redirect
+from django.test import RequestFactory
+
+from cv.enlaces import DOC_MODELOS, _local
+from cv.models import Cursosrealizados, Datospersonales
+from cv.views import doc_redirect
+
+
+def doc_redirect_anterior(request, model, pk):
+    # Implementación previa: fila completa + URL calculada en cada clic
+    ModelClass = DOC_MODELOS.get(model)
+    obj = get_object_or_404(ModelClass, pk=pk)
+    if obj.archivo_digital: return redirect(obj.archivo_digital.url)
+    if getattr(obj, 'rutacertificado', None): return redirect(obj.rutacertificado)
+    return redirect('home')
+
+
+class Command(BaseCommand):
+    help = "Compara el rendimiento de doc_redirect (antes/después de la caché de enlaces) con clics repetidos. Imprime JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50, help="Certificados distintos entre los que se reparten los clics.")
+        parser.add_argument("-n", "--requests", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        with transaction.atomic():
+            perfil = Datospersonales.objects.create(nombres="Perfil", apellidos="Benchmark")
+            cursos = Cursosrealizados.objects.bulk_create([
+                Cursosrealizados(idperfilconqueestaactivo=perfil, nombrecurso=f"Curso {i}",
+                                 rutacertificado=f"https://example.com/c{i}.pdf", final_url=f"https://example.com/c{i}.pdf")
+                for i in range(options["rows"])
+            ])
+            pks = [c.pk for c in cursos]
+
+            def medir(vista):
+                inicio = time.perf_counter()
+                for i in range(options["requests"]):
+                    pk = pks[i % len(pks)]
+                    response = vista(factory.get(f"/cv/doc/cursos/{pk}/"), "cursos", pk)
+                    assert response.status_code == 302
+                return options["requests"] / (time.perf_counter() - inicio)
+
+            for pk in pks: cache.delete(f"cv:doc:cursos:{pk}")
+            _local.clear()
+            resultado = {
+                "params": {"rows": options["rows"], "requests": options["requests"], "cache": settings.CACHES["default"]["BACKEND"].rsplit(".", 1)[-1]},
+                "antes_rps": round(medir(doc_redirect_anterior)),
+                "despues_rps": round(medir(doc_redirect)),
+            }
+            resultado["mejora"] = round(resultado["despues_rps"] / resultado["antes_rps"], 1)
+            transaction.set_rollback(True)
+        self.stdout.write(json.dumps(resultado, indent=2))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from cv.attachment_cache import AttachmentCache
+
+
+class Command(BaseCommand):
+    help = "Muestra estadísticas de la caché de anexos de cv_print o la vacía (--purge)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--purge", action="store_true", help="Elimina todas las entradas de la caché.")
+
+    def handle(self, *args, **options):
+        cache = AttachmentCache()
+        if options["purge"]:
+            removed = cache.purge()
+            self.stdout.write(self.style.SUCCESS(f"Caché vaciada: {removed} entradas eliminadas."))
+            return
+
+        stats = cache.stats()
+        self.stdout.write(f"Directorio: {stats['directory']}")
+        self.stdout.write(f"Entradas:   {stats['entries']}")
+        self.stdout.write(f"Tamaño:     {stats['bytes'] / 1024 / 1024:.1f} MB de {stats['max_bytes'] / 1024 / 1024:.1f} MB")
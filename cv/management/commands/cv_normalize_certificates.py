@@ -0,0 +1,34 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+
+from cv.certificados import normalizar_certificado
+from cv.models import Experiencialaboral, Cursosrealizados, Reconocimientos, Ventagarage
+from cv.signals import bump_version
+
+
+class Command(BaseCommand):
+    help = "Genera la copia PDF normalizada de los certificados subidos antes de que existiera."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Regenera también los que ya tienen copia.")
+
+    def handle(self, *args, **options):
+        for modelo in (Experiencialaboral, Cursosrealizados, Reconocimientos, Ventagarage):
+            qs = modelo.objects.exclude(archivo_digital="").exclude(archivo_digital__isnull=True)
+            if not options["force"]: qs = qs.filter(archivo_pdf_url__isnull=True)
+
+            for obj in qs.iterator():
+                try:
+                    with obj.archivo_digital.open("rb") as f:
+                        obj.subir_pdf_normalizado(*normalizar_certificado(f))
+                except (ValidationError, OSError) as e:
+                    self.stderr.write(f"{modelo.__name__} {obj.pk}: {' '.join(getattr(e, 'messages', [str(e)]))}")
+                    continue
+                # update() evita full_clean: filas antiguas pueden no cumplir validaciones nuevas
+                modelo.objects.filter(pk=obj.pk).update(
+                    archivo_pdf_url=obj.archivo_pdf_url,
+                    archivo_pdf_paginas=obj.archivo_pdf_paginas,
+                    archivo_pdf_bytes=obj.archivo_pdf_bytes,
+                )
+                bump_version(obj.idperfilconqueestaactivo_id)
+                self.stdout.write(f"{modelo.__name__} {obj.pk}: {obj.archivo_pdf_paginas} pág., {obj.archivo_pdf_bytes // 1024} KB")
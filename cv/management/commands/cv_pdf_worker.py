@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from cv import jobs
+
+
+class Command(BaseCommand):
+    help = "Procesa la cola de PDFs de cv_print. Se pueden lanzar varios workers a la vez."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Procesa los trabajos pendientes y termina.")
+        parser.add_argument("--poll", type=float, default=2.0, help="Segundos de espera cuando la cola está vacía.")
+
+    def handle(self, *args, **options):
+        procesados = 0
+        while True:
+            close_old_connections()
+            trabajo = jobs.claim_next()
+            if trabajo is None:
+                if options["once"]: break
+                time.sleep(options["poll"])
+                continue
+
+            ok = jobs.run(trabajo)
+            procesados += 1
+            estilo = self.style.SUCCESS if ok else self.style.ERROR
+            self.stdout.write(estilo(f"Trabajo {trabajo.pk} (perfil {trabajo.idperfil_id}): {'listo' if ok else 'error'}"))
+
+        self.stdout.write(f"{procesados} trabajos procesados.")
@@ -0,0 +1,50 @@
+import io
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+
+from cv.loaders import load_sections, profile_context
+from cv.models import Datospersonales
+from cv.pdf import documentos
+from cv.pdf_cache import SECCIONES_MODAL
+from cv.render import RenderEngine
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark del render WeasyPrint de cv_print: motor nuevo por render (frío) vs. compartido (caliente)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("idperfil", type=int, nargs="?", help="Perfil a renderizar (por defecto, el primero activo).")
+        parser.add_argument("-n", "--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        qs = Datospersonales.objects.all()
+        perfil = qs.filter(pk=options["idperfil"]).first() if options["idperfil"] else qs.filter(activarparaqueseveaenfront=True).order_by("pk").first()
+        if perfil is None: raise CommandError("No hay perfil para renderizar.")
+
+        context = profile_context(load_sections(perfil))
+        # Mismos documentos que maqueta cv.pdf, sin pasar por la caché de fragmentos
+        fragmentos = [render_to_string(plantilla, contexto) for plantilla, contexto in documentos(context, SECCIONES_MODAL)]
+
+        def medir(engine_factory):
+            tiempos = []
+            for _ in range(options["repeat"]):
+                inicio = time.perf_counter()
+                engine = engine_factory()
+                for html_string in fragmentos:
+                    engine.write_pdf(html_string, None, io.BytesIO())
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            return tiempos
+
+        frio = medir(RenderEngine)
+        compartido = RenderEngine()
+        compartido.write_pdf(fragmentos[0], None, io.BytesIO())
+        caliente = medir(lambda: compartido)
+
+        for nombre, tiempos in (("frío", frio), ("caliente", caliente)):
+            self.stdout.write(
+                f"{nombre:9} mediana {statistics.median(tiempos):8.1f} ms   "
+                f"min {min(tiempos):8.1f} ms   max {max(tiempos):8.1f} ms"
+            )
@@ -0,0 +1,53 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from cv.models import Blob, Subida
+from cv.signals import ARCHIVOS
+from cv.subidas import liberar_caducadas
+
+
+class Command(BaseCommand):
+    help = "Borra los archivos subidos (blobs) que ninguna fila usa; con --recount recalcula antes las referencias."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recount", action="store_true", help="Recalcula blob.referencias desde las filas de la BD.")
+        parser.add_argument("--grace-hours", type=float, default=24,
+                            help="No borra blobs más recientes (subidas cuyo guardado aún no terminó).")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        # Subidas por partes abandonadas (o completas que nadie guardó)
+        if not options["dry_run"]: self.stdout.write(f"{liberar_caducadas()} subidas caducadas borradas.")
+        if options["recount"]: self.recontar(options["dry_run"])
+
+        limite = timezone.now() - timedelta(hours=options["grace_hours"])
+        borrados = liberados = 0
+        for sha, nombre, tam in Blob.objects.filter(referencias=0, creado__lt=limite).values_list("sha256", "nombre", "bytes"):
+            if options["dry_run"]:
+                self.stdout.write(f"Se borraría {nombre} ({tam // 1024} KB)")
+                continue
+            # Primero la fila (solo si sigue sin referencias), luego el archivo
+            if not Blob.objects.filter(pk=sha, referencias=0).delete()[0]: continue
+            default_storage.borrar_blob(nombre)
+            borrados += 1
+            liberados += tam
+        self.stdout.write(f"{borrados} blobs borrados, {liberados // 1024} KB liberados.")
+
+    def recontar(self, dry_run):
+        usados = Counter()
+        for modelo, campos in [*ARCHIVOS.items(), (Subida, ("archivo", "archivo_pdf_url"))]:
+            for fila in modelo.objects.values_list(*campos).iterator():
+                usados.update(v for v in fila if v)
+
+        cambios = []
+        for blob in Blob.objects.only("sha256", "nombre", "url", "referencias").iterator():
+            referencias = usados[blob.nombre] + usados[blob.url]
+            if referencias != blob.referencias:
+                blob.referencias = referencias
+                cambios.append(blob)
+        if not dry_run: Blob.objects.bulk_update(cambios, ["referencias"], batch_size=500)
+        self.stdout.write(f"{len(cambios)} blobs con referencias corregidas.")
@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from cv.enlaces import DOC_MODELOS
+from cv.miniaturas import FORMATOS, MiniaturaCache, obtener
+from cv.models import Datospersonales, Ventagarage, enlaces_archivo
+from cv.signals import bump_version
+
+
+class Command(BaseCommand):
+    help = "Recalcula la columna thumbnail de los certificados y, con --warm, genera miniaturas y variantes locales."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--warm", action="store_true", help="Genera ya las miniaturas y variantes (srcset/impresión) que aún no están en disco.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        lote_max = options["batch_size"]
+        perfiles, pendientes = set(), []
+        for modelo in DOC_MODELOS.values():
+            lote = []
+            campos = ["archivo_digital", "final_url", "thumbnail", "idperfilconqueestaactivo"]
+            if hasattr(modelo, "rutacertificado"): campos.append("rutacertificado")
+            qs = modelo.objects.exclude(final_url__isnull=True).only(*campos)
+            for obj in qs.iterator(chunk_size=lote_max):
+                _, _, thumbnail = enlaces_archivo(obj)
+                if thumbnail and thumbnail != obj.final_url and "cloudinary" not in thumbnail: pendientes.append((obj.final_url, None, "jpg"))
+                if thumbnail == obj.thumbnail: continue
+                obj.thumbnail = thumbnail
+                lote.append(obj)
+                perfiles.add(obj.idperfilconqueestaactivo_id)
+                if len(lote) >= lote_max:
+                    modelo.objects.bulk_update(lote, ["thumbnail"])
+                    lote = []
+            modelo.objects.bulk_update(lote, ["thumbnail"])
+
+        # Las páginas cacheadas por versión llevan la URL vieja
+        for idperfil in perfiles - {None}:
+            bump_version(idperfil)
+        self.stdout.write(f"{len(perfiles - {None})} perfiles con miniaturas actualizadas.")
+
+        if not options["warm"]: return
+        # Variantes de fotos de perfil e imágenes de garage servidas por el proxy local
+        variantes = [(ancho, formato) for ancho in settings.CV_IMG_WIDTHS for formato in FORMATOS]
+        fotos = Datospersonales.objects.filter(activarparaqueseveaenfront=True).exclude(foto_perfil_url__isnull=True).exclude(foto_perfil_url="")
+        for url in fotos.values_list("foto_perfil_url", flat=True):
+            if "cloudinary" in url: continue
+            pendientes += [(url, ancho, formato) for ancho, formato in variantes] + [(url, settings.CV_IMG_PRINT_WIDTH, "jpg")]
+        garage = Ventagarage.objects.filter(activo=True, is_pdf=False).exclude(final_url__isnull=True)
+        for url in garage.values_list("final_url", flat=True):
+            if "cloudinary" in url: continue
+            pendientes += [(url, ancho, formato) for ancho, formato in variantes]
+
+        cache, generadas = MiniaturaCache(), 0
+        for url, ancho, formato in dict.fromkeys(pendientes):
+            cached = cache.open(cache.key(url, ancho, formato))
+            if cached:
+                cached[1].close()
+                continue
+            try:
+                f = obtener(url, cache, ancho, formato)
+            except Exception as e:
+                self.stderr.write(f"{url}: {e}")
+                continue
+            if f:
+                f.close()
+                generadas += 1
+        self.stdout.write(f"{generadas} miniaturas generadas.")
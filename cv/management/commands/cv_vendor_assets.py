@@ -0,0 +1,32 @@
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from cv.vendor import ARCHIVOS, VENDOR_DIR, sin_source_map, verificar
+
+
+class Command(BaseCommand):
+    help = "Descarga en cv/static/vendor las dependencias front-end fijadas en cv/vendor.py (Bootstrap, iconos, fuentes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Vuelve a descargar los archivos que ya existen.")
+        parser.add_argument("--timeout", type=float, default=30)
+
+    def handle(self, *args, **options):
+        descargados = 0
+        for destino, url, integridad in ARCHIVOS:
+            ruta = VENDOR_DIR / destino
+            if ruta.exists() and not options["force"]: continue
+            try:
+                response = requests.get(url, timeout=options["timeout"])
+                response.raise_for_status()
+            except requests.RequestException as exc:
+                raise CommandError(f"No se pudo descargar {url}: {exc}")
+            # El SRI se comprueba sobre el archivo tal cual lo publica el proyecto
+            if not verificar(response.content, integridad):
+                raise CommandError(f"{url} no coincide con su hash de integridad {integridad}")
+
+            ruta.parent.mkdir(parents=True, exist_ok=True)
+            ruta.write_bytes(sin_source_map(destino, response.content))
+            self.stdout.write(f"{destino} ({len(response.content) // 1024} KB)")
+            descargados += 1
+        self.stdout.write(f"{descargados} archivos descargados en {VENDOR_DIR}; súbelos al repo y ejecuta collectstatic.")
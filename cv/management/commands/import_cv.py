@@ -0,0 +1,48 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cv.importacion import importar, leer_csv, leer_json
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa perfiles y sus secciones desde JSON (formato de /cv/api/v1/) o CSV (columna «seccion»). "
+        "Valida todo antes de escribir e inserta con bulk_create en una transacción."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivos", nargs="+", help="Archivos .json o .csv.")
+        parser.add_argument("--perfil", type=int, help="Añade las secciones a este perfil existente.")
+        parser.add_argument("--skip-invalid", action="store_true", help="Importa las filas válidas aunque otras tengan errores.")
+        parser.add_argument("--dry-run", action="store_true", help="Solo valida.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        filas = []
+        for ruta in map(Path, options["archivos"]):
+            lector = {".json": leer_json, ".csv": leer_csv}.get(ruta.suffix.lower())
+            if lector is None: raise CommandError(f"{ruta}: formato no soportado (usa .json o .csv).")
+            try:
+                with open(ruta, encoding="utf-8-sig", newline="") as f:
+                    filas += lector(f, ruta.name)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"{ruta}: {e}")
+
+        resultado = importar(
+            filas, idperfil=options["perfil"], omitir_invalidas=options["skip_invalid"],
+            dry_run=options["dry_run"], batch_size=options["batch_size"],
+        )
+        for error in resultado.errores:
+            self.stderr.write(error)
+
+        segundos = time.perf_counter() - inicio
+        if options["dry_run"]:
+            self.stdout.write(f"{len(filas)} filas validadas, {len(resultado.errores)} con errores ({segundos:.2f} s).")
+        elif resultado.errores and not options["skip_invalid"]:
+            raise CommandError(f"{len(resultado.errores)} filas con errores; no se importó nada (usa --skip-invalid para importar el resto).")
+        else:
+            detalle = ", ".join(f"{n} {s}" for s, n in resultado.filas.items()) or "sin secciones"
+            self.stdout.write(f"Importados {resultado.perfiles} perfiles ({detalle}) en {segundos:.2f} s.")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from cv.busqueda import reconstruir_indice
+
+
+class Command(BaseCommand):
+    help = "Regenera el índice de búsqueda de texto completo de todos los perfiles activos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+
+    def handle(self, *args, **options):
+        total = reconstruir_indice(lote=options["batch_size"])
+        self.stdout.write(f"{total} perfiles indexados.")
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:30
+
+import cv.models
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv', '0008_datospersonales_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Trabajopdf',
+            fields=[
+                ('idtrabajo', models.BigAutoField(primary_key=True, serialize=False)),
+                ('token', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('secciones', models.CharField(max_length=60)),
+                ('version', models.PositiveIntegerField()),
+                ('base_url', models.CharField(max_length=200)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('listo', 'Listo'), ('error', 'Error')], default='pendiente', max_length=12)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('archivo', models.FileField(blank=True, null=True, upload_to=cv.models.upload_cv_pdf)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('tomado', models.DateTimeField(blank=True, null=True)),
+                ('terminado', models.DateTimeField(blank=True, null=True)),
+                ('idperfil', models.ForeignKey(db_column='idperfil', on_delete=django.db.models.deletion.CASCADE, related_name='trabajos_pdf', to='cv.datospersonales')),
+            ],
+            options={
+                'db_table': 'trabajopdf',
+                'ordering': ['creado'],
+                'managed': True,
+                'indexes': [models.Index(fields=['estado', 'creado'], name='trabajopdf_estado_creado')],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv', '0009_trabajopdf'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cursosrealizados',
+            name='archivo_pdf_bytes',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='cursosrealizados',
+            name='archivo_pdf_paginas',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='cursosrealizados',
+            name='archivo_pdf_url',
+            field=models.CharField(blank=True, editable=False, max_length=300, null=True),
+        ),
+        migrations.AddField(
+            model_name='experiencialaboral',
+            name='archivo_pdf_bytes',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='experiencialaboral',
+            name='archivo_pdf_paginas',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='experiencialaboral',
+            name='archivo_pdf_url',
+            field=models.CharField(blank=True, editable=False, max_length=300, null=True),
+        ),
+        migrations.AddField(
+            model_name='reconocimientos',
+            name='archivo_pdf_bytes',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='reconocimientos',
+            name='archivo_pdf_paginas',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='reconocimientos',
+            name='archivo_pdf_url',
+            field=models.CharField(blank=True, editable=False, max_length=300, null=True),
+        ),
+        migrations.AddField(
+            model_name='ventagarage',
+            name='archivo_pdf_bytes',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ventagarage',
+            name='archivo_pdf_paginas',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ventagarage',
+            name='archivo_pdf_url',
+            field=models.CharField(blank=True, editable=False, max_length=300, null=True),
+        ),
+    ]
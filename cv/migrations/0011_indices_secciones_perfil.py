@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv', '0010_certificado_pdf_normalizado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cursosrealizados',
+            index=models.Index(condition=models.Q(('activarparaqueseveaenfront', True)), fields=['idperfilconqueestaactivo', '-fechainicio', '-idcursorealizado'], name='curso_perfil_visible_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='experiencialaboral',
+            index=models.Index(condition=models.Q(('activarparaqueseveaenfront', True)), fields=['idperfilconqueestaactivo', '-fechainiciogestion', '-idexperiencilaboral'], name='exp_perfil_visible_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='productosacademicos',
+            index=models.Index(condition=models.Q(('activarparaqueseveaenfront', True)), fields=['idperfilconqueestaactivo', '-idproductoacademico'], name='acad_perfil_visible'),
+        ),
+        migrations.AddIndex(
+            model_name='productoslaborales',
+            index=models.Index(condition=models.Q(('activarparaqueseveaenfront', True)), fields=['idperfilconqueestaactivo', '-fechaproducto', '-idproductoslaborales'], name='lab_perfil_visible_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='reconocimientos',
+            index=models.Index(condition=models.Q(('activarparaqueseveaenfront', True)), fields=['idperfilconqueestaactivo', '-fechareconocimiento', '-idreconocimiento'], name='rec_perfil_visible_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='ventagarage',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['idperfilconqueestaactivo', '-fechapublicacion', '-idventagaraje'], name='garage_perfil_activo_fecha'),
+        ),
+    ]
@@ -0,0 +1,113 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+# Copia congelada de cv.models.enlaces_archivo tal como era al crear esta
+# migración: el código vivo puede cambiar (URLs con reverse(), firmas) y la
+# migración tiene que dar siempre el mismo resultado.
+
+def cloudinary_thumbnail(file_url):
+    if not file_url or "cloudinary" not in file_url: return file_url
+    try:
+        if "/upload/" in file_url:
+            base_part, id_part = file_url.split("/upload/")
+            new_url = f"{base_part}/upload/w_600,q_auto,f_jpg,pg_1/{id_part}"
+            if new_url.lower().endswith(".pdf"):
+                new_url = new_url[:-4] + ".jpg"
+            return new_url
+    except Exception: return file_url
+    return file_url
+
+
+def enlaces_archivo(obj):
+    url_final = None
+    if obj.archivo_digital: url_final = obj.archivo_digital.url
+    elif getattr(obj, 'rutacertificado', None): url_final = obj.rutacertificado
+    if not url_final: return None, False, None
+    return url_final, url_final.lower().endswith('.pdf'), cloudinary_thumbnail(url_final)
+
+
+def rellenar_enlaces(apps, schema_editor):
+    # Filas existentes: mismos valores que calcularía CertificadoMixin.save()
+    for nombre in ("Experiencialaboral", "Cursosrealizados", "Reconocimientos", "Ventagarage"):
+        modelo = apps.get_model("cv", nombre)
+        lote = []
+        for obj in modelo.objects.iterator(chunk_size=500):
+            obj.final_url, obj.is_pdf, obj.thumbnail = enlaces_archivo(obj)
+            if obj.final_url: lote.append(obj)
+            if len(lote) >= 500:
+                modelo.objects.bulk_update(lote, ["final_url", "is_pdf", "thumbnail"])
+                lote = []
+        modelo.objects.bulk_update(lote, ["final_url", "is_pdf", "thumbnail"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv', '0012_datospersonales_actualizado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cursosrealizados',
+            name='final_url',
+            field=models.CharField(blank=True, editable=False, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name='cursosrealizados',
+            name='is_pdf',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='cursosrealizados',
+            name='thumbnail',
+            field=models.CharField(blank=True, editable=False, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name='experiencialaboral',
+            name='final_url',
+            field=models.CharField(blank=True, editable=False, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name='experiencialaboral',
+            name='is_pdf',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='experiencialaboral',
+            name='thumbnail',
+            field=models.CharField(blank=True, editable=False, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name='reconocimientos',
+            name='final_url',
+            field=models.CharField(blank=True, editable=False, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name='reconocimientos',
+            name='is_pdf',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='reconocimientos',
+            name='thumbnail',
+            field=models.CharField(blank=True, editable=False, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name='ventagarage',
+            name='final_url',
+            field=models.CharField(blank=True, editable=False, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name='ventagarage',
+            name='is_pdf',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ventagarage',
+            name='thumbnail',
+            field=models.CharField(blank=True, editable=False, max_length=500, null=True),
+        ),
+        migrations.RunPython(rellenar_enlaces, migrations.RunPython.noop),
+    ]
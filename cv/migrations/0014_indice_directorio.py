@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv', '0013_certificado_enlaces'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='datospersonales',
+            index=models.Index(models.Func(models.F('apellidos'), output_field=models.CharField(), template="COALESCE(%(expressions)s, '')"), models.F('idperfil'), condition=models.Q(('activarparaqueseveaenfront', True)), name='perfil_directorio'),
+        ),
+    ]
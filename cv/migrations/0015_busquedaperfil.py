@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+POSTGRES = [
+    """ALTER TABLE busquedaperfil ADD COLUMN vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('spanish', coalesce(titulo, '')), 'A') ||
+        setweight(to_tsvector('spanish', coalesce(documento, '')), 'B')
+    ) STORED""",
+    "CREATE INDEX busquedaperfil_vector ON busquedaperfil USING GIN (vector)",
+]
+
+# Las filas de los perfiles existentes las rellena la 0019
+
+# Tabla FTS5 de contenido externo, sincronizada con busquedaperfil por triggers
+SQLITE = [
+    """CREATE VIRTUAL TABLE busquedaperfil_fts USING fts5(
+        titulo, documento, content='busquedaperfil', content_rowid='idperfil',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER busquedaperfil_ai AFTER INSERT ON busquedaperfil BEGIN
+        INSERT INTO busquedaperfil_fts(rowid, titulo, documento) VALUES (new.idperfil, new.titulo, new.documento);
+    END""",
+    """CREATE TRIGGER busquedaperfil_ad AFTER DELETE ON busquedaperfil BEGIN
+        INSERT INTO busquedaperfil_fts(busquedaperfil_fts, rowid, titulo, documento) VALUES ('delete', old.idperfil, old.titulo, old.documento);
+    END""",
+    """CREATE TRIGGER busquedaperfil_au AFTER UPDATE ON busquedaperfil BEGIN
+        INSERT INTO busquedaperfil_fts(busquedaperfil_fts, rowid, titulo, documento) VALUES ('delete', old.idperfil, old.titulo, old.documento);
+        INSERT INTO busquedaperfil_fts(rowid, titulo, documento) VALUES (new.idperfil, new.titulo, new.documento);
+    END""",
+]
+
+
+def crear_indice(apps, schema_editor):
+    sentencias = {"postgresql": POSTGRES, "sqlite": SQLITE}.get(schema_editor.connection.vendor, [])
+    for sql in sentencias:
+        schema_editor.execute(sql)
+
+
+def borrar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("ALTER TABLE busquedaperfil DROP COLUMN vector")
+    elif schema_editor.connection.vendor == "sqlite":
+        for trigger in ("busquedaperfil_ai", "busquedaperfil_ad", "busquedaperfil_au"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        schema_editor.execute("DROP TABLE IF EXISTS busquedaperfil_fts")
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv', '0014_indice_directorio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Busquedaperfil',
+            fields=[
+                ('idperfil', models.OneToOneField(db_column='idperfil', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='busqueda', serialize=False, to='cv.datospersonales')),
+                ('titulo', models.TextField(blank=True, default='')),
+                ('documento', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'db_table': 'busquedaperfil',
+                'managed': True,
+            },
+        ),
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv', '0015_busquedaperfil'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ventagarage',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['-fechapublicacion', '-idventagaraje'], name='garage_activo_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='ventagarage',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['precio', 'idventagaraje'], name='garage_activo_precio'),
+        ),
+        migrations.AddIndex(
+            model_name='ventagarage',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['estado', '-fechapublicacion', '-idventagaraje'], name='garage_activo_estado_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='ventagarage',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['estado', 'precio', 'idventagaraje'], name='garage_activo_estado_precio'),
+        ),
+    ]
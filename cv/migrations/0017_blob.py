@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv', '0016_indices_catalogo_garage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('nombre', models.CharField(max_length=300, unique=True)),
+                ('url', models.CharField(db_index=True, max_length=500)),
+                ('bytes', models.PositiveBigIntegerField()),
+                ('referencias', models.PositiveIntegerField(default=1)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'blob',
+                'managed': True,
+                'indexes': [models.Index(condition=models.Q(('referencias', 0)), fields=['creado'], name='blob_huerfano')],
+            },
+        ),
+    ]
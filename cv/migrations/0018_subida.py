@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:58
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv', '0017_blob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Subida',
+            fields=[
+                ('token', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('campo', models.CharField(max_length=10)),
+                ('nombre', models.CharField(max_length=200)),
+                ('tamano', models.PositiveBigIntegerField()),
+                ('recibidos', models.PositiveBigIntegerField(default=0)),
+                ('archivo', models.CharField(blank=True, max_length=300, null=True)),
+                ('archivo_pdf_url', models.CharField(blank=True, max_length=300, null=True)),
+                ('archivo_pdf_paginas', models.PositiveIntegerField(blank=True, null=True)),
+                ('archivo_pdf_bytes', models.PositiveIntegerField(blank=True, null=True)),
+                ('creado', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'db_table': 'subida',
+                'managed': True,
+            },
+        ),
+    ]
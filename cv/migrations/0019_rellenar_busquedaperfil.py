@@ -0,0 +1,59 @@
+from django.db import migrations
+
+
+# Rellena el índice de búsqueda para los perfiles que ya existían cuando se
+# aplicó la 0015 (que crea la tabla vacía). Copia congelada de
+# busqueda.documento_perfil: la migración no debe cambiar si cambia el código.
+# En SQLite los triggers de la 0015 llevan cada fila a busquedaperfil_fts.
+
+CAMPOS = {
+    "Experiencialaboral": ("cargodesempenado", "nombrempresa", "lugarempresa", "descripcionfunciones"),
+    "Cursosrealizados": ("nombrecurso", "entidadpatrocinadora", "descripcioncurso"),
+    "Reconocimientos": ("tiporeconocimiento", "descripcionreconocimiento", "entidadpatrocinadora"),
+    "Productosacademicos": ("nombrerecurso", "clasificador", "descripcion"),
+    "Productoslaborales": ("nombreproducto", "descripcion"),
+}
+
+LOTE = 200
+
+
+def _unir(valores):
+    return " ".join(str(v) for v in valores if v)
+
+
+def rellenar_indice(apps, schema_editor):
+    Datospersonales = apps.get_model("cv", "Datospersonales")
+    Busquedaperfil = apps.get_model("cv", "Busquedaperfil")
+    alias = schema_editor.connection.alias
+
+    ids = list(Datospersonales.objects.using(alias).filter(activarparaqueseveaenfront=True).order_by("pk").values_list("pk", flat=True))
+    for inicio in range(0, len(ids), LOTE):
+        lote = ids[inicio:inicio + LOTE]
+        perfiles = Datospersonales.objects.using(alias).filter(pk__in=lote).order_by("pk")
+        titulos = {p.pk: _unir((p.nombres, p.apellidos, p.descripcionperfil)) for p in perfiles}
+        partes = {p.pk: [_unir((p.nacionalidad, p.lugarnacimiento))] for p in perfiles}
+        for nombre, campos in CAMPOS.items():
+            filas = (
+                apps.get_model("cv", nombre).objects.using(alias)
+                .filter(idperfilconqueestaactivo__in=lote, activarparaqueseveaenfront=True)
+                .order_by("pk").values_list("idperfilconqueestaactivo", *campos)
+            )
+            for idperfil, *valores in filas:
+                partes[idperfil].append(_unir(valores))
+
+        Busquedaperfil.objects.using(alias).filter(pk__in=lote).delete()
+        Busquedaperfil.objects.using(alias).bulk_create(
+            Busquedaperfil(idperfil_id=pk, titulo=titulos[pk], documento="\n".join(p for p in partes[pk] if p))
+            for pk in titulos
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv', '0018_subida'),
+    ]
+
+    operations = [
+        migrations.RunPython(rellenar_indice, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,193 @@
+import hashlib
+import io
+import logging
+import threading
+import time
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from django.core.files.storage import default_storage
+from django.urls import Resolver404, resolve, reverse
+from django.utils.crypto import constant_time_compare, salted_hmac
+from PIL import Image, ImageOps, UnidentifiedImageError
+from pypdf import PdfReader
+from pypdf.errors import PdfReadError
+
+from .attachment_cache import AttachmentCache
+from .attachments import _download
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# Miniaturas y variantes de imagen (fuera de Cloudinary)
+# ============================================================
+# Cloudinary recorta/convierte con parámetros en la URL; para el resto de
+# archivos (links externos, almacenamiento local) las plantillas apuntan a
+# /cv/thumb/<firma>.jpg?u=<origen> (miniatura de certificado) o a
+# /cv/img/<firma>/<ancho>.<formato>?u=<origen> (variantes de srcset y de
+# impresión). La primera petición descarga el origen, genera la variante con
+# Pillow (en un PDF, la imagen incrustada más grande de la primera página) y
+# la guarda en disco por (origen, ancho, formato); las siguientes la sirven
+# tal cual, con Cache-Control inmutable. La firma HMAC del origen impide usar
+# el endpoint como proxy de URLs arbitrarias y los anchos están acotados a
+# CV_IMG_WIDTHS + CV_IMG_PRINT_WIDTH.
+
+# formato en la URL -> (formato de Pillow, content type)
+FORMATOS = {"jpg": ("JPEG", "image/jpeg"), "webp": ("WEBP", "image/webp")}
+_SIN_MINIATURA = b""
+# Locks repartidos por hash de la clave (número fijo, no uno por URL)
+_locks = [threading.Lock() for _ in range(64)]
+
+
+class MiniaturaCache(AttachmentCache):
+
+    def __init__(self, directory=None, max_bytes=None):
+        super().__init__(
+            directory=directory or settings.CV_THUMB_CACHE_DIR,
+            max_bytes=settings.CV_THUMB_CACHE_MAX_BYTES if max_bytes is None else max_bytes,
+            ttl=float("inf"),
+        )
+
+    @staticmethod
+    def key(url, ancho=None, formato="jpg"):
+        return f"thumb:{ancho or settings.CV_THUMB_WIDTH}:{formato}:{url}"
+
+
+def firma(url):
+    return salted_hmac("cv.miniaturas", url).hexdigest()[:32]
+
+
+def url_miniatura(url):
+    """URL local de la miniatura de ``url`` (o ``url`` si no cabe en la columna thumbnail)."""
+    thumb = reverse("cv_thumb", args=[firma(url)]) + "?" + urlencode({"u": url})
+    return thumb if len(thumb) <= 500 else url
+
+
+def anchos_permitidos():
+    return {*settings.CV_IMG_WIDTHS, settings.CV_IMG_PRINT_WIDTH}
+
+
+def url_variante(url, ancho, formato="jpg"):
+    """``url`` reducida a ``ancho`` px en ``formato`` (transformación de Cloudinary o el proxy local)."""
+    if "cloudinary" in url and "/upload/" in url:
+        base, resto = url.split("/upload/", 1)
+        return f"{base}/upload/w_{ancho},c_limit,q_auto,f_{formato}/{resto}"
+    return reverse("cv_img", args=[firma(url), ancho, formato]) + "?" + urlencode({"u": url})
+
+
+def srcset(url, formato="jpg"):
+    return ", ".join(f"{url_variante(url, ancho, formato)} {ancho}w" for ancho in settings.CV_IMG_WIDTHS)
+
+
+def resolver_local(url):
+    """``(origen, ancho, formato)`` si ``url`` es una variante firmada de este sitio; si no, None.
+
+    WeasyPrint la usa para leer las imágenes del PDF sin pedírselas al propio servidor.
+    """
+    partes = urlsplit(url)
+    try:
+        match = resolve(partes.path)
+    except Resolver404:
+        return None
+    if match.url_name not in ("cv_img", "cv_thumb"): return None
+    origen = parse_qs(partes.query).get("u", [""])[0]
+    if not origen or not constant_time_compare(firma(origen), match.kwargs["clave"]): return None
+    return origen, match.kwargs.get("ancho"), match.kwargs.get("formato", "jpg")
+
+
+def _a_rgb(img):
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        fondo = Image.new("RGB", img.size, "white")
+        fondo.paste(img, mask=img.split()[-1])
+        return fondo
+    return img if img.mode == "RGB" else img.convert("RGB")
+
+
+def _imagen_pdf(data):
+    """Imagen incrustada más grande de la primera página, o None (PDF solo vectorial/texto)."""
+    try:
+        reader = PdfReader(io.BytesIO(data), strict=False)
+        if reader.is_encrypted and not reader.decrypt(""): return None
+        if not reader.pages: return None
+        imagenes = [i.image for i in reader.pages[0].images if i.image is not None]
+    except (PdfReadError, ValueError, KeyError, OSError, NotImplementedError):
+        return None
+    return max(imagenes, key=lambda i: i.width * i.height, default=None)
+
+
+def generar(data, ancho=None, formato="jpg"):
+    """Imagen reducida a ``ancho`` (``CV_THUMB_WIDTH``) a partir de una imagen o PDF; None si no hay vista previa."""
+    ancho = ancho or settings.CV_THUMB_WIDTH
+    if b"%PDF-" in data[:1024]:
+        img = _imagen_pdf(data)
+        if img is None: return None
+    else:
+        try:
+            img = Image.open(io.BytesIO(data))
+            # Los JPEG se decodifican ya a escala reducida (mucho menos trabajo y memoria)
+            img.draft("RGB", (ancho, ancho * 2))
+            img = ImageOps.exif_transpose(img)
+        except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+            return None
+
+    img = _a_rgb(img)
+    img.thumbnail((ancho, ancho * 2), Image.LANCZOS)
+    out = io.BytesIO()
+    if formato == "webp":
+        img.save(out, format="WEBP", quality=settings.CV_THUMB_QUALITY, method=4)
+    else:
+        img.save(out, format="JPEG", quality=settings.CV_THUMB_QUALITY, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def _leer_origen(url):
+    # Archivos del almacenamiento local se leen sin pasar por HTTP
+    if url.startswith(settings.MEDIA_URL) and not url.startswith("//"):
+        with default_storage.open(url[len(settings.MEDIA_URL):], "rb") as f:
+            return f.read()
+    # Plazo corto: la petición de la página (o del navegador) espera por esto
+    with _download(url, time.monotonic() + settings.CV_THUMB_FETCH_TIMEOUT, AttachmentCache()) as f:
+        return f.read()
+
+
+def _clave_fallo(url):
+    return "cv:thumb-fallo:" + hashlib.sha256(url.encode()).hexdigest()
+
+
+def _lock(key):
+    return _locks[hash(key) % len(_locks)]
+
+
+def obtener(url, cache=None, ancho=None, formato="jpg"):
+    """Archivo abierto con la variante de ``url`` (generada una sola vez), o None.
+
+    Lanza la excepción de la descarga si el origen no se pudo leer. Ese fallo
+    se recuerda CV_THUMB_ERROR_TTL segundos (para todas las variantes del
+    origen): mientras tanto se devuelve None sin volver a descargar, para que
+    un enlace caído no retenga un worker en cada vista de la página.
+    """
+    cache = cache or MiniaturaCache()
+    key = cache.key(url, ancho, formato)
+    # Un solo hilo por variante genera; el resto espera y lee el resultado
+    with _lock(key):
+        cached = cache.open(key)
+        if cached is None:
+            if django_cache.get(_clave_fallo(url)): return None
+            try:
+                data = _leer_origen(url)
+            except Exception:
+                django_cache.set(_clave_fallo(url), True, settings.CV_THUMB_ERROR_TTL)
+                raise
+            imagen = generar(data, ancho, formato)
+            cache.set(key, imagen or _SIN_MINIATURA)
+            if imagen is None: logger.info("Sin miniatura para %s", url)
+            cached = cache.open(key)
+            if cached is None: return io.BytesIO(imagen) if imagen else None
+    meta, f = cached
+    if not meta["size"]:
+        f.close()
+        return None
+    return f
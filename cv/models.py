@@ -1,9 +1,16 @@
 from django.db import models
+from django.db.models import F, Func, Q
 from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
 from datetime import date
 import os
 import uuid
 
+from .certificados import normalizar_certificado
+from .miniaturas import url_miniatura
+
 # ============================================================
 # Upload helpers
 # ============================================================
@@ -19,6 +26,33 @@ def upload_logros(instance, filename): return _upload_uuid("certificados/logros"
 def upload_garage(instance, filename): return _upload_uuid("garage", filename)
 
 
+# ============================================================
+# Enlaces derivados del archivo (se guardan en columnas, ver CertificadoMixin)
+# ============================================================
+
+def cloudinary_thumbnail(file_url):
+    if not file_url or "cloudinary" not in file_url: return file_url
+    try:
+        if "/upload/" in file_url:
+            base_part, id_part = file_url.split("/upload/")
+            new_url = f"{base_part}/upload/w_600,q_auto,f_jpg,pg_1/{id_part}"
+            if new_url.lower().endswith(".pdf"):
+                new_url = new_url[:-4] + ".jpg"
+            return new_url
+    except Exception: return file_url
+    return file_url
+
+def enlaces_archivo(obj):
+    """``(final_url, is_pdf, thumbnail)`` del archivo subido o, si no hay, del link externo."""
+    url_final = None
+    if obj.archivo_digital: url_final = obj.archivo_digital.url
+    elif getattr(obj, 'rutacertificado', None): url_final = obj.rutacertificado
+    if not url_final: return None, False, None
+    # Fuera de Cloudinary la miniatura se genera en local (miniaturas.py)
+    thumbnail = cloudinary_thumbnail(url_final) if "cloudinary" in url_final else url_miniatura(url_final)
+    return url_final, url_final.lower().endswith('.pdf'), thumbnail
+
+
 # ============================================================
 # VALIDADORES
 # ============================================================
@@ -55,6 +89,63 @@ class CleanSaveMixin(models.Model):
         return super().save(*args, **kwargs)
 
 
+class CertificadoMixin(models.Model):
+    """Guarda junto a ``archivo_digital`` una copia en PDF ya validada para cv_print.
+
+    La conversión/reparación se hace en full_clean (los errores salen en el
+    formulario del admin) y el PDF resultante se sube en save(), donde también
+    se recalculan final_url / is_pdf / thumbnail.
+    """
+    archivo_pdf_url = models.CharField(max_length=300, blank=True, null=True, editable=False)
+    archivo_pdf_paginas = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    archivo_pdf_bytes = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    # Lo que usan las plantillas, calculado al guardar y no en cada render
+    final_url = models.CharField(max_length=500, blank=True, null=True, editable=False)
+    is_pdf = models.BooleanField(default=False, editable=False)
+    thumbnail = models.CharField(max_length=500, blank=True, null=True, editable=False)
+
+    class Meta: abstract = True
+
+    def full_clean(self, *args, **kwargs):
+        super().full_clean(*args, **kwargs)
+        archivo = self.archivo_digital
+        if archivo and not archivo._committed and getattr(self, "_pdf_origen", None) is not archivo.file:
+            try:
+                self._pdf_normalizado = normalizar_certificado(archivo.file)
+            except ValidationError as e:
+                raise ValidationError({"archivo_digital": e.messages})
+            self._pdf_origen = archivo.file
+
+    def save(self, *args, **kwargs):
+        if not self.archivo_digital:
+            self.archivo_pdf_url = self.archivo_pdf_paginas = self.archivo_pdf_bytes = None
+        elif getattr(self, "_pdf_normalizado", None):
+            self.subir_pdf_normalizado(*self._pdf_normalizado)
+            self._pdf_normalizado = None
+
+        # El archivo nuevo se sube antes (como haría FileField.pre_save) para conocer su URL
+        archivo = self.archivo_digital
+        if archivo and not archivo._committed:
+            archivo.save(archivo.name, archivo.file, save=False)
+        self.final_url, self.is_pdf, self.thumbnail = enlaces_archivo(self)
+        return super().save(*args, **kwargs)
+
+    def subir_pdf_normalizado(self, pdf, paginas):
+        """Sube el PDF temporal de normalizar_certificado (y lo cierra)."""
+        with pdf:
+            tamano = pdf.seek(0, os.SEEK_END)
+            pdf.seek(0)
+            nombre = default_storage.save(_upload_uuid("certificados/pdf", "certificado.pdf"), File(pdf, "certificado.pdf"))
+        self.archivo_pdf_url = default_storage.url(nombre)
+        self.archivo_pdf_paginas = paginas
+        self.archivo_pdf_bytes = tamano
+
+
+def orden_apellidos():
+    # Literal en el SQL (sin parámetro) para que SQLite reconozca la expresión del índice
+    return Func(F("apellidos"), template="COALESCE(%(expressions)s, '')", output_field=models.CharField())
+
+
 # ============================================================
 # MODELOS
 # ============================================================
@@ -147,17 +238,34 @@ class Datospersonales(CleanSaveMixin, models.Model):
     mostrar_productos_laborales = models.BooleanField(default=True)
     mostrar_ventagarage = models.BooleanField(default=True)
 
+    # Se incrementan (signals.py) cada vez que cambia el perfil o alguna de sus secciones
+    version = models.PositiveIntegerField(default=1, editable=False)
+    actualizado = models.DateTimeField(default=timezone.now, editable=False)
+    CAMPOS_VERSION = ("version", "actualizado")
+
     def clean(self):
         if self.fechanacimiento: 
             validar_no_futuro(self.fechanacimiento)
             validar_edad_18_100(self.fechanacimiento)
 
+    def save(self, *args, **kwargs):
+        # version/actualizado solo los cambia signals.bump_version (UPDATE atómico): el
+        # UPDATE de save() llevaría los valores leídos al cargar el formulario y
+        # desharía un incremento de una sección editada mientras tanto
+        if not self._state.adding:
+            campos = kwargs.get("update_fields")
+            if campos is None: campos = [f.name for f in self._meta.concrete_fields if not f.primary_key]
+            kwargs["update_fields"] = [c for c in campos if c not in self.CAMPOS_VERSION]
+        return super().save(*args, **kwargs)
+
     class Meta:
         db_table = "datospersonales"
         managed = True
+        # Orden del directorio (cv.directorio), solo perfiles activos
+        indexes = [models.Index(orden_apellidos(), F("idperfil"), condition=Q(activarparaqueseveaenfront=True), name="perfil_directorio")]
 
 
-class Experiencialaboral(CleanSaveMixin, models.Model):
+class Experiencialaboral(CleanSaveMixin, CertificadoMixin, models.Model):
     idexperiencilaboral = models.BigAutoField(primary_key=True)
     cargodesempenado = models.CharField(max_length=100, blank=True, null=True)
     nombrempresa = models.CharField(max_length=50, blank=True, null=True)
@@ -183,9 +291,11 @@ class Experiencialaboral(CleanSaveMixin, models.Model):
         db_table = "experiencialaboral"
         managed = True
         ordering = ["-fechainiciogestion"]
+        # Mismo filtro y orden que cv.loaders: el perfil se lee en orden del índice
+        indexes = [models.Index(fields=["idperfilconqueestaactivo", "-fechainiciogestion", "-idexperiencilaboral"], condition=Q(activarparaqueseveaenfront=True), name="exp_perfil_visible_fecha")]
 
 
-class Cursosrealizados(CleanSaveMixin, models.Model):
+class Cursosrealizados(CleanSaveMixin, CertificadoMixin, models.Model):
     idcursorealizado = models.BigAutoField(primary_key=True)
     nombrecurso = models.CharField(max_length=100, blank=True, null=True)
     fechainicio = models.DateField(blank=True, null=True)
@@ -210,9 +320,10 @@ class Cursosrealizados(CleanSaveMixin, models.Model):
         db_table = "cursosrealizados"
         managed = True
         ordering = ["-fechainicio"]
+        indexes = [models.Index(fields=["idperfilconqueestaactivo", "-fechainicio", "-idcursorealizado"], condition=Q(activarparaqueseveaenfront=True), name="curso_perfil_visible_fecha")]
 
 
-class Reconocimientos(CleanSaveMixin, models.Model):
+class Reconocimientos(CleanSaveMixin, CertificadoMixin, models.Model):
     TIPO_CHOICES = [('Publico', 'Público'), ('Privado', 'Privado'), ('Academico', 'Académico')]
     idreconocimiento = models.BigAutoField(primary_key=True)
     tiporeconocimiento = models.CharField(max_length=20, choices=TIPO_CHOICES, blank=True, null=True, verbose_name="Tipo de Reconocimiento")
@@ -233,6 +344,7 @@ class Reconocimientos(CleanSaveMixin, models.Model):
         db_table = "reconocimientos"
         managed = True
         ordering = ["-fechareconocimiento"]
+        indexes = [models.Index(fields=["idperfilconqueestaactivo", "-fechareconocimiento", "-idreconocimiento"], condition=Q(activarparaqueseveaenfront=True), name="rec_perfil_visible_fecha")]
 
 
 class Productosacademicos(CleanSaveMixin, models.Model):
@@ -247,7 +359,11 @@ class Productosacademicos(CleanSaveMixin, models.Model):
     clasificador = models.CharField(max_length=50, choices=CLASIFICADOR_CHOICES, blank=True, null=True, verbose_name="Tipo de Producto")
     descripcion = models.CharField(max_length=100, blank=True, null=True)
     activarparaqueseveaenfront = models.BooleanField(default=True, null=True, blank=True)
-    class Meta: db_table = "productosacademicos"; managed = True
+
+    class Meta:
+        db_table = "productosacademicos"
+        managed = True
+        indexes = [models.Index(fields=["idperfilconqueestaactivo", "-idproductoacademico"], condition=Q(activarparaqueseveaenfront=True), name="acad_perfil_visible")]
 
 
 class Productoslaborales(CleanSaveMixin, models.Model):
@@ -265,9 +381,10 @@ class Productoslaborales(CleanSaveMixin, models.Model):
         db_table = "productoslaborales"
         managed = True
         ordering = ["-fechaproducto"]
+        indexes = [models.Index(fields=["idperfilconqueestaactivo", "-fechaproducto", "-idproductoslaborales"], condition=Q(activarparaqueseveaenfront=True), name="lab_perfil_visible_fecha")]
 
 
-class Ventagarage(CleanSaveMixin, models.Model):
+class Ventagarage(CleanSaveMixin, CertificadoMixin, models.Model):
     ESTADO_CHOICES = [("Bueno", "Bueno"), ("Regular", "Regular")]
     idventagaraje = models.BigAutoField(primary_key=True)
     nombreproducto = models.CharField(max_length=100)
@@ -290,4 +407,98 @@ class Ventagarage(CleanSaveMixin, models.Model):
     class Meta:
         db_table = "ventagarage"
         managed = True
-        ordering = ["-fechapublicacion"]
\ No newline at end of file
+        ordering = ["-fechapublicacion"]
+        indexes = [
+            models.Index(fields=["idperfilconqueestaactivo", "-fechapublicacion", "-idventagaraje"], condition=Q(activo=True), name="garage_perfil_activo_fecha"),
+            # Catálogo (cv.catalogo): un índice por orden, con y sin filtro de estado
+            models.Index(fields=["-fechapublicacion", "-idventagaraje"], condition=Q(activo=True), name="garage_activo_fecha"),
+            models.Index(fields=["precio", "idventagaraje"], condition=Q(activo=True), name="garage_activo_precio"),
+            models.Index(fields=["estado", "-fechapublicacion", "-idventagaraje"], condition=Q(activo=True), name="garage_activo_estado_fecha"),
+            models.Index(fields=["estado", "precio", "idventagaraje"], condition=Q(activo=True), name="garage_activo_estado_precio"),
+        ]
+
+# ============================================================
+# ÍNDICE DE BÚSQUEDA (ver busqueda.py; el índice FTS lo crea la migración 0015)
+# ============================================================
+
+class Busquedaperfil(models.Model):
+    idperfil = models.OneToOneField(Datospersonales, on_delete=models.CASCADE, primary_key=True, db_column="idperfil", related_name="busqueda")
+    titulo = models.TextField(blank=True, default="")
+    documento = models.TextField(blank=True, default="")
+
+    class Meta:
+        db_table = "busquedaperfil"
+        managed = True
+
+
+# ============================================================
+# ARCHIVOS SUBIDOS POR CONTENIDO (ver storage.py)
+# ============================================================
+
+class Blob(models.Model):
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    nombre = models.CharField(max_length=300, unique=True)
+    # URL pública: archivo_pdf_url guarda la URL y no el nombre
+    url = models.CharField(max_length=500, db_index=True)
+    bytes = models.PositiveBigIntegerField()
+    referencias = models.PositiveIntegerField(default=1)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "blob"
+        managed = True
+        indexes = [models.Index(fields=["creado"], condition=Q(referencias=0), name="blob_huerfano")]
+
+
+class Subida(models.Model):
+    """Subida por partes en curso o terminada (ver subidas.py)."""
+    token = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    campo = models.CharField(max_length=10)
+    nombre = models.CharField(max_length=200)
+    tamano = models.PositiveBigIntegerField()
+    recibidos = models.PositiveBigIntegerField(default=0)
+    # Al completar: archivo en el storage y su copia PDF normalizada
+    archivo = models.CharField(max_length=300, blank=True, null=True)
+    archivo_pdf_url = models.CharField(max_length=300, blank=True, null=True)
+    archivo_pdf_paginas = models.PositiveIntegerField(blank=True, null=True)
+    archivo_pdf_bytes = models.PositiveIntegerField(blank=True, null=True)
+    creado = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = "subida"
+        managed = True
+
+
+# ============================================================
+# COLA DE GENERACIÓN DE PDF (cv_print asíncrono)
+# ============================================================
+
+def upload_cv_pdf(instance, filename): return _upload_uuid("cv_pdf", filename)
+
+
+class Trabajopdf(models.Model):
+    PENDIENTE, PROCESANDO, LISTO, ERROR = "pendiente", "procesando", "listo", "error"
+    ESTADO_CHOICES = [
+        (PENDIENTE, "Pendiente"), (PROCESANDO, "Procesando"),
+        (LISTO, "Listo"), (ERROR, "Error"),
+    ]
+
+    idtrabajo = models.BigAutoField(primary_key=True)
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    idperfil = models.ForeignKey(Datospersonales, on_delete=models.CASCADE, db_column="idperfil", related_name="trabajos_pdf")
+    secciones = models.CharField(max_length=60)
+    version = models.PositiveIntegerField()
+    base_url = models.CharField(max_length=200)
+    estado = models.CharField(max_length=12, choices=ESTADO_CHOICES, default=PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    archivo = models.FileField(upload_to=upload_cv_pdf, blank=True, null=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    tomado = models.DateTimeField(blank=True, null=True)
+    terminado = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = "trabajopdf"
+        managed = True
+        ordering = ["creado"]
+        indexes = [models.Index(fields=["estado", "creado"], name="trabajopdf_estado_creado")]
@@ -0,0 +1,104 @@
+import tempfile
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from pypdf import PdfWriter
+
+from .attachments import AttachmentBatch, attachment_url
+from .loaders import SECCIONES, load_sections, profile_context
+from .pdf_cache import FragmentCache, PdfCache, SECCIONES_MODAL
+from .render import get_engine
+from .timing import span
+
+
+# ============================================================
+# Generación del PDF del CV (compartida por cv_print y el worker)
+# ============================================================
+
+def parse_secciones(params):
+    """Secciones pedidas desde el modal; sin ``from_modal`` se incluyen todas."""
+    if params.get("from_modal") != "true": return set(SECCIONES_MODAL)
+    return {k for k in SECCIONES_MODAL if params.get(k) is not None}
+
+
+def documentos(context, secciones_con_filas):
+    """``(plantilla, contexto)`` de cada documento que se maqueta por separado.
+
+    Por defecto uno solo (cv_print/completo.html): las secciones siguen
+    fluyendo en la columna principal junto a la lateral. Con
+    CV_PDF_FRAGMENTS, la cabecera y cada sección van aparte y se cachean
+    por su HTML, de modo que editar una sección solo vuelve a maquetar esa;
+    a cambio cada sección empieza en página nueva.
+    """
+    plantillas = [f"cv_print/secciones/{s}.html" for s in secciones_con_filas]
+    if not settings.CV_PDF_FRAGMENTS:
+        return [("cv_print/completo.html", {**context, "plantillas_secciones": plantillas})]
+    return [("cv_print/cabecera.html", context)] + [("cv_print/seccion.html", {**context, "plantilla": p}) for p in plantillas]
+
+
+def render_fragment(plantilla, context, base_url, cache):
+    """PDF de ``plantilla``; solo se maqueta con WeasyPrint si su HTML cambió."""
+    with span("template"):
+        html_string = render_to_string(plantilla, context)
+    key = cache.key(html_string, base_url)
+    cached = cache.open(key)
+    if cached: return cached[1]
+
+    # Los buffers pasan a disco al superar CV_PRINT_SPOOL_BYTES
+    pdf = tempfile.SpooledTemporaryFile(max_size=settings.CV_PRINT_SPOOL_BYTES)
+    with span("weasyprint"):
+        get_engine().write_pdf(html_string, base_url, pdf)
+    pdf.seek(0)
+    cache.set(key, pdf)
+    pdf.seek(0)
+    return pdf
+
+
+def generate_cv_pdf(perfil, secciones, base_url, pdf_cache=None):
+    """Genera el PDF y lo guarda en caché. Devuelve ``(archivo, etag, anexos_omitidos)``."""
+    pdf_cache = pdf_cache or PdfCache()
+
+    # 1. Secciones pedidas en una consulta por sección (list() ya resuelto dentro de la etapa)
+    with span("queries"):
+        load_sections(perfil, secciones)
+        context = profile_context(perfil, secciones)
+
+    # 2. Anexos: se descargan en paralelo mientras se genera el PDF principal
+    # (las secciones no pedidas llegan vacías)
+    anexos = context["cursos"] + context["experiencias"] + context["reconocimientos"] + context["ventas_garage"]
+    batch = AttachmentBatch(url for url in map(attachment_url, anexos) if url)
+
+    # 3. PDF principal (un documento o, con CV_PDF_FRAGMENTS, uno por sección), cacheado por su HTML
+    con_filas = [clave for clave in SECCIONES_MODAL if context[SECCIONES[clave][0]]]
+    fragment_cache = FragmentCache()
+    fragmentos = []
+    merger = PdfWriter()
+    try:
+        for plantilla, contexto in documentos(context, con_filas):
+            fragmentos.append(render_fragment(plantilla, contexto, base_url, fragment_cache))
+
+        # 4. Concatenación: fragmentos y luego anexos (cursos → experiencias → reconocimientos → garage)
+        with span("download"):
+            archivos = batch.results()
+        with span("merge"):
+            for fragmento in fragmentos:
+                merger.append(fragmento)
+            for url, archivo in zip(batch.urls, archivos):
+                if archivo is None: continue
+                try:
+                    merger.append(archivo)
+                except Exception as e:
+                    batch.skip(url, f"PDF inválido ({e})")
+
+            # 5. Salida Final
+            output_buffer = tempfile.SpooledTemporaryFile(max_size=settings.CV_PRINT_SPOOL_BYTES)
+            merger.write(output_buffer)
+    finally:
+        merger.close()
+        for fragmento in fragmentos: fragmento.close()
+        batch.close()
+
+    # Un PDF con anexos omitidos está incompleto: no se guarda en caché
+    etag = pdf_cache.set_pdf(perfil, secciones, output_buffer) if not batch.skipped else None
+    output_buffer.seek(0)
+    return output_buffer, etag, batch.skipped
@@ -0,0 +1,73 @@
+import hashlib
+
+from django.conf import settings
+
+from . import revision
+from .attachment_cache import CHUNK_SIZE, AttachmentCache
+
+
+# ============================================================
+# Caché de PDFs finales de cv_print
+# ============================================================
+# La clave combina la versión de contenido del perfil (se incrementa en
+# signals.py) con las secciones pedidas en el modal y la revisión del
+# despliegue (plantillas, cv_print.css), así que un cambio en cualquier fila
+# o un despliegue deja obsoletas todas las variantes sin borrar nada: las
+# entradas viejas simplemente dejan de pedirse y salen por LRU.
+
+SECCIONES_MODAL = ("exp", "edu", "acad", "lab", "rec", "garage")
+
+
+class PdfCache(AttachmentCache):
+
+    def __init__(self, directory=None, max_bytes=None):
+        super().__init__(
+            directory=directory or settings.CV_PDF_CACHE_DIR,
+            max_bytes=settings.CV_PDF_CACHE_MAX_BYTES if max_bytes is None else max_bytes,
+            ttl=float("inf"),
+        )
+
+    @staticmethod
+    def key(perfil, secciones):
+        flags = "".join("1" if s in secciones else "0" for s in SECCIONES_MODAL)
+        return f"cvpdf:{perfil.pk}:{perfil.version}:{flags}:{revision.revision()}"
+
+    def get_pdf(self, perfil, secciones):
+        """Devuelve ``(archivo, etag)`` del PDF en caché, o ``None``."""
+        cached = self.open(self.key(perfil, secciones))
+        if cached is None: return None
+        meta, f = cached
+        return f, meta["etag"]
+
+    def set_pdf(self, perfil, secciones, source):
+        digest = hashlib.sha256()
+        source.seek(0)
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+        source.seek(0)
+        etag = f'"{digest.hexdigest()}"'
+        return etag if self.set(self.key(perfil, secciones), source, etag=etag) else None
+
+
+class FragmentCache(AttachmentCache):
+    """PDF de cada documento maquetado de cv_print, por hash de su HTML.
+
+    Con CV_PDF_FRAGMENTS (cabecera y secciones por separado) el HTML de una
+    sección solo cambia si cambian sus filas (o la plantilla), así que el
+    hash hace de versión de contenido de esa sección: un perfil con una
+    sección editada solo vuelve a maquetar esa sección, y una combinación
+    nueva de casillas del modal solo cuesta la concatenación. Sin él la
+    entrada es el documento completo.
+    """
+
+    def __init__(self, directory=None, max_bytes=None):
+        super().__init__(
+            directory=directory or settings.CV_PDF_FRAGMENT_CACHE_DIR,
+            max_bytes=settings.CV_PDF_FRAGMENT_CACHE_MAX_BYTES if max_bytes is None else max_bytes,
+            ttl=float("inf"),
+        )
+
+    @staticmethod
+    def key(html_string, base_url):
+        # El HTML no cambia si solo cambia cv_print.css: la revisión entra en la clave
+        return "frag:" + hashlib.sha256(f"{revision.revision()}\n{base_url}\n{html_string}".encode()).hexdigest()
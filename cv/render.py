@@ -0,0 +1,73 @@
+import threading
+from pathlib import Path
+
+from django.conf import settings
+
+
+# ============================================================
+# Motor de render WeasyPrint (estado compartido por proceso)
+# ============================================================
+# Parsear la hoja de estilos del CV y resolver las fuentes vía fontconfig
+# cuesta más que maquetar un perfil típico, así que se hace una sola vez:
+# cada hilo guarda su FontConfiguration y su CSS ya parseado y los reutiliza
+# en todos los renders. Con gunicorn sync hay un hilo por proceso.
+
+PRINT_CSS = Path(__file__).resolve().parent / "static" / "css" / "cv_print.css"
+
+_local = threading.local()
+
+
+class RenderEngine:
+
+    def __init__(self):
+        from weasyprint import CSS
+        from weasyprint.text.fonts import FontConfiguration
+
+        self.font_config = FontConfiguration()
+        self.stylesheets = [
+            CSS(filename=str(path), font_config=self.font_config)
+            for path in [PRINT_CSS, *settings.CV_PRINT_EXTRA_CSS]
+        ]
+
+    def write_pdf(self, html_string, base_url, target):
+        from weasyprint import HTML
+
+        HTML(string=html_string, base_url=base_url, url_fetcher=url_fetcher).write_pdf(
+            target, stylesheets=self.stylesheets, font_config=self.font_config,
+        )
+
+
+def url_fetcher(url, *args, **kwargs):
+    """Las variantes de imagen del propio sitio se leen en el proceso, sin una petición HTTP a sí mismo."""
+    from weasyprint import default_url_fetcher
+
+    from .miniaturas import FORMATOS, obtener, resolver_local
+
+    local = resolver_local(url)
+    if local:
+        origen, ancho, formato = local
+        try:
+            f = obtener(origen, ancho=ancho, formato=formato)
+        except Exception:
+            f = None
+        if f:
+            with f:
+                return {"string": f.read(), "mime_type": FORMATOS[formato][1], "redirected_url": url}
+        # Sin variante: el original, igual que haría el redirect del endpoint
+        url = origen
+    return default_url_fetcher(url, *args, **kwargs)
+
+
+def get_engine():
+    engine = getattr(_local, "engine", None)
+    if engine is None:
+        engine = _local.engine = RenderEngine()
+    return engine
+
+
+def warm_up():
+    """Parsea el CSS y prepara fontconfig antes de la primera petición (gunicorn post_worker_init).
+
+    Solo crea el motor del hilo; no maqueta ningún documento.
+    """
+    get_engine()
@@ -0,0 +1,51 @@
+import functools
+import hashlib
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.crypto import salted_hmac
+
+APP_DIR = Path(__file__).resolve().parent
+
+
+# ============================================================
+# Revisión del despliegue (parte de las ETag y claves de caché)
+# ============================================================
+# El HTML cacheado de un perfil depende, además de su versión, de las
+# plantillas, de los nombres hasheados de los estáticos (manifest de
+# collectstatic) y de las firmas de miniaturas (SECRET_KEY); el PDF, además,
+# de las hojas de estilo de impresión. Si alguno cambia en un despliegue,
+# cambia la revisión: las ETag viejas dejan de validar y las entradas de
+# caché viejas dejan de pedirse. CV_BUILD_REVISION
+# (p. ej. el commit que despliega el CI) cubre cualquier otro cambio de código.
+
+def _archivos():
+    yield from sorted(p for p in (APP_DIR / "templates").rglob("*") if p.is_file())
+    yield from sorted((APP_DIR / "templatetags").glob("*.py"))
+    # Hojas de estilo que render.py aplica al PDF
+    yield APP_DIR / "static" / "css" / "cv_print.css"
+    yield from (Path(p) for p in settings.CV_PRINT_EXTRA_CSS)
+    manifest = Path(settings.STATIC_ROOT) / "staticfiles.json"
+    if manifest.exists(): yield manifest
+
+
+@functools.lru_cache(maxsize=None)
+def _calcular():
+    digest = hashlib.sha256(settings.CV_BUILD_REVISION.encode())
+    digest.update(salted_hmac("cv.revision", "firmas").digest())
+    modificado = 0
+    for path in _archivos():
+        digest.update(path.relative_to(path.anchor).as_posix().encode())
+        digest.update(path.read_bytes())
+        modificado = max(modificado, int(path.stat().st_mtime))
+    return digest.hexdigest()[:10], modificado
+
+
+def revision():
+    """Hash corto del despliegue (se calcula una vez por proceso)."""
+    return _calcular()[0]
+
+
+def desplegado():
+    """Timestamp del archivo más reciente de la revisión (suelo de Last-Modified)."""
+    return _calcular()[1]
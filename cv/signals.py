@@ -0,0 +1,170 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .busqueda import indexar_perfil
+from .directorio import CLAVE_PERFIL_POR_DEFECTO
+from .enlaces import DOC_MODELOS, invalidar_documento
+from .models import (
+    Datospersonales, Experiencialaboral, Cursosrealizados,
+    Productosacademicos, Productoslaborales, Reconocimientos, Ventagarage, Trabajopdf
+)
+from .storage import liberar
+
+SECCIONES = (
+    Experiencialaboral, Cursosrealizados, Reconocimientos,
+    Productosacademicos, Productoslaborales, Ventagarage,
+)
+# Columnas que apuntan a archivos subidos (por nombre o, las *_url, por URL)
+ARCHIVOS = {modelo: ("archivo_digital", "archivo_pdf_url") for modelo in DOC_MODELOS.values()}
+ARCHIVOS[Trabajopdf] = ("archivo",)
+
+
+# ============================================================
+# Versión de contenido por perfil (invalida cachés de PDF y de página)
+# ============================================================
+
+def bump_version(idperfil):
+    if idperfil is None: return
+    Datospersonales.objects.filter(pk=idperfil).update(version=F("version") + 1, actualizado=timezone.now())
+
+
+@receiver(post_save, sender=Datospersonales)
+def perfil_guardado(sender, instance, created, **kwargs):
+    if created: return
+    bump_version(instance.pk)
+    # La instancia en memoria debe conocer la nueva versión para no pisarla en el próximo save()
+    instance.refresh_from_db(fields=["version", "actualizado"])
+
+
+def seccion_por_modificar(sender, instance, raw=False, **kwargs):
+    # Si la fila cambia de perfil, el perfil anterior también debe invalidarse;
+    # en la misma consulta, los archivos anteriores (referencias de storage.py)
+    instance._cv_perfil_anterior = None
+    instance._cv_archivos_anteriores = {}
+    if raw or instance.pk is None: return
+    fila = sender.objects.filter(pk=instance.pk).values("idperfilconqueestaactivo", *ARCHIVOS.get(sender, ())).first() or {}
+    instance._cv_perfil_anterior = fila.pop("idperfilconqueestaactivo", None)
+    instance._cv_archivos_anteriores = fila
+
+
+def seccion_modificada(sender, instance, **kwargs):
+    bump_version(instance.idperfilconqueestaactivo_id)
+    anterior = getattr(instance, "_cv_perfil_anterior", None)
+    if anterior != instance.idperfilconqueestaactivo_id: bump_version(anterior)
+
+
+for modelo in SECCIONES:
+    pre_save.connect(seccion_por_modificar, sender=modelo, dispatch_uid=f"cv_version_pre_save_{modelo.__name__}")
+    post_save.connect(seccion_modificada, sender=modelo, dispatch_uid=f"cv_version_save_{modelo.__name__}")
+    post_delete.connect(seccion_modificada, sender=modelo, dispatch_uid=f"cv_version_delete_{modelo.__name__}")
+
+
+# ============================================================
+# Enlaces de doc_redirect
+# ============================================================
+
+def documento_modificado(sender, instance, **kwargs):
+    invalidar_documento(sender, instance.pk)
+
+
+for modelo in DOC_MODELOS.values():
+    post_save.connect(documento_modificado, sender=modelo, dispatch_uid=f"cv_doc_save_{modelo.__name__}")
+    post_delete.connect(documento_modificado, sender=modelo, dispatch_uid=f"cv_doc_delete_{modelo.__name__}")
+
+
+# ============================================================
+# Perfil de portada (cv_home)
+# ============================================================
+
+@receiver(post_save, sender=Datospersonales, dispatch_uid="cv_portada_save")
+@receiver(post_delete, sender=Datospersonales, dispatch_uid="cv_portada_delete")
+def portada_modificada(sender, instance, **kwargs):
+    # Alta, baja o cambio de activación pueden cambiar cuál es el perfil por defecto
+    cache.delete(CLAVE_PERFIL_POR_DEFECTO)
+
+
+# ============================================================
+# Índice de búsqueda (busqueda.py)
+# ============================================================
+# Tras el commit: dentro de un borrado en cascada el perfil aún existe y
+# reindexarlo recrearía la fila que se está borrando. Un solo callback por
+# transacción acumula los perfiles tocados: guardar un perfil con N filas
+# inline lo reindexa una vez, no N+1.
+
+class _Reindexado:
+    def __init__(self):
+        self.ids = set()
+        self.ejecutado = False
+
+    def __call__(self):
+        self.ejecutado = True
+        for idperfil in sorted(self.ids): indexar_perfil(idperfil)
+
+
+def programar_indexado(idperfil):
+    if idperfil is None: return
+    conexion = transaction.get_connection()
+    # Si la transacción (o su savepoint) se deshizo, el callback ya no está y se crea otro
+    pendiente = next((c[1] for c in conexion.run_on_commit if isinstance(c[1], _Reindexado) and not c[1].ejecutado), None)
+    if pendiente is not None:
+        pendiente.ids.add(idperfil)
+        return
+    pendiente = _Reindexado()
+    pendiente.ids.add(idperfil)
+    transaction.on_commit(pendiente)  # en autocommit se ejecuta ya
+
+
+@receiver(post_save, sender=Datospersonales, dispatch_uid="cv_busqueda_perfil_save")
+def perfil_indexar(sender, instance, raw=False, **kwargs):
+    if not raw: programar_indexado(instance.pk)
+
+
+def seccion_indexar(sender, instance, raw=False, **kwargs):
+    if raw: return
+    programar_indexado(instance.idperfilconqueestaactivo_id)
+    anterior = getattr(instance, "_cv_perfil_anterior", None)
+    if anterior != instance.idperfilconqueestaactivo_id: programar_indexado(anterior)
+
+
+for modelo in SECCIONES:
+    if modelo is Ventagarage: continue
+    post_save.connect(seccion_indexar, sender=modelo, dispatch_uid=f"cv_busqueda_save_{modelo.__name__}")
+    post_delete.connect(seccion_indexar, sender=modelo, dispatch_uid=f"cv_busqueda_delete_{modelo.__name__}")
+
+
+# ============================================================
+# Referencias de archivos subidos (storage.py)
+# ============================================================
+# save() del storage suma la referencia; aquí se resta la del archivo que la
+# fila deja de usar (reemplazado o borrado). Con on_commit: si la transacción
+# se deshace, la fila sigue apuntando al archivo.
+
+def _liberar(campo, valor):
+    if not valor: return
+    transaction.on_commit(lambda: liberar(**{"url" if campo.endswith("_url") else "nombre": valor}))
+
+
+def _valor(instance, campo):
+    valor = getattr(instance, campo)
+    return getattr(valor, "name", valor)
+
+
+def archivos_modificados(sender, instance, raw=False, **kwargs):
+    if raw: return
+    for campo, anterior in getattr(instance, "_cv_archivos_anteriores", {}).items():
+        if anterior != _valor(instance, campo): _liberar(campo, anterior)
+
+
+def archivos_borrados(sender, instance, **kwargs):
+    for campo in ARCHIVOS[sender]:
+        _liberar(campo, _valor(instance, campo))
+
+
+for modelo in ARCHIVOS:
+    if modelo in SECCIONES:
+        post_save.connect(archivos_modificados, sender=modelo, dispatch_uid=f"cv_blob_save_{modelo.__name__}")
+    post_delete.connect(archivos_borrados, sender=modelo, dispatch_uid=f"cv_blob_delete_{modelo.__name__}")
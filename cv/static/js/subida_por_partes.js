@@ -0,0 +1,144 @@
+/* Subida por partes y reanudable de archivo_digital en el admin (ver cv/subidas.py).
+   El archivo se manda en partes de tamaño fijo; si la conexión se corta, se
+   pregunta al servidor cuántos bytes tiene y se sigue desde ahí (también
+   tras recargar la página, con el token guardado en localStorage). Al terminar,
+   el formulario solo envía el token en <campo>_subida. */
+(function () {
+  "use strict";
+
+  var REINTENTOS = 5;
+
+  function csrf(form) {
+    var input = form.querySelector("[name=csrfmiddlewaretoken]");
+    return input ? input.value : "";
+  }
+
+  function hex(buffer) {
+    return Array.prototype.map.call(new Uint8Array(buffer), function (b) {
+      return ("0" + b.toString(16)).slice(-2);
+    }).join("");
+  }
+
+  function sha256(blob) {
+    // crypto.subtle solo existe en contextos seguros; sin él se omite la verificación
+    if (!window.crypto || !window.crypto.subtle) return Promise.resolve(null);
+    return blob.arrayBuffer().then(function (buf) {
+      return window.crypto.subtle.digest("SHA-256", buf);
+    }).then(hex);
+  }
+
+  function pedir(url, opciones, form) {
+    opciones.headers = Object.assign({"X-CSRFToken": csrf(form)}, opciones.headers || {});
+    opciones.credentials = "same-origin";
+    return fetch(url, opciones).then(function (r) {
+      return r.json().catch(function () { return {}; }).then(function (data) {
+        data._status = r.status;
+        return data;
+      });
+    });
+  }
+
+  function esperar(ms) {
+    return new Promise(function (resolve) { setTimeout(resolve, ms); });
+  }
+
+  function sesion(input, file, form) {
+    var clave = "cv-subida:" + input.dataset.subidaCampo + ":" + file.name + ":" + file.size + ":" + file.lastModified;
+    var token = window.localStorage.getItem(clave);
+    var reanudar = token
+      ? pedir(input.dataset.subidaUrl + token + "/", {method: "GET"}, form)
+      : Promise.resolve({_status: 404});
+    return reanudar.then(function (data) {
+      if (data._status === 200) return {clave: clave, datos: data};
+      return pedir(input.dataset.subidaUrl, {
+        method: "POST",
+        headers: {"Content-Type": "application/json"},
+        body: JSON.stringify({campo: input.dataset.subidaCampo, nombre: file.name, tamano: file.size})
+      }, form).then(function (data) {
+        if (data._status !== 201) throw new Error(data.error || "No se pudo iniciar la subida");
+        window.localStorage.setItem(clave, data.token);
+        return {clave: clave, datos: data};
+      });
+    });
+  }
+
+  function subirPartes(input, file, form, datos, progreso) {
+    var base = input.dataset.subidaUrl + datos.token + "/";
+    var offset = datos.recibidos, fallos = 0;
+
+    function siguiente() {
+      progreso(offset, file.size);
+      if (offset >= file.size) return Promise.resolve();
+      var parte = file.slice(offset, offset + datos.parte);
+      return sha256(parte).then(function (digest) {
+        var headers = {"Content-Type": "application/octet-stream"};
+        if (digest) headers["X-Chunk-Sha256"] = digest;
+        return pedir(base + "?offset=" + offset, {method: "PUT", headers: headers, body: parte}, form);
+      }).then(function (data) {
+        if (data._status === 200 || data._status === 409) {
+          // 409: el servidor tiene otro offset (parte repetida); se sigue desde el suyo
+          offset = data.recibidos;
+          fallos = 0;
+          return siguiente();
+        }
+        throw new Error(data.error || "Error " + data._status);
+      }).catch(function (error) {
+        if (++fallos > REINTENTOS) throw error;
+        return esperar(1000 * fallos).then(function () {
+          return pedir(base, {method: "GET"}, form);
+        }).then(function (data) {
+          if (data._status === 200) offset = data.recibidos;
+          return siguiente();
+        }, siguiente);
+      });
+    }
+    return siguiente().then(function () {
+      return pedir(base + "complete/", {method: "POST"}, form);
+    }).then(function (data) {
+      if (data._status !== 200) throw new Error(data.error || "No se pudo completar la subida");
+      return data;
+    });
+  }
+
+  function iniciar(input) {
+    var form = input.form;
+    var oculto = form.querySelector("[name='" + input.name + "_subida']");
+    var estado = document.createElement("div");
+    estado.className = "help";
+    input.parentNode.appendChild(estado);
+
+    input.addEventListener("change", function () {
+      var file = input.files[0];
+      if (!file || !oculto) return;
+      oculto.value = "";
+      form.dataset.subiendo = (+(form.dataset.subiendo || 0) + 1).toString();
+      var progreso = function (hechos, total) {
+        estado.textContent = "Subiendo " + file.name + ": " + Math.floor(100 * hechos / Math.max(total, 1)) + " %";
+      };
+      sesion(input, file, form).then(function (s) {
+        return subirPartes(input, file, form, s.datos, progreso).then(function (data) {
+          window.localStorage.removeItem(s.clave);
+          oculto.value = data.token;
+          // El archivo ya está en el servidor: el formulario no lo vuelve a mandar
+          input.value = "";
+          estado.textContent = "✔ " + file.name + " subido";
+        });
+      }).catch(function (error) {
+        estado.textContent = "✖ " + error.message + " (se enviará con el formulario)";
+      }).then(function () {
+        form.dataset.subiendo = (+form.dataset.subiendo - 1).toString();
+      });
+    });
+
+    form.addEventListener("submit", function (e) {
+      if (+(form.dataset.subiendo || 0) > 0) {
+        e.preventDefault();
+        window.alert("Espera a que termine la subida del archivo.");
+      }
+    });
+  }
+
+  document.addEventListener("DOMContentLoaded", function () {
+    document.querySelectorAll("input[type=file][data-subida-url]").forEach(iniciar);
+  });
+})();
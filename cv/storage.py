@@ -0,0 +1,89 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .attachment_cache import CHUNK_SIZE
+
+
+# ============================================================
+# Almacenamiento direccionado por contenido (deduplicado)
+# ============================================================
+# Cada archivo subido se guarda como <carpeta>/<sha256><ext>. Antes de subir
+# se calcula el hash leyendo el archivo en bloques; si ese contenido ya existe
+# (tabla "blob") no se sube nada y se devuelve el nombre ya guardado, así que
+# volver a subir el mismo certificado no cuesta ni tiempo ni espacio.
+#
+# blob.referencias cuenta las filas que apuntan al archivo: save() suma una,
+# delete() resta una (nunca borra: el archivo puede estar compartido) y
+# signals.py resta al cambiar o borrar el archivo de una fila. Los blobs sin
+# referencias los borra "manage.py cv_storage_gc" (que también puede
+# recontarlas desde la BD).
+
+def hash_contenido(content):
+    """``(sha256, bytes)`` de un archivo leído en bloques, dejándolo al principio."""
+    digest, total = hashlib.sha256(), 0
+    if hasattr(content, "seek"): content.seek(0)
+    for chunk in content.chunks(CHUNK_SIZE) if hasattr(content, "chunks") else iter(lambda: content.read(CHUNK_SIZE), b""):
+        digest.update(chunk)
+        total += len(chunk)
+    if hasattr(content, "seek"): content.seek(0)
+    return digest.hexdigest(), total
+
+
+class ContenidoDireccionadoMixin:
+    """Se combina con un Storage de Django (antes en el MRO)."""
+
+    def save(self, name, content, max_length=None):
+        from .models import Blob
+
+        if name is None: name = content.name
+        if not hasattr(content, "chunks"): content = File(content, name)
+        sha, total = hash_contenido(content)
+
+        # Contenido ya subido: solo una referencia más
+        if Blob.objects.filter(pk=sha).update(referencias=F("referencias") + 1):
+            return Blob.objects.values_list("nombre", flat=True).get(pk=sha)
+
+        carpeta, ext = os.path.dirname(name), os.path.splitext(name)[1].lower()
+        nombre = super().save(f"{carpeta}/{sha}{ext}" if carpeta else f"{sha}{ext}", content, max_length)
+        try:
+            with transaction.atomic():
+                Blob.objects.create(sha256=sha, nombre=nombre, url=self.url(nombre), bytes=total)
+        except IntegrityError:
+            # Otra petición subió el mismo contenido a la vez
+            Blob.objects.filter(pk=sha).update(referencias=F("referencias") + 1)
+            return Blob.objects.values_list("nombre", flat=True).get(pk=sha)
+        return nombre
+
+    def delete(self, name):
+        liberar(nombre=name)
+
+    def borrar_blob(self, name):
+        """Borrado real del archivo (solo desde cv_storage_gc)."""
+        return super().delete(name)
+
+
+class LocalStorage(ContenidoDireccionadoMixin, FileSystemStorage):
+    """MEDIA_ROOT en disco; sustituye a Cloudinary en desarrollo, tests y benchmarks."""
+
+    def get_available_name(self, name, max_length=None):
+        # Mismo nombre => mismo contenido: se reutiliza en vez de renombrar
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name): return name
+        return super()._save(name, content)
+
+
+def liberar(nombre=None, url=None):
+    """Resta una referencia al blob con ese nombre o URL (los archivos que no son blobs se ignoran)."""
+    from .models import Blob
+
+    if not nombre and not url: return
+    filtro = {"nombre": nombre} if nombre else {"url": url}
+    Blob.objects.filter(referencias__gt=0, **filtro).update(referencias=F("referencias") - 1)
+
@@ -0,0 +1,10 @@
+from cloudinary_storage.storage import MediaCloudinaryStorage
+
+from .storage import ContenidoDireccionadoMixin
+
+
+# Módulo aparte: importar cloudinary_storage exige credenciales, y el backend
+# local (cv.storage.LocalStorage) tiene que funcionar sin ellas.
+
+class CloudinaryStorage(ContenidoDireccionadoMixin, MediaCloudinaryStorage):
+    """MediaCloudinaryStorage deduplicado por contenido (ver cv.storage)."""
@@ -0,0 +1,129 @@
+import hashlib
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import F
+from django.utils import timezone
+
+from .attachment_cache import CHUNK_SIZE
+from .certificados import normalizar_certificado
+from .enlaces import DOC_MODELOS
+from .models import Subida
+from .storage import liberar
+
+
+# ============================================================
+# Subidas por partes y reanudables (widget de archivo_digital en el admin)
+# ============================================================
+# 1. POST  /cv/uploads/                  -> sesión (token) con nombre y tamaño
+# 2. GET   /cv/uploads/<token>/          -> bytes ya recibidos (para reanudar)
+# 3. PUT   /cv/uploads/<token>/?offset=N -> una parte; se verifica su SHA-256
+#    (cabecera X-Chunk-Sha256) mientras se escribe en disco en bloques
+# 4. POST  /cv/uploads/<token>/complete/ -> normaliza el certificado y lo
+#    guarda en el storage (deduplicado por contenido, storage.py)
+# El formulario del admin solo manda el token: al guardar, la fila apunta al
+# archivo ya subido y a su PDF normalizado, sin volver a procesar nada.
+
+class SubidaInvalida(ValueError):
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.status = status
+
+
+def _ruta(subida):
+    return Path(settings.CV_UPLOAD_DIR) / f"{subida.pk.hex}.part"
+
+
+def crear(campo, nombre, tamano):
+    if campo not in DOC_MODELOS: raise SubidaInvalida("campo desconocido")
+    if not nombre or len(nombre) > 200: raise SubidaInvalida("nombre inválido")
+    if not isinstance(tamano, int) or tamano <= 0: raise SubidaInvalida("tamano inválido")
+    maximo = min(settings.CV_UPLOAD_MAX_BYTES, settings.CV_ATTACHMENT_MAX_BYTES)
+    if tamano > maximo: raise SubidaInvalida(f"El archivo supera el máximo de {maximo // (1024 * 1024)} MB", 413)
+    subida = Subida.objects.create(campo=campo, nombre=os.path.basename(nombre), tamano=tamano)
+    _ruta(subida).parent.mkdir(parents=True, exist_ok=True)
+    _ruta(subida).touch()
+    return subida
+
+
+def escribir_parte(subida, offset, stream, longitud, sha256=None):
+    """Escribe una parte en ``offset`` leyendo ``stream`` en bloques. Devuelve los bytes recibidos."""
+    if subida.archivo: raise SubidaInvalida("La subida ya está completa", 409)
+    # Fuera de orden (p. ej. una parte repetida al reanudar): el cliente sigue desde "recibidos"
+    if offset != subida.recibidos: raise SubidaInvalida("offset no coincide", 409)
+    if longitud <= 0 or longitud > settings.CV_UPLOAD_CHUNK_BYTES: raise SubidaInvalida("tamaño de parte inválido")
+    if offset + longitud > subida.tamano: raise SubidaInvalida("la parte excede el tamaño declarado")
+
+    digest, escritos = hashlib.sha256(), 0
+    with open(_ruta(subida), "r+b") as f:
+        f.seek(offset)
+        while escritos < longitud:
+            bloque = stream.read(min(CHUNK_SIZE, longitud - escritos))
+            if not bloque: break
+            digest.update(bloque)
+            f.write(bloque)
+            escritos += len(bloque)
+        if escritos != longitud: raise SubidaInvalida("parte incompleta")
+        if sha256 and digest.hexdigest() != sha256.lower(): raise SubidaInvalida("SHA-256 de la parte no coincide")
+
+    # Solo avanza si nadie escribió esta misma parte a la vez
+    if not Subida.objects.filter(pk=subida.pk, recibidos=offset).update(recibidos=F("recibidos") + escritos):
+        raise SubidaInvalida("offset no coincide", 409)
+    subida.recibidos = offset + escritos
+    return subida.recibidos
+
+
+def completar(subida):
+    """Normaliza y guarda en el storage el archivo ensamblado (lanza ValidationError si no es válido)."""
+    if subida.archivo: return subida
+    if subida.recibidos != subida.tamano: raise SubidaInvalida("faltan partes", 409)
+
+    modelo = DOC_MODELOS[subida.campo]
+    upload_to = modelo._meta.get_field("archivo_digital").upload_to
+    with open(_ruta(subida), "rb") as f:
+        # La misma validación/normalización que CertificadoMixin.full_clean,
+        # leyendo del archivo ensamblado y escribiendo en un temporal
+        pdf, paginas = normalizar_certificado(f)
+        try:
+            nombre = default_storage.save(upload_to(None, subida.nombre), File(f, subida.nombre))
+        except BaseException:
+            pdf.close()
+            raise
+
+    # La fila que use la subida se queda con estas referencias (ver liberar_caducadas)
+    obj = modelo()
+    obj.subir_pdf_normalizado(pdf, paginas)
+    subida.archivo = nombre
+    subida.archivo_pdf_url, subida.archivo_pdf_paginas, subida.archivo_pdf_bytes = obj.archivo_pdf_url, paginas, obj.archivo_pdf_bytes
+    subida.save(update_fields=["archivo", "archivo_pdf_url", "archivo_pdf_paginas", "archivo_pdf_bytes"])
+    _ruta(subida).unlink(missing_ok=True)
+    return subida
+
+
+def asignar(obj, token):
+    """Apunta ``obj`` al archivo ya subido con ``token`` (borrar la sesión tras guardar la fila)."""
+    subida = Subida.objects.filter(pk=token).first()
+    if subida is None or not subida.archivo or DOC_MODELOS[subida.campo] is not type(obj):
+        raise ValidationError("La subida no existe o no terminó.")
+    obj.archivo_digital = subida.archivo
+    obj.archivo_pdf_url, obj.archivo_pdf_paginas, obj.archivo_pdf_bytes = subida.archivo_pdf_url, subida.archivo_pdf_paginas, subida.archivo_pdf_bytes
+    return subida
+
+
+def liberar_caducadas():
+    """Borra sesiones más viejas que ``CV_UPLOAD_TTL``; las completas sin usar liberan sus blobs."""
+    limite = timezone.now() - timedelta(seconds=settings.CV_UPLOAD_TTL)
+    borradas = 0
+    for subida in Subida.objects.filter(creado__lt=limite).iterator():
+        _ruta(subida).unlink(missing_ok=True)
+        if subida.archivo:
+            liberar(nombre=subida.archivo)
+            liberar(url=subida.archivo_pdf_url)
+        subida.delete()
+        borradas += 1
+    return borradas
@@ -0,0 +1,55 @@
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from cv import vendor
+
+register = template.Library()
+
+
+# ============================================================
+# CSS crítico incrustado
+# ============================================================
+# Lo que se ve al cargar va en un <style> dentro del HTML (sin petición que
+# bloquee el render); el resto se enlaza como archivo estático cacheable.
+# Los archivos incrustados no pueden usar url() relativas: no las reescribe
+# ManifestStaticFilesStorage.
+
+@lru_cache(maxsize=None)
+def _leer(ruta):
+    encontrado = finders.find(ruta)
+    if not encontrado: raise template.TemplateSyntaxError(f"css_inline: no existe el estático {ruta!r}")
+    with open(encontrado, encoding="utf-8") as f:
+        return f.read()
+
+
+@register.simple_tag
+def css_inline(ruta):
+    """``<style>`` con el contenido del estático ``ruta`` (leído una vez por proceso salvo en DEBUG)."""
+    if settings.DEBUG: _leer.cache_clear()
+    css = _leer(ruta).replace("</", "<\\/")  # que el CSS no pueda cerrar el <style>
+    return mark_safe(f"<style>\n{css}</style>")
+
+
+# ============================================================
+# Dependencias front-end (vendor.py)
+# ============================================================
+# Estático propio (hasheado) si el archivo está en cv/static/vendor; si no,
+# la URL fija del CDN, con su SRI cuando lo hay.
+
+@register.simple_tag
+def vendor_url(destino):
+    return static(f"vendor/{destino}") if vendor.local(destino) else vendor.CDN[destino][0]
+
+
+@register.simple_tag
+def vendor_integridad(destino):
+    """Atributos ``integrity``/``crossorigin`` para el CDN; vacío si el archivo es local."""
+    integridad = None if vendor.local(destino) else vendor.CDN[destino][1]
+    if not integridad: return ""
+    return format_html(' integrity="{}" crossorigin="anonymous"', integridad)
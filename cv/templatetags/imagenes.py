@@ -0,0 +1,33 @@
+from django import template
+from django.conf import settings
+from django.utils.html import format_html
+
+from cv import miniaturas
+
+register = template.Library()
+
+
+# ============================================================
+# Imágenes responsive (variantes de miniaturas.py)
+# ============================================================
+
+@register.simple_tag
+def imagen_responsiva(url, alt="", sizes="100vw", clase="", lazy=True):
+    """``<picture>`` con srcset WebP y JPEG de respaldo; el navegador elige el ancho según ``sizes``."""
+    if not url: return ""
+    # src para navegadores sin srcset: la variante intermedia, no el original
+    anchos = settings.CV_IMG_WIDTHS
+    src = miniaturas.url_variante(url, anchos[len(anchos) // 2])
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}"{}{}></picture>',
+        miniaturas.srcset(url, "webp"), sizes, src, miniaturas.srcset(url, "jpg"), sizes, alt,
+        format_html(' class="{}"', clase) if clase else "",
+        format_html(' loading="lazy"') if lazy else "",
+    )
+
+
+@register.filter
+def imagen_print(url):
+    """Variante pequeña para el PDF (WeasyPrint no reescala: incrusta lo que descarga)."""
+    return miniaturas.url_variante(url, settings.CV_IMG_PRINT_WIDTH) if url else url
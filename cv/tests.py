@@ -1,3 +1,1557 @@
-from django.test import TestCase
+import base64
+import hashlib
+import importlib
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import DatabaseError, connection, transaction
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.template.loader import render_to_string
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from pypdf import PdfReader, PdfWriter
+
+from . import api, benchmarks, busqueda, caches, catalogo, directorio, jobs, miniaturas, render, revision, vendor
+from .attachment_cache import AttachmentCache
+from .attachments import AttachmentBatch
+from .certificados import normalizar_certificado
+from .enlaces import _local
+from .loaders import SECCIONES, load_profile, load_sections, profile_context
+from .models import (
+    Datospersonales, Experiencialaboral, Cursosrealizados,
+    Productosacademicos, Productoslaborales, Reconocimientos, Ventagarage, Busquedaperfil, Blob, Subida, Trabajopdf
+)
+from .pdf import generate_cv_pdf
+from .pdf_cache import PdfCache, SECCIONES_MODAL
+
+# Sin collectstatic no hay manifest de estáticos: las páginas se renderizan
+# con StaticFilesStorage (nombres sin hash); los archivos subidos van a disco.
+STORAGES_TEST = {
+    "default": {"BACKEND": "cv.storage.LocalStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+# Cualquier backend que no sea local de cada proceso (cv/caches.py)
+CACHES_COMPARTIDA = {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": os.path.join(tempfile.gettempdir(), "cv-tests-cache")}}
+
+
+def crear_perfil(filas=3):
+    """Perfil con ``filas`` registros visibles y uno oculto por sección (sin señales ni full_clean)."""
+    hoy = date.today()
+    perfil = Datospersonales.objects.create(nombres="Ana", apellidos="Prueba")
+    for i in range(filas + 1):
+        visible = i < filas
+        fecha = hoy - timedelta(days=30 * (i + 1))
+        Experiencialaboral.objects.bulk_create([Experiencialaboral(idperfilconqueestaactivo=perfil, cargodesempenado=f"Cargo {i}", fechainiciogestion=fecha, activarparaqueseveaenfront=visible)])
+        Cursosrealizados.objects.bulk_create([Cursosrealizados(idperfilconqueestaactivo=perfil, nombrecurso=f"Curso {i}", fechainicio=fecha, activarparaqueseveaenfront=visible)])
+        Productosacademicos.objects.bulk_create([Productosacademicos(idperfilconqueestaactivo=perfil, nombrerecurso=f"Artículo {i}", activarparaqueseveaenfront=visible)])
+        Productoslaborales.objects.bulk_create([Productoslaborales(idperfilconqueestaactivo=perfil, nombreproducto=f"Entregable {i}", fechaproducto=fecha, activarparaqueseveaenfront=visible)])
+        Reconocimientos.objects.bulk_create([Reconocimientos(idperfilconqueestaactivo=perfil, descripcionreconocimiento=f"Logro {i}", fechareconocimiento=hoy - timedelta(days=400 - i), activarparaqueseveaenfront=visible)])
+        Ventagarage.objects.bulk_create([Ventagarage(idperfilconqueestaactivo=perfil, nombreproducto=f"Producto {i}", precio=10, estado="Bueno", fechapublicacion=fecha, activo=visible)])
+    return perfil
+
+
+# ============================================================
+# Presupuesto de consultas del cargador de perfiles
+# ============================================================
+
+@override_settings(STORAGES=STORAGES_TEST)
+class ProfileLoaderTests(TestCase):
+    # 1 perfil + 6 secciones, independiente del número de filas
+    PRESUPUESTO = 7
+
+    def setUp(self):
+        self.perfil = crear_perfil()
+
+    def test_load_profile_query_budget(self):
+        with self.assertNumQueries(self.PRESUPUESTO):
+            context = profile_context(load_profile(self.perfil.pk))
+        self.assertEqual(len(context["experiencias"]), 3)
+        self.assertEqual(len(context["ventas_garage"]), 3)
+
+    def test_budget_does_not_grow_with_rows(self):
+        grande = crear_perfil(filas=15)
+        with self.assertNumQueries(self.PRESUPUESTO):
+            profile_context(load_profile(grande.pk))
+
+    def test_consistent_ordering(self):
+        context = profile_context(load_profile(self.perfil.pk))
+        fechas = [r.fechareconocimiento for r in context["reconocimientos"]]
+        self.assertEqual(fechas, sorted(fechas, reverse=True))
+        pks = [p.pk for p in context["productos_academicos"]]
+        self.assertEqual(pks, sorted(pks, reverse=True))
+
+    def test_load_sections_only_requested(self):
+        perfil = Datospersonales.objects.get(pk=self.perfil.pk)
+        with self.assertNumQueries(2):
+            context = profile_context(load_sections(perfil, {"exp", "rec"}), {"exp", "rec"})
+        self.assertEqual(len(context["reconocimientos"]), 3)
+        self.assertEqual(context["cursos"], [])
+        # Lo ya cargado no se vuelve a consultar
+        with self.assertNumQueries(0):
+            load_sections(perfil, {"exp", "rec"})
+
+    def test_perfil_detail_query_budget(self):
+        cache.clear()
+        url = reverse("cv_detail", args=[self.perfil.pk])
+        # En frío: validadores + perfil + 6 secciones
+        with self.assertNumQueries(1 + self.PRESUPUESTO):
+            response = self.client.get(url, HTTP_HOST="localhost", secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Cargo 0")
+        self.assertNotContains(response, "Cargo 3")
+        # En caliente: solo la consulta de validadores
+        with self.assertNumQueries(1):
+            caliente = self.client.get(url, HTTP_HOST="localhost", secure=True)
+        self.assertEqual(caliente.content, response.content)
+
+    def test_perfil_detail_404(self):
+        response = self.client.get(reverse("cv_detail", args=[999999]), HTTP_HOST="localhost", secure=True)
+        self.assertEqual(response.status_code, 404)
+
+    def test_cv_print_cache_hit_skips_sections(self):
+        with tempfile.TemporaryDirectory() as d, override_settings(CV_PDF_CACHE_DIR=d):
+            PdfCache().set_pdf(self.perfil, set(SECCIONES_MODAL), io.BytesIO(b"%PDF-1.4 prueba"))
+            with self.assertNumQueries(1):
+                response = self.client.get(reverse("cv_print", args=[self.perfil.pk]), HTTP_HOST="localhost", secure=True)
+            self.assertEqual(b"".join(response.streaming_content), b"%PDF-1.4 prueba")
+
+
+# ============================================================
+# Índices de las consultas de secciones
+# ============================================================
+
+class SectionIndexTests(TestCase):
+    INDICES = {
+        "exp": "exp_perfil_visible_fecha", "edu": "curso_perfil_visible_fecha", "acad": "acad_perfil_visible",
+        "lab": "lab_perfil_visible_fecha", "rec": "rec_perfil_visible_fecha", "garage": "garage_perfil_activo_fecha",
+    }
+
+    def setUp(self):
+        self.perfil = crear_perfil()
+        if connection.vendor == "postgresql":
+            # Con tablas tan pequeñas el planificador preferiría un seq scan
+            with connection.cursor() as cursor: cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def test_section_queries_use_partial_indexes(self):
+        for clave, (related_name, modelo, filtro, orden) in SECCIONES.items():
+            # La misma consulta que lanza el Prefetch de cv.loaders
+            qs = modelo.objects.filter(**filtro, idperfilconqueestaactivo__in=[self.perfil.pk]).order_by(*orden)
+            plan = qs.explain()
+            with self.subTest(seccion=clave):
+                self.assertIn(self.INDICES[clave], plan)
+                if connection.vendor == "sqlite":
+                    self.assertNotIn("TEMP B-TREE", plan)
+                elif connection.vendor == "postgresql":
+                    self.assertNotIn("Sort", plan)
+
+
+# ============================================================
+# GET condicional y caché de página de /cv/<id>/
+# ============================================================
+
+@override_settings(STORAGES=STORAGES_TEST)
+class PerfilDetailCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.perfil = crear_perfil()
+        self.url = reverse("cv_detail", args=[self.perfil.pk])
+
+    def get(self, **headers):
+        return self.client.get(self.url, HTTP_HOST="localhost", secure=True, **headers)
+
+    def test_etag_304(self):
+        response = self.get()
+        self.assertTrue(response["ETag"])
+        self.assertIn("Last-Modified", response)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get(HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]).status_code, 304)
+
+    def test_section_change_invalidates(self):
+        response = self.get()
+        curso = Cursosrealizados.objects.filter(idperfilconqueestaactivo=self.perfil, activarparaqueseveaenfront=True).first()
+        curso.nombrecurso = "Curso renombrado"
+        curso.save()
+        nuevo = self.get(HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(nuevo.status_code, 200)
+        self.assertNotEqual(nuevo["ETag"], response["ETag"])
+        self.assertContains(nuevo, "Curso renombrado")
+
+    def test_deploy_revision_invalidates(self):
+        response = self.get()
+        self.addCleanup(revision._calcular.cache_clear)
+        with override_settings(CV_BUILD_REVISION="otro-despliegue"):
+            revision._calcular.cache_clear()
+            nuevo = self.get(HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(nuevo.status_code, 200)
+        self.assertNotEqual(nuevo["ETag"], response["ETag"])
+
+    def test_profile_change_invalidates(self):
+        response = self.get()
+        perfil = Datospersonales.objects.get(pk=self.perfil.pk)
+        perfil.nombres = "Beatriz"
+        perfil.save()
+        nuevo = self.get(HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(nuevo.status_code, 200)
+        self.assertContains(nuevo, "Beatriz")
+
+
+# ============================================================
+# Enlaces derivados guardados en columnas
+# ============================================================
+
+@override_settings(STORAGES=STORAGES_TEST)
+class EnlacesArchivoTests(TestCase):
+    def setUp(self):
+        self.perfil = Datospersonales.objects.create(nombres="Ana", apellidos="Prueba")
+
+    def test_save_computes_derived_columns(self):
+        url = "https://res.cloudinary.com/demo/image/upload/v1/certificados/curso.PDF"
+        curso = Cursosrealizados(idperfilconqueestaactivo=self.perfil, nombrecurso="Curso", rutacertificado=url)
+        curso.save()
+        curso.refresh_from_db()
+        self.assertEqual(curso.final_url, url)
+        self.assertTrue(curso.is_pdf)
+        self.assertEqual(curso.thumbnail, "https://res.cloudinary.com/demo/image/upload/w_600,q_auto,f_jpg,pg_1/v1/certificados/curso.jpg")
+
+        curso.rutacertificado = None
+        curso.save()
+        curso.refresh_from_db()
+        self.assertEqual((curso.final_url, curso.is_pdf, curso.thumbnail), (None, False, None))
+
+    def test_page_reads_stored_columns(self):
+        Cursosrealizados(idperfilconqueestaactivo=self.perfil, nombrecurso="Curso", rutacertificado="https://example.com/c.png").save()
+        response = self.client.get(reverse("cv_detail", args=[self.perfil.pk]), HTTP_HOST="localhost", secure=True)
+        # Fuera de Cloudinary la miniatura es local (miniaturas.py), nunca el original
+        self.assertContains(response, 'src="/cv/thumb/')
+        self.assertNotContains(response, 'src="https://example.com/c.png"')
+
+    def test_migration_keeps_its_own_derivation(self):
+        migracion = importlib.import_module("cv.migrations.0013_certificado_enlaces")
+        self.assertNotIn("cv.models", {getattr(v, "__module__", None) for v in vars(migracion).values()})
+        curso = Cursosrealizados(idperfilconqueestaactivo=self.perfil, nombrecurso="Curso", rutacertificado="https://example.com/c.png")
+        curso.save()
+        Cursosrealizados.objects.update(final_url=None, thumbnail=None)
+        migracion.rellenar_enlaces(apps, connection.schema_editor())
+        curso.refresh_from_db()
+        # Valores de entonces: sin proxy local de miniaturas
+        self.assertEqual((curso.final_url, curso.is_pdf, curso.thumbnail), ("https://example.com/c.png", False, "https://example.com/c.png"))
+
+
+# ============================================================
+# doc_redirect con enlaces cacheados
+# ============================================================
+
+class DocRedirectTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _local.clear()
+        perfil = Datospersonales.objects.create(nombres="Ana", apellidos="Prueba")
+        self.curso = Cursosrealizados(idperfilconqueestaactivo=perfil, nombrecurso="Curso", rutacertificado="https://example.com/a.pdf")
+        self.curso.save()
+        self.url = reverse("cv_doc", args=["cursos", self.curso.pk])
+
+    def get(self, url=None):
+        return self.client.get(url or self.url, HTTP_HOST="localhost", secure=True)
+
+    def test_cached_redirect(self):
+        with self.assertNumQueries(1):
+            response = self.get()
+        self.assertRedirects(response, "https://example.com/a.pdf", fetch_redirect_response=False)
+        self.assertIn("max-age", response["Cache-Control"])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get()["Location"], "https://example.com/a.pdf")
+        # Sin la LRU local se sirve desde la caché compartida
+        _local.clear()
+        with self.assertNumQueries(0):
+            self.get()
+
+    def test_invalidated_on_save_and_delete(self):
+        self.get()
+        self.curso.rutacertificado = "https://example.com/b.pdf"
+        self.curso.save()
+        self.assertEqual(self.get()["Location"], "https://example.com/b.pdf")
+        self.curso.delete()
+        self.assertEqual(self.get().status_code, 404)
+
+    def test_unknown_model_or_row(self):
+        self.assertEqual(self.get(reverse("cv_doc", args=["otro", 1])).status_code, 404)
+        self.assertEqual(self.get(reverse("cv_doc", args=["rec", 999])).status_code, 404)
+
+    def test_short_ttl_without_shared_cache(self):
+        # Con LocMemCache otros workers no ven la invalidación: la entrada dura poco
+        with mock.patch("cv.enlaces.cache") as compartida:
+            compartida.get.return_value = None
+            self.get()
+            _local.clear()
+            with override_settings(CACHES=CACHES_COMPARTIDA):
+                self.get()
+        self.assertEqual([c.args[2] for c in compartida.set.call_args_list],
+                         [settings.CV_LOCAL_CACHE_TTL, settings.CV_DOC_CACHE_TTL])
+
+    def test_per_process_cache_is_flagged(self):
+        self.assertEqual([w.id for w in caches.check_cache(None)], ["cv.W002"])
+        with override_settings(DEBUG=True):
+            self.assertEqual(caches.check_cache(None), [])
+        with override_settings(CACHES=CACHES_COMPARTIDA):
+            self.assertEqual(caches.check_cache(None), [])
+
+
+# ============================================================
+# Directorio y perfil de portada
+# ============================================================
+
+@override_settings(CV_DIRECTORY_PAGE_SIZE=3, STORAGES=STORAGES_TEST)
+class DirectoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        apellidos = ["Zapata", "Andrade", None, "Mora", "Andrade", "Bravo", "Cedeño"]
+        self.perfiles = [
+            Datospersonales.objects.create(nombres=f"P{i}", apellidos=a, nacionalidad="Peruana" if i % 2 else "Ecuatoriana")
+            for i, a in enumerate(apellidos)
+        ]
+        Datospersonales.objects.create(nombres="Oculto", apellidos="Aaa", activarparaqueseveaenfront=False)
+
+    def get(self, **params):
+        return self.client.get(reverse("cv_directory"), params, HTTP_HOST="localhost", secure=True)
+
+    def test_keyset_pages_cover_everything_once(self):
+        vistos, params = [], {}
+        while True:
+            with self.assertNumQueries(3):  # página + conteo + nacionalidades
+                cache.clear()
+                response = self.get(**params)
+            vistos += [p.pk for p in response.context["perfiles"]]
+            if not response.context["siguiente_url"]: break
+            params = {"cursor": response.context["siguiente_url"].split("cursor=")[1]}
+        esperado = sorted(self.perfiles, key=lambda p: (p.apellidos or "", p.pk))
+        self.assertEqual(vistos, [p.pk for p in esperado])
+        self.assertEqual(response.context["total"], 7)
+
+    def test_filters(self):
+        crear_perfil()  # "Ana Prueba" con filas visibles en todas las secciones
+        response = self.get(con="exp,garage")
+        self.assertEqual([p.nombres for p in response.context["perfiles"]], ["Ana"])
+        response = self.get(nacionalidad="Peruana")
+        self.assertEqual(response.context["total"], 3)
+        self.assertEqual(self.get(cursor="basura").status_code, 200)
+
+    def test_cv_home_cached_pointer(self):
+        url = reverse("home")
+        response = self.client.get(url, HTTP_HOST="localhost", secure=True)
+        self.assertRedirects(response, reverse("cv_detail", args=[self.perfiles[0].pk]), fetch_redirect_response=False)
+        with self.assertNumQueries(0):
+            self.client.get(url, HTTP_HOST="localhost", secure=True)
+        self.perfiles[0].delete()
+        response = self.client.get(url, HTTP_HOST="localhost", secure=True)
+        self.assertEqual(response["Location"], reverse("cv_detail", args=[self.perfiles[1].pk]))
+
+    def test_cv_home_pointer_expires(self):
+        with mock.patch("cv.directorio.cache") as compartida:
+            compartida.get.return_value = None
+            directorio.perfil_por_defecto()
+            with override_settings(CACHES=CACHES_COMPARTIDA):
+                directorio.perfil_por_defecto()
+        self.assertEqual([c.args[2] for c in compartida.set.call_args_list],
+                         [settings.CV_LOCAL_CACHE_TTL, settings.CV_HOME_CACHE_TTL])
+
+    def test_directory_order_uses_index(self):
+        plan = directorio.perfiles_activos().order_by("orden_apellidos", "idperfil")[:4].explain()
+        if connection.vendor == "sqlite":
+            self.assertIn("perfil_directorio", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+
+# ============================================================
+# Búsqueda de texto completo
+# ============================================================
+
+@override_settings(STORAGES=STORAGES_TEST)
+class SearchTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ana = Datospersonales.objects.create(nombres="Ana", apellidos="Cedeño", descripcionperfil="Desarrolladora")
+            self.luis = Datospersonales.objects.create(nombres="Luis", apellidos="Mora", descripcionperfil="Contador")
+            self.exp = Experiencialaboral(idperfilconqueestaactivo=self.luis, cargodesempenado="Desarrollador Python", nombrempresa="Banco Pichincha")
+            self.exp.save()
+            Cursosrealizados(idperfilconqueestaactivo=self.ana, nombrecurso="Django avanzado", entidadpatrocinadora="ESPOL").save()
+
+    def ids(self, q):
+        return [p.pk for p in busqueda.buscar(q)[0]]
+
+    def test_incremental_index_and_ranking(self):
+        self.assertEqual(self.ids("pichincha"), [self.luis.pk])
+        self.assertEqual(self.ids("django espol"), [self.ana.pk])
+        self.assertEqual(self.ids("cedeno"), [self.ana.pk])
+        # El título pesa más que el texto de las secciones
+        self.assertEqual(self.ids("desarroll"), [self.ana.pk, self.luis.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.exp.delete()
+        self.assertEqual(self.ids("pichincha"), [])
+
+    def test_inactive_profile_removed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ana.activarparaqueseveaenfront = False
+            self.ana.save()
+        self.assertEqual(self.ids("django"), [])
+
+    def test_rebuild_and_view(self):
+        Busquedaperfil.objects.all().delete()
+        self.assertEqual(self.ids("pichincha"), [])
+        call_command("rebuild_search_index", stdout=io.StringIO())
+        self.assertEqual(self.ids("pichincha"), [self.luis.pk])
+
+        response = self.client.get(reverse("cv_search"), {"q": 'banco "pichincha'}, HTTP_HOST="localhost", secure=True)
+        self.assertEqual([p.pk for p in response.context["perfiles"]], [self.luis.pk])
+        response = self.client.get(reverse("cv_search"), {"q": "***", "page": "x"}, HTTP_HOST="localhost", secure=True)
+        self.assertEqual(response.context["perfiles"], [])
+
+    def test_reindexes_once_per_transaction(self):
+        with mock.patch("cv.signals.indexar_perfil") as indexar:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                self.ana.descripcionperfil = "Arquitecta"
+                self.ana.save()
+                for i in range(3):
+                    Cursosrealizados(idperfilconqueestaactivo=self.ana, nombrecurso=f"Curso {i}").save()
+                self.exp.idperfilconqueestaactivo = self.ana
+                self.exp.save()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(sorted(c.args[0] for c in indexar.call_args_list), [self.ana.pk, self.luis.pk])
+
+        # Un savepoint deshecho se lleva su callback; el siguiente cambio programa otro
+        with mock.patch("cv.signals.indexar_perfil") as indexar:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    try:
+                        with transaction.atomic():
+                            self.ana.save()
+                            raise DatabaseError
+                    except DatabaseError:
+                        pass
+                    self.luis.save()
+        indexar.assert_called_once_with(self.luis.pk)
+
+    def test_migration_backfills_existing_profiles(self):
+        rellenar = importlib.import_module("cv.migrations.0019_rellenar_busquedaperfil").rellenar_indice
+        Busquedaperfil.objects.all().delete()
+        rellenar(apps, connection.schema_editor())
+        self.assertEqual(self.ids("pichincha"), [self.luis.pk])
+        self.assertEqual(self.ids("django espol"), [self.ana.pk])
+        self.assertEqual(Busquedaperfil.objects.get(pk=self.ana.pk).documento, busqueda.documento_perfil(load_profile(self.ana.pk))[1])
+
+    @override_settings(CV_SEARCH_PAGE_SIZE=1)
+    def test_pagination(self):
+        primera, hay_mas = busqueda.buscar("desarroll", 1)
+        segunda, fin = busqueda.buscar("desarroll", 2)
+        self.assertTrue(hay_mas)
+        self.assertFalse(fin)
+        self.assertEqual([primera[0].pk, segunda[0].pk], [self.ana.pk, self.luis.pk])
+
+
+# ============================================================
+# Catálogo de garage
+# ============================================================
+
+@override_settings(CV_CATALOG_PAGE_SIZE=4, STORAGES=STORAGES_TEST)
+class GarageCatalogTests(TestCase):
+    def setUp(self):
+        hoy = date.today()
+        self.perfil = Datospersonales.objects.create(nombres="Ana")
+        oculto = Datospersonales.objects.create(nombres="Oculto", activarparaqueseveaenfront=False)
+        Ventagarage.objects.bulk_create(
+            [Ventagarage(idperfilconqueestaactivo=self.perfil, nombreproducto=f"P{i}", precio=10 + i % 5, estado="Bueno" if i % 2 else "Regular",
+                         fechapublicacion=hoy - timedelta(days=i % 7), descripcion="x" * 1000) for i in range(11)]
+            + [Ventagarage(idperfilconqueestaactivo=self.perfil, nombreproducto="Inactivo", precio=1, estado="Bueno", fechapublicacion=hoy, activo=False),
+               Ventagarage(idperfilconqueestaactivo=oculto, nombreproducto="De oculto", precio=1, estado="Bueno", fechapublicacion=hoy)]
+        )
+
+    def api(self, **params):
+        return self.client.get(reverse("cv_garage_api"), params, HTTP_HOST="localhost", secure=True)
+
+    def recorrer(self, **params):
+        ids, response = [], self.api(**params)
+        while True:
+            data = response.json()
+            ids += [i["id"] for i in data["items"]]
+            if not data["next"]: return ids
+            response = self.client.get(data["next"], HTTP_HOST="localhost", secure=True)
+
+    def test_keyset_pages_for_each_order(self):
+        base = Ventagarage.objects.filter(activo=True, idperfilconqueestaactivo=self.perfil)
+        for orden, campos in (("-fecha", ("-fechapublicacion", "-pk")), ("fecha", ("fechapublicacion", "pk")),
+                              ("precio", ("precio", "pk")), ("-precio", ("-precio", "-pk"))):
+            with self.subTest(orden=orden):
+                self.assertEqual(self.recorrer(orden=orden), list(base.order_by(*campos).values_list("pk", flat=True)))
+
+    def test_filters_and_columns(self):
+        ids = self.recorrer(estado="Bueno", precio_min="11", precio_max="12")
+        esperado = Ventagarage.objects.filter(activo=True, idperfilconqueestaactivo=self.perfil, estado="Bueno", precio__gte=11, precio__lte=12)
+        self.assertEqual(sorted(ids), sorted(esperado.values_list("pk", flat=True)))
+        with CaptureQueriesContext(connection) as consultas:
+            self.api()
+        self.assertEqual(len(consultas), 1)
+        self.assertNotIn("descripcion", consultas[0]["sql"])
+
+    def test_invalid_params(self):
+        self.assertEqual(self.api(precio_min="20", precio_max="5").status_code, 400)
+        self.assertEqual(self.api(orden="nombre").status_code, 400)
+        self.assertEqual(len(self.api(cursor="basura").json()["items"]), 4)
+        response = self.client.get(reverse("cv_garage"), {"estado": "Bueno"}, HTTP_HOST="localhost", secure=True)
+        self.assertContains(response, "P1")
+        self.assertNotContains(response, "De oculto")
+
+    def test_catalog_orders_use_indexes(self):
+        if connection.vendor != "sqlite": return
+        for orden in catalogo.ORDENES:
+            for estado in ("", "Bueno"):
+                qs = catalogo.filtrar(Ventagarage.objects.filter(activo=True), {"estado": estado})
+                campo, desc = catalogo.ORDENES[orden]
+                prefijo = "-" if desc else ""
+                plan = qs.order_by(f"{prefijo}{campo}", f"{prefijo}pk")[:5].explain()
+                with self.subTest(orden=orden, estado=estado):
+                    self.assertIn("garage_activo", plan)
+                    self.assertNotIn("TEMP B-TREE", plan)
+
+
+# ============================================================
+# API JSON v1
+# ============================================================
+
+class ProfileApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.perfil = crear_perfil()
+        self.url = reverse("cv_api_profile", args=[self.perfil.pk])
+
+    def get(self, url=None, params=None, **headers):
+        return self.client.get(url or self.url, params or {}, HTTP_HOST="localhost", secure=True, **headers)
+
+    def test_full_profile_uses_web_visibility_and_order(self):
+        with self.assertNumQueries(1 + 1 + 6):
+            data = self.get().json()
+        self.assertEqual(data["idperfil"], self.perfil.pk)
+        web = profile_context(load_profile(self.perfil.pk))
+        for seccion in api.CAMPOS_SECCION:
+            self.assertEqual([f["id"] for f in data[seccion]], [o.pk for o in web[seccion]])
+
+    def test_sparse_fieldsets(self):
+        with self.assertNumQueries(1 + 1 + 1):
+            data = self.get(params={"fields": "nombres", "include": "cursos", "fields[cursos]": "nombrecurso"}).json()
+        self.assertEqual(set(data), {"idperfil", "nombres", "cursos"})
+        self.assertEqual(set(data["cursos"][0]), {"id", "nombrecurso"})
+        self.assertEqual(self.get(params={"fields": "password"}).status_code, 400)
+        self.assertEqual(self.get(params={"include": "secreto"}).status_code, 400)
+
+    def test_etag_and_invalidation(self):
+        response = self.get(params={"include": "cursos"})
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get(params={"include": "cursos"}, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        # Otra representación, otra ETag
+        self.assertNotEqual(self.get(params={"include": ""})["ETag"], response["ETag"])
+        curso = Cursosrealizados.objects.filter(idperfilconqueestaactivo=self.perfil, activarparaqueseveaenfront=True).first()
+        curso.nombrecurso = "Renombrado"
+        curso.save()
+        nuevo = self.get(params={"include": "cursos"}, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(nuevo.status_code, 200)
+        self.assertIn("Renombrado", [c["nombrecurso"] for c in nuevo.json()["cursos"]])
+
+    def test_inactive_or_missing(self):
+        Datospersonales.objects.filter(pk=self.perfil.pk).update(activarparaqueseveaenfront=False)
+        self.assertEqual(self.get().status_code, 404)
+
+    def test_list_cursor_pagination(self):
+        otros = [crear_perfil(filas=1) for _ in range(4)]
+        url, ids = reverse("cv_api_profiles"), []
+        params = {"limit": 2, "include": "experiencias", "fields": "nombres"}
+        while url:
+            with self.assertNumQueries(2):
+                data = self.get(url, params).json()
+            ids += [p["idperfil"] for p in data["results"]]
+            self.assertTrue(all("experiencias" in p for p in data["results"]))
+            url, params = data["next"], None
+        self.assertEqual(ids, [self.perfil.pk] + [o.pk for o in otros])
+        self.assertEqual(self.get(reverse("cv_api_profiles"), {"cursor": "??"}).status_code, 400)
+
+    def test_list_rejects_invalid_limit(self):
+        for limit in ("-1", "0", "abc", ""):
+            response = self.get(reverse("cv_api_profiles"), {"limit": limit})
+            self.assertEqual(response.status_code, 400, limit)
+            self.assertEqual(response.json(), {"error": "limit debe ser un entero mayor que 0"})
+        self.assertEqual(len(api.lista(("idperfil",), {}, limit=-1)[0]), 1)
+
+
+# ============================================================
+# import_cv
+# ============================================================
+
+class ImportCvTests(TestCase):
+    def escribir(self, nombre, contenido):
+        d = tempfile.mkdtemp()
+        ruta = f"{d}/{nombre}"
+        with open(ruta, "w", encoding="utf-8") as f: f.write(contenido)
+        return ruta
+
+    def test_json_roundtrip_from_api(self):
+        cache.clear()
+        origen = crear_perfil()
+        data = self.client.get(reverse("cv_api_profile", args=[origen.pk]), HTTP_HOST="localhost", secure=True).json()
+        ruta = self.escribir("perfil.json", json.dumps([data, data]))
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("import_cv", ruta, stdout=io.StringIO())
+        nuevos = Datospersonales.objects.exclude(pk=origen.pk)
+        self.assertEqual(nuevos.count(), 2)
+        copia = profile_context(load_profile(nuevos.first().pk))
+        self.assertEqual([c.nombrecurso for c in copia["cursos"]], [c["nombrecurso"] for c in data["cursos"]])
+        self.assertEqual(busqueda.buscar("Entregable")[0][0].pk in {p.pk for p in nuevos} | {origen.pk}, True)
+
+    def test_csv_reports_row_errors_and_writes_nothing(self):
+        futuro = (date.today() + timedelta(days=10)).isoformat()
+        ruta = self.escribir("cv.csv", "\n".join([
+            "seccion,nombres,numerocedula,nombrecurso,fechainicio,fechafin,totalhoras",
+            "perfil,Ana,0102030405,,,,",
+            "cursos,,,Django,2020-01-01,2020-02-01,40",
+            "cursos,,,Futuro,2020-01-01," + futuro + ",40",
+            "cursos,,,Negativo,2020-03-01,2020-01-01,-5",
+            "perfil,Mal,12ab,,,,",
+            "cursos,,,Huérfano,,,",
+        ]))
+        err = io.StringIO()
+        with self.assertRaises(CommandError):
+            call_command("import_cv", ruta, stdout=io.StringIO(), stderr=err)
+        errores = err.getvalue()
+        self.assertIn("cv.csv:4", errores)
+        self.assertIn("cv.csv:5", errores)
+        self.assertIn("totalhoras", errores)
+        self.assertIn("cv.csv:6", errores)
+        self.assertEqual(Datospersonales.objects.count(), 0)
+
+        call_command("import_cv", ruta, "--skip-invalid", stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(list(Datospersonales.objects.values_list("nombres", flat=True)), ["Ana"])
+        self.assertEqual(list(Cursosrealizados.objects.values_list("nombrecurso", flat=True)), ["Django"])
+
+    def test_sections_into_existing_profile_one_fk_lookup(self):
+        perfil = Datospersonales.objects.create(nombres="Ana")
+        version = Datospersonales.objects.get(pk=perfil.pk).version
+        filas = "\n".join(["seccion,nombrecurso,fechainicio"] + [f"cursos,Curso {i},2020-01-01" for i in range(40)])
+        ruta = self.escribir("cursos.csv", filas)
+        # FK + SAVEPOINT + INSERT + versión + RELEASE (sin consultas por fila)
+        with self.assertNumQueries(5):
+            call_command("import_cv", ruta, "--perfil", str(perfil.pk), stdout=io.StringIO())
+        self.assertEqual(perfil.cursos.count(), 40)
+        self.assertEqual(Datospersonales.objects.get(pk=perfil.pk).version, version + 1)
+
+
+# ============================================================
+# Miniaturas locales (certificados fuera de Cloudinary)
+# ============================================================
+
+def _imagen(formato, size=(2400, 1600)):
+    out = io.BytesIO()
+    Image.new("RGB", size, "navy").save(out, format=formato)
+    return out.getvalue()
+
+
+@override_settings(
+    STORAGES={"default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+              "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}},
+)
+class MiniaturaTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        ajustes = override_settings(MEDIA_ROOT=self.media, CV_THUMB_CACHE_DIR=self.cache_dir)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def subir(self, nombre, data):
+        with open(f"{self.media}/{nombre}", "wb") as f: f.write(data)
+        return f"/media/{nombre}"
+
+    def test_generar_downscales_images_and_pdf_first_page(self):
+        jpeg = miniaturas.generar(_imagen("JPEG"))
+        self.assertEqual(Image.open(io.BytesIO(jpeg)).size, (600, 400))
+        # PDF escaneado: la imagen incrustada de la primera página
+        pdf = miniaturas.generar(_imagen("PDF", (1200, 1800)))
+        self.assertEqual(Image.open(io.BytesIO(pdf)).width, 600)
+        self.assertIsNone(miniaturas.generar(b"%PDF-1.4 roto"))
+        self.assertIsNone(miniaturas.generar(b"no es una imagen"))
+
+    def test_thumbnail_view_generates_once_with_immutable_headers(self):
+        original = _imagen("PNG")
+        url = self.subir("cert.png", original)
+        thumb = miniaturas.url_miniatura(url)
+        response = self.client.get(thumb, HTTP_HOST="localhost", secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertIn("immutable", response["Cache-Control"])
+        cuerpo = b"".join(response.streaming_content)
+        self.assertLess(len(cuerpo), len(original))
+
+        # Ya generada: se sirve desde disco aunque el origen desaparezca
+        with open(f"{self.media}/cert.png", "wb") as f: f.write(b"")
+        response = self.client.get(thumb, HTTP_HOST="localhost", secure=True)
+        self.assertEqual(b"".join(response.streaming_content), cuerpo)
+        response = self.client.get(thumb, HTTP_HOST="localhost", secure=True, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_thumbnail_view_rejects_unsigned_and_falls_back(self):
+        url = self.subir("texto.pdf", b"%PDF-1.4 sin imagenes")
+        response = self.client.get(reverse("cv_thumb", args=["0" * 32]) + "?u=" + url, HTTP_HOST="localhost", secure=True)
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(miniaturas.url_miniatura(url), HTTP_HOST="localhost", secure=True)
+        self.assertRedirects(response, "/static/img/documento.svg", fetch_redirect_response=False)
+
+    @override_settings(CV_THUMB_FETCH_TIMEOUT=0.3)
+    def test_failed_origin_is_remembered(self):
+        cache.clear()
+        with benchmarks.AttachmentServer(latency=2.0) as server, \
+                override_settings(CV_ATTACHMENT_CACHE_DIR=tempfile.mkdtemp()):
+            thumb = miniaturas.url_miniatura(server.url("caido", 1000))
+            inicio = time.monotonic()
+            with self.assertLogs("cv.views", "WARNING"):
+                response = self.client.get(thumb, HTTP_HOST="localhost", secure=True)
+            self.assertLess(time.monotonic() - inicio, 1.5)
+            self.assertRedirects(response, "/static/img/documento.svg", fetch_redirect_response=False)
+            # Fallo recordado: respaldo inmediato, sin otra descarga
+            response = self.client.get(thumb, HTTP_HOST="localhost", secure=True)
+            self.assertRedirects(response, "/static/img/documento.svg", fetch_redirect_response=False)
+            self.assertEqual(server.requests, 1)
+
+    def test_cv_thumbnails_command_rewrites_old_rows(self):
+        perfil = Datospersonales.objects.create(nombres="Ana")
+        url = self.subir("viejo.jpg", _imagen("JPEG"))
+        Cursosrealizados.objects.bulk_create([Cursosrealizados(idperfilconqueestaactivo=perfil, final_url=url, thumbnail=url, rutacertificado=url)])
+        call_command("cv_thumbnails", "--warm", stdout=io.StringIO())
+        curso = Cursosrealizados.objects.get()
+        self.assertEqual(curso.thumbnail, miniaturas.url_miniatura(url))
+        self.assertEqual(Datospersonales.objects.get(pk=perfil.pk).version, 2)
+        cache_miniaturas = miniaturas.MiniaturaCache()
+        meta, f = cache_miniaturas.open(cache_miniaturas.key(url))
+        f.close()
+        self.assertGreater(meta["size"], 0)
+
+    def test_responsive_variants_and_proxy(self):
+        foto = "https://res.cloudinary.com/demo/image/upload/v1/perfil/ana.jpg"
+        self.assertEqual(miniaturas.url_variante(foto, 320, "webp"), "https://res.cloudinary.com/demo/image/upload/w_320,c_limit,q_auto,f_webp/v1/perfil/ana.jpg")
+
+        url = self.subir("foto.png", _imagen("PNG"))
+        variante = miniaturas.url_variante(url, 320, "webp")
+        response = self.client.get(variante, HTTP_HOST="localhost", secure=True)
+        self.assertEqual(response["Content-Type"], "image/webp")
+        self.assertEqual(Image.open(io.BytesIO(b"".join(response.streaming_content))).width, 320)
+        # Anchos fuera de la lista no se generan (el proxy no reescala a cualquier tamaño)
+        response = self.client.get(variante.replace("/320.webp", "/321.webp"), HTTP_HOST="localhost", secure=True)
+        self.assertEqual(response.status_code, 404)
+
+        # WeasyPrint lee la variante en el proceso; una firma alterada no se resuelve
+        self.assertEqual(miniaturas.resolver_local("https://localhost" + variante), (url, 320, "webp"))
+        self.assertIsNone(miniaturas.resolver_local(variante.replace("u=%2Fmedia", "u=%2Fotro")))
+
+    def test_templates_use_srcset_and_print_variant(self):
+        foto = "https://example.com/ana.jpg"
+        perfil = Datospersonales.objects.create(nombres="Ana", foto_perfil_url=foto)
+        response = self.client.get(reverse("cv_detail", args=[perfil.pk]), HTTP_HOST="localhost", secure=True)
+        self.assertContains(response, '<source type="image/webp" srcset="/cv/img/')
+        self.assertContains(response, 'sizes="140px"')
+        self.assertNotContains(response, f'src="{foto}"')
+        cabecera = render_to_string("cv_print/cabecera.html", {"perfil": perfil})
+        self.assertIn(f"/{settings.CV_IMG_PRINT_WIDTH}.jpg?u=", cabecera)
+
+
+# ============================================================
+# Normalización de certificados a PDF (certificados.py)
+# ============================================================
+
+class CertificadoNormalizacionTests(TestCase):
+    def imagen(self, formato, modo="RGB", tamano=(1200, 800)):
+        buf = io.BytesIO()
+        Image.new(modo, tamano, "red").save(buf, format=formato)
+        buf.seek(0)
+        return buf
+
+    def pdf(self, paginas=2, clave=None):
+        writer = PdfWriter()
+        for _ in range(paginas): writer.add_blank_page(width=595, height=842)
+        if clave: writer.encrypt(clave)
+        buf = io.BytesIO()
+        writer.write(buf)
+        return buf.getvalue()
+
+    def normalizar(self, archivo):
+        pdf, paginas = normalizar_certificado(archivo)
+        with pdf:
+            self.assertEqual(PdfReader(pdf).get_num_pages(), paginas)
+        return paginas
+
+    def test_images_become_one_page_pdf(self):
+        self.assertEqual(self.normalizar(self.imagen("JPEG")), 1)
+        self.assertEqual(self.normalizar(self.imagen("PNG", "RGBA", (600, 900))), 1)
+
+    def test_broken_pdf_is_repaired(self):
+        data = self.pdf(paginas=2)
+        # startxref apuntando a otro sitio: pypdf reconstruye la tabla xref
+        roto = data[:data.rindex(b"startxref")] + b"startxref\n999999\n%%EOF\n"
+        with self.assertLogs("pypdf", "WARNING"):
+            self.assertEqual(self.normalizar(io.BytesIO(roto)), 2)
+
+    def test_encrypted_pdf_is_rejected(self):
+        with self.assertRaisesMessage(ValidationError, "protegido con contraseña"):
+            normalizar_certificado(io.BytesIO(self.pdf(clave="secreta")))
+
+    def test_decompression_bomb_is_a_form_error(self):
+        curso = Cursosrealizados(nombrecurso="Curso", archivo_digital=ContentFile(self.imagen("PNG").getvalue(), name="c.png"))
+        with mock.patch.object(Image, "MAX_IMAGE_PIXELS", 1000), self.assertRaises(ValidationError) as error:
+            curso.full_clean()
+        self.assertIn("demasiados píxeles", error.exception.message_dict["archivo_digital"][0])
+
+
+# ============================================================
+# Almacenamiento por contenido (storage.py)
+# ============================================================
+
+@override_settings(STORAGES=STORAGES_TEST)
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        ajustes = override_settings(MEDIA_ROOT=self.media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.perfil = Datospersonales.objects.create(nombres="Ana")
+
+    def subir(self, data, nombre="cert.png"):
+        curso = Cursosrealizados(idperfilconqueestaactivo=self.perfil, nombrecurso="Curso", archivo_digital=ContentFile(data, name=nombre))
+        with self.captureOnCommitCallbacks(execute=True):
+            curso.save()
+        return curso
+
+    def test_duplicate_upload_reuses_blob(self):
+        data = _imagen("PNG", (50, 50))
+        a, b = self.subir(data), self.subir(data, "otro nombre.PNG")
+        self.assertEqual(a.archivo_digital.name, b.archivo_digital.name)
+        self.assertRegex(a.archivo_digital.name, r"^certificados/cursos/[0-9a-f]{64}\.png$")
+        self.assertEqual(os.listdir(f"{self.media}/certificados/cursos"), [os.path.basename(a.archivo_digital.name)])
+        self.assertEqual(Blob.objects.get(nombre=a.archivo_digital.name).referencias, 2)
+
+    def test_references_and_gc(self):
+        a, b = self.subir(_imagen("PNG", (50, 50))), self.subir(_imagen("PNG", (60, 60)))
+        nombre_a = a.archivo_digital.name
+        with self.captureOnCommitCallbacks(execute=True):
+            a.delete()
+            b.archivo_digital = None
+            b.save()
+        self.assertEqual(Blob.objects.get(nombre=nombre_a).referencias, 0)
+
+        call_command("cv_storage_gc", "--grace-hours", "0", stdout=io.StringIO())
+        self.assertFalse(Blob.objects.filter(referencias=0).exists())
+        self.assertFalse(os.path.exists(f"{self.media}/{nombre_a}"))
+
+    def test_recount_restores_counts_from_rows(self):
+        curso = self.subir(_imagen("PNG", (50, 50)))
+        Blob.objects.update(referencias=0)
+        call_command("cv_storage_gc", "--recount", "--grace-hours", "0", stdout=io.StringIO())
+        self.assertEqual(Blob.objects.get(nombre=curso.archivo_digital.name).referencias, 1)
+        self.assertTrue(os.path.exists(f"{self.media}/{curso.archivo_digital.name}"))
+
+
+# ============================================================
+# Subidas por partes del admin (subidas.py)
+# ============================================================
+
+@override_settings(STORAGES=STORAGES_TEST, CV_UPLOAD_CHUNK_BYTES=4096)
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        ajustes = override_settings(MEDIA_ROOT=tempfile.mkdtemp(), CV_UPLOAD_DIR=tempfile.mkdtemp())
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.force_login(self.admin)
+        out = io.BytesIO()
+        Image.effect_noise((120, 80), 80).convert("RGB").save(out, format="PNG")
+        self.data = out.getvalue()
+
+    def crear(self):
+        response = self.client.post(reverse("cv_upload"), {"campo": "cursos", "nombre": "scan.png", "tamano": len(self.data)},
+                                    content_type="application/json", HTTP_HOST="localhost", secure=True)
+        self.assertEqual(response.status_code, 201)
+        return response.json()["token"]
+
+    def put(self, token, offset, parte, sha=None):
+        return self.client.put(f"{reverse('cv_upload_chunk', args=[token])}?offset={offset}", parte,
+                               content_type="application/octet-stream", HTTP_HOST="localhost", secure=True,
+                               HTTP_X_CHUNK_SHA256=sha or hashlib.sha256(parte).hexdigest())
+
+    def subir(self):
+        token = self.crear()
+        for offset in range(0, len(self.data), 4096):
+            self.assertEqual(self.put(token, offset, self.data[offset:offset + 4096]).status_code, 200)
+        response = self.client.post(reverse("cv_upload_complete", args=[token]), HTTP_HOST="localhost", secure=True)
+        self.assertEqual(response.status_code, 200)
+        return token, response.json()
+
+    def test_chunks_resume_and_assemble(self):
+        token = self.crear()
+        self.assertEqual(self.put(token, 0, self.data[:4096]).status_code, 200)
+        # Parte repetida o fuera de orden: 409 con lo que ya tiene el servidor
+        response = self.put(token, 0, self.data[:4096])
+        self.assertEqual((response.status_code, response.json()["recibidos"]), (409, 4096))
+        self.assertEqual(self.put(token, 4096, self.data[4096:8192], sha="0" * 64).status_code, 400)
+        estado = self.client.get(reverse("cv_upload_chunk", args=[token]), HTTP_HOST="localhost", secure=True).json()
+        self.assertEqual(estado["recibidos"], 4096)
+
+        for offset in range(4096, len(self.data), 4096):
+            self.put(token, offset, self.data[offset:offset + 4096])
+        response = self.client.post(reverse("cv_upload_complete", args=[token]), HTTP_HOST="localhost", secure=True)
+        subida = Subida.objects.get(pk=token)
+        self.assertEqual(response.json()["archivo"], subida.archivo)
+        self.assertEqual(subida.archivo, f"certificados/cursos/{hashlib.sha256(self.data).hexdigest()}.png")
+        self.assertEqual(subida.archivo_pdf_paginas, 1)
+        self.assertEqual(os.listdir(settings.CV_UPLOAD_DIR), [])
+
+    @override_settings(CV_ATTACHMENT_MAX_BYTES=1024)
+    def test_rejects_upload_larger_than_attachment_cap(self):
+        response = self.client.post(reverse("cv_upload"), {"campo": "cursos", "nombre": "scan.png", "tamano": 2048},
+                                    content_type="application/json", HTTP_HOST="localhost", secure=True)
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(Subida.objects.exists())
+
+    def test_normalization_never_reads_whole_file(self):
+        class PorBloques(io.BytesIO):
+            def read(self, size=-1):
+                if size is None or size < 0: raise AssertionError("lectura completa del archivo subido")
+                return super().read(size)
+
+        pdf_origen = benchmarks.pdf_de_tamano(64 * 1024)
+        for data in (self.data, pdf_origen):
+            pdf, paginas = normalizar_certificado(PorBloques(data))
+            with pdf:
+                self.assertEqual(paginas, 1)
+                self.assertEqual(pdf.read(5), b"%PDF-")
+
+    def test_admin_save_references_stored_object(self):
+        token, _ = self.subir()
+        perfil = Datospersonales.objects.create(nombres="Ana")
+        form = self.client.get(reverse("admin:cv_cursosrealizados_add"), HTTP_HOST="localhost", secure=True)
+        self.assertContains(form, 'data-subida-url="/cv/uploads/"')
+        self.assertContains(form, "js/subida_por_partes.js")
+        response = self.client.post(reverse("admin:cv_cursosrealizados_add"), {
+            "nombrecurso": "Curso", "idperfilconqueestaactivo": perfil.pk, "activarparaqueseveaenfront": "on",
+            "archivo_digital_subida": token,
+        }, HTTP_HOST="localhost", secure=True)
+        self.assertEqual(response.status_code, 302)
+        curso = Cursosrealizados.objects.get()
+        self.assertEqual(curso.archivo_digital.name, f"certificados/cursos/{hashlib.sha256(self.data).hexdigest()}.png")
+        self.assertTrue(curso.archivo_pdf_url and curso.is_pdf is False)
+        self.assertFalse(Subida.objects.exists())
+        self.assertEqual(Blob.objects.get(nombre=curso.archivo_digital.name).referencias, 1)
+
+    def test_staff_only(self):
+        self.client.logout()
+        response = self.client.post(reverse("cv_upload"), {}, content_type="application/json", HTTP_HOST="localhost", secure=True)
+        self.assertEqual(response.status_code, 302)
+
+
+# ============================================================
+# Estáticos locales, CSS crítico incrustado
+# ============================================================
+
+@override_settings(STORAGES=STORAGES_TEST)
+class StaticAssetsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def pagina(self, vendor_dir):
+        perfil = crear_perfil(filas=1)
+        with mock.patch("cv.vendor.VENDOR_DIR", Path(vendor_dir)):
+            return self.client.get(reverse("cv_detail", args=[perfil.pk]), HTTP_HOST="localhost", secure=True).content.decode()
+
+    def test_vendored_assets_are_served_locally(self):
+        directorio = tempfile.mkdtemp()
+        for destino in vendor.CDN:
+            os.makedirs(os.path.dirname(os.path.join(directorio, destino)), exist_ok=True)
+            open(os.path.join(directorio, destino), "wb").close()
+        html = self.pagina(directorio)
+        self.assertNotIn("cdn.jsdelivr.net", html)
+        self.assertNotIn("fonts.googleapis.com", html)
+        self.assertNotIn("integrity=", html)
+        # Hero incrustado; el resto del CSS como estático cacheable
+        self.assertIn(".pf-hero{", html)
+        self.assertNotIn(".pf-shell{", html)
+        self.assertIn("/static/css/perfil.css", html)
+        self.assertIn("/static/vendor/bootstrap/bootstrap.min.css", html)
+        self.assertIn("/static/vendor/fonts/syne-latin-800-normal.woff2", html)
+
+    def test_missing_vendor_files_fall_back_to_cdn(self):
+        html = self.pagina(tempfile.mkdtemp())
+        self.assertNotIn("/static/vendor/", html)
+        url, sri = vendor.CDN["bootstrap/bootstrap.min.css"]
+        self.assertIn(f'href="{url}" rel="stylesheet" integrity="{sri}" crossorigin="anonymous"', html)
+        self.assertIn(vendor.CDN["fonts/inter-latin-300-normal.woff2"][0], html)
+
+    def test_collectstatic_and_manifest_pages(self):
+        # Lo que hace el CMD del contenedor: collectstatic con el storage real y
+        # páginas servidas desde el manifest, con los archivos vendor que haya
+        configurados = importlib.import_module(os.environ["DJANGO_SETTINGS_MODULE"]).STORAGES
+        storages = {**STORAGES_TEST, "staticfiles": configurados["staticfiles"]}
+        with override_settings(STATIC_ROOT=tempfile.mkdtemp(), STORAGES=storages):
+            call_command("collectstatic", interactive=False, verbosity=0)
+            perfil = crear_perfil(filas=1)
+            response = self.client.get(reverse("cv_detail", args=[perfil.pk]), HTTP_HOST="localhost", secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response.content.decode(), r"/static/css/perfil\.[0-9a-f]{12}\.css")
+
+    def test_vendor_integrity_and_source_maps(self):
+        data = b"body{color:red}\n/*# sourceMappingURL=bootstrap.min.css.map */"
+        sri = "sha384-" + base64.b64encode(hashlib.sha384(data).digest()).decode()
+        self.assertTrue(vendor.verificar(data, sri))
+        self.assertFalse(vendor.verificar(data + b" ", sri))
+        self.assertTrue(vendor.verificar(data, None))
+        self.assertEqual(vendor.sin_source_map("bootstrap/x.css", data), b"body{color:red}\n")
+        self.assertEqual(vendor.sin_source_map("fonts/x.woff2", data), data)
+
+
+# ============================================================
+# Tiempos por etapa y métricas (timing.py)
+# ============================================================
+
+@override_settings(STORAGES=STORAGES_TEST)
+class TimingTests(TestCase):
+    def setUp(self):
+        self.perfil = Datospersonales.objects.create(nombres="Ana", apellidos="Prueba")
+
+    def get(self, url):
+        return self.client.get(url, HTTP_HOST="localhost", secure=True)
+
+    def test_server_timing_header_and_log_line(self):
+        with self.assertLogs("cv.timing", "INFO") as logs:
+            response = self.get(reverse("cv_detail", args=[self.perfil.pk]))
+        self.assertRegex(response["Server-Timing"], r"^\w+;dur=\d+\.\d(, \w+;dur=\d+\.\d)*$")
+        etapas = dict(e.split(";dur=") for e in response["Server-Timing"].split(", "))
+        self.assertIn("queries", etapas)
+        self.assertIn("total", etapas)
+
+        [linea] = logs.output
+        prefijo, _, cuerpo = linea.partition("cv_timing ")
+        self.assertEqual(prefijo, "INFO:cv.timing:")
+        datos = json.loads(cuerpo)
+        self.assertEqual((datos["view"], datos["path"], datos["status"]), ("perfil_detail", f"/cv/{self.perfil.pk}/", 200))
+        self.assertEqual(set(datos["stages_ms"]), set(etapas))
+
+    def test_metrics_are_staff_only_prometheus_text(self):
+        url = reverse("cv_metrics")
+        self.assertEqual(self.get(url).status_code, 302)
+        self.client.force_login(User.objects.create_user("visitante"))
+        self.assertEqual(self.get(url).status_code, 302)
+
+        with self.assertLogs("cv.timing", "INFO"):
+            self.get(reverse("cv_detail", args=[self.perfil.pk]))
+        self.client.force_login(User.objects.create_user("staff", is_staff=True))
+        response = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+
+        # Formato de exposición: comentarios HELP/TYPE y "nombre{etiquetas} valor"
+        series = {}
+        for linea in response.content.decode().splitlines():
+            if linea.startswith("#"):
+                self.assertRegex(linea, r"^# (HELP|TYPE) cv_stage_duration_seconds ")
+                continue
+            m = re.fullmatch(r'(cv_stage_duration_seconds_(?:bucket|sum|count))\{((?:\w+="[^"]*",?)+)\} (\S+)', linea)
+            self.assertIsNotNone(m, linea)
+            etiquetas = dict(re.findall(r'(\w+)="([^"]*)"', m[2]))
+            clave = (etiquetas.pop("view"), etiquetas.pop("stage"))
+            series.setdefault(clave, []).append((m[1], etiquetas.get("le"), float(m[3])))
+
+        total = series[("perfil_detail", "total")]
+        cubetas = [v for nombre, _, v in total if nombre.endswith("_bucket")]
+        self.assertEqual(cubetas, sorted(cubetas))
+        self.assertEqual([le for _, le, _ in total][len(cubetas) - 1], "+Inf")
+        self.assertEqual(cubetas[-1], next(v for nombre, _, v in total if nombre.endswith("_count")))
+
+
+# ============================================================
+# Cola de PDFs (jobs.py)
+# ============================================================
+
+@override_settings(STORAGES=STORAGES_TEST, CV_PDF_JOB_MAX_INTENTOS=2, CV_PDF_JOB_TIMEOUT=60)
+class PdfJobTests(TestCase):
+    def setUp(self):
+        ajustes = override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.perfil = crear_perfil(filas=1)
+
+    def abandonar(self, trabajo):
+        Trabajopdf.objects.filter(pk=trabajo.pk).update(tomado=timezone.now() - timedelta(minutes=5))
+
+    def test_claim_is_exclusive_and_enqueue_reuses(self):
+        trabajo = jobs.enqueue(self.perfil, {"cursos"}, "https://localhost/")
+        self.assertEqual(jobs.enqueue(self.perfil, {"cursos"}, "https://localhost/"), trabajo)
+        tomado = jobs.claim_next()
+        self.assertEqual((tomado.pk, tomado.estado, tomado.intentos), (trabajo.pk, Trabajopdf.PROCESANDO, 1))
+        self.assertIsNone(jobs.claim_next())
+
+    def test_failure_retries_then_errors(self):
+        trabajo = jobs.enqueue(self.perfil, set(), "https://localhost/")
+        with mock.patch("cv.jobs.generate_cv_pdf", side_effect=RuntimeError("sin weasyprint")), self.assertLogs("cv.jobs", "ERROR"):
+            self.assertFalse(jobs.run(jobs.claim_next()))
+            trabajo.refresh_from_db()
+            self.assertEqual((trabajo.estado, trabajo.intentos), (Trabajopdf.PENDIENTE, 1))
+            self.assertFalse(jobs.run(jobs.claim_next()))
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, Trabajopdf.ERROR)
+        self.assertEqual(trabajo.error, "sin weasyprint")
+
+    def test_abandoned_job_is_retried_then_expires(self):
+        trabajo = jobs.enqueue(self.perfil, set(), "https://localhost/")
+        jobs.claim_next()
+        self.abandonar(trabajo)
+        # Con intentos disponibles otro worker lo retoma
+        self.assertEqual(jobs.claim_next().pk, trabajo.pk)
+        self.abandonar(trabajo)
+        # Último intento abandonado: error, y un nuevo pedido crea otro trabajo
+        self.assertIsNone(jobs.claim_next())
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, Trabajopdf.ERROR)
+        self.assertNotEqual(jobs.enqueue(self.perfil, set(), "https://localhost/").pk, trabajo.pk)
+
+    def test_job_endpoint(self):
+        trabajo = jobs.enqueue(self.perfil, set(), "https://localhost/")
+        url = reverse("cv_print_job", args=[trabajo.token])
+        self.assertEqual(self.client.get(url, HTTP_HOST="localhost", secure=True).json()["estado"], Trabajopdf.PENDIENTE)
+
+        with mock.patch("cv.jobs.generate_cv_pdf", return_value=(io.BytesIO(b"%PDF-1.4 prueba"), '"e"', [])):
+            self.assertTrue(jobs.run(jobs.claim_next()))
+        data = self.client.get(url, HTTP_HOST="localhost", secure=True).json()
+        self.assertEqual(data["estado"], Trabajopdf.LISTO)
+        response = self.client.get(data["download"], HTTP_HOST="localhost", secure=True)
+        self.assertEqual(response.status_code, 302)
+
+    def test_job_endpoint_expires_abandoned_job(self):
+        trabajo = jobs.enqueue(self.perfil, set(), "https://localhost/")
+        Trabajopdf.objects.filter(pk=trabajo.pk).update(estado=Trabajopdf.PROCESANDO, intentos=2)
+        self.abandonar(trabajo)
+        data = self.client.get(reverse("cv_print_job", args=[trabajo.token]), HTTP_HOST="localhost", secure=True).json()
+        self.assertEqual(data["estado"], Trabajopdf.ERROR)
+        self.assertIn("error", data)
+
+
+# ============================================================
+# Motor de render (render.py)
+# ============================================================
+# WeasyPrint se sustituye por módulos falsos: se comprueba qué se parsea y se
+# reutiliza, no la maquetación.
+
+class RenderEngineTests(TestCase):
+    def setUp(self):
+        self.hojas, self.documentos = [], []
+        hojas, documentos = self.hojas, self.documentos
+
+        class CSS:
+            def __init__(self, filename, font_config):
+                hojas.append(filename)
+
+        class HTML:
+            def __init__(self, string, base_url, url_fetcher):
+                self.string = string
+
+            def write_pdf(self, target, stylesheets, font_config):
+                documentos.append((self.string, stylesheets, font_config))
+
+        fonts = mock.Mock(FontConfiguration=object)
+        weasyprint = mock.Mock(CSS=CSS, HTML=HTML)
+        parche = mock.patch.dict(sys.modules, {"weasyprint": weasyprint, "weasyprint.text": mock.Mock(fonts=fonts), "weasyprint.text.fonts": fonts})
+        parche.start()
+        self.addCleanup(parche.stop)
+        vars(render._local).pop("engine", None)
+        self.addCleanup(vars(render._local).pop, "engine", None)
+
+    def test_stylesheets_parsed_once_per_thread(self):
+        for i in range(3):
+            render.get_engine().write_pdf(f"<p>{i}</p>", None, io.BytesIO())
+        self.assertEqual(self.hojas, [str(render.PRINT_CSS)])
+        self.assertEqual(len(self.documentos), 3)
+        # Mismos objetos CSS y FontConfiguration en todos los renders
+        self.assertEqual(len({(id(d[1]), id(d[2])) for d in self.documentos}), 1)
+
+        # Otro hilo tiene su propio motor
+        hilo = threading.Thread(target=render.get_engine)
+        hilo.start()
+        hilo.join()
+        self.assertEqual(self.hojas, [str(render.PRINT_CSS)] * 2)
+
+    def test_extra_css_is_applied(self):
+        with override_settings(CV_PRINT_EXTRA_CSS=["/srv/marca.css"]):
+            render.get_engine().write_pdf("<p>CV</p>", None, io.BytesIO())
+        self.assertEqual(self.hojas, [str(render.PRINT_CSS), "/srv/marca.css"])
+        self.assertEqual(len(self.documentos[0][1]), 2)
+
+    def test_warm_up_builds_engine_without_rendering(self):
+        render.warm_up()
+        self.assertEqual(self.hojas, [str(render.PRINT_CSS)])
+        self.assertEqual(self.documentos, [])
+        motor = render._local.engine
+        render.get_engine().write_pdf("<p>CV</p>", None, io.BytesIO())
+        self.assertIs(render.get_engine(), motor)
+        self.assertEqual(len(self.hojas), 1)
+
+
+# ============================================================
+# Impresión del CV (pdf.py) con anexos de un servidor local
+# ============================================================
+
+class MotorFalso:
+    """Sustituye a WeasyPrint en los tests: una página en blanco por fragmento,
+    de alto distinto según el HTML (otro contenido => otro PDF)."""
+
+    def __init__(self):
+        self.renders = 0
+        self.html = []
+
+    def write_pdf(self, html_string, base_url, target):
+        self.renders += 1
+        self.html.append(html_string)
+        writer = PdfWriter()
+        writer.add_blank_page(width=595, height=400 + int(hashlib.sha256(html_string.encode()).hexdigest()[:4], 16) % 400)
+        writer.write(target)
+
+
+class ImpresionTestCase(TestCase):
+    """Cachés de impresión en directorios temporales y el motor de render sustituido."""
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        ajustes = override_settings(
+            CV_PDF_CACHE_DIR=f"{directorio}/pdf", CV_PDF_FRAGMENT_CACHE_DIR=f"{directorio}/fragmentos",
+            CV_ATTACHMENT_CACHE_DIR=f"{directorio}/anexos",
+        )
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.motor = MotorFalso()
+        parche = mock.patch("cv.pdf.get_engine", return_value=self.motor)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def imprimir(self, perfil, secciones=SECCIONES_MODAL):
+        archivo, etag, omitidos = generate_cv_pdf(perfil, set(secciones), "https://localhost/")
+        with archivo:
+            return PdfReader(archivo).get_num_pages(), etag, omitidos
+
+
+class WarmPrintTests(ImpresionTestCase):
+    def test_warm_print_reads_cached_pdfs_without_pypdf_warnings(self):
+        with benchmarks.AttachmentServer() as server:
+            perfil = benchmarks.build_profile(server, experiencias=2, cursos=2, reconocimientos=1, garage=1,
+                                              attachments=4, attachment_size=4096)
+            paginas, _, omitidos = self.imprimir(perfil)
+            self.assertEqual(omitidos, [])
+            renders, servidos = self.motor.renders, server.requests
+
+            # Fragmentos y anexos salen de caché: pypdf los lee desde el byte 0
+            with self.assertNoLogs("pypdf", "WARNING"):
+                self.assertEqual(self.imprimir(perfil)[0], paginas)
+            self.assertEqual((self.motor.renders, server.requests), (renders, servidos))
+
+
+class PrintLayoutTests(ImpresionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.perfil = Datospersonales.objects.create(nombres="Ana", apellidos="Prueba", descripcionperfil="Desarrolladora")
+        Experiencialaboral(idperfilconqueestaactivo=self.perfil, cargodesempenado="Analista", nombrempresa="ESPOL").save()
+        self.curso = Cursosrealizados(idperfilconqueestaactivo=self.perfil, nombrecurso="Django")
+        self.curso.save()
+
+    def test_sections_flow_in_one_document_by_default(self):
+        paginas, _, _ = self.imprimir(self.perfil)
+        self.assertEqual((paginas, self.motor.renders), (1, 1))
+        html = self.motor.html[0]
+        main = html[html.index('<main class="main">'):html.index("</main>")]
+        self.assertIn("Experiencia laboral", main)
+        self.assertIn("Formación", main)
+
+    @override_settings(CV_PDF_FRAGMENTS=True)
+    def test_fragments_rerender_only_the_edited_section(self):
+        self.assertEqual(self.imprimir(self.perfil)[0], 3)
+        self.assertEqual(self.motor.renders, 3)
+
+        self.curso.nombrecurso = "Django avanzado"
+        self.curso.save()
+        self.assertEqual(self.imprimir(Datospersonales.objects.get(pk=self.perfil.pk))[0], 3)
+        self.assertEqual(self.motor.renders, 4)
+        self.assertIn("Django avanzado", self.motor.html[-1])
+        self.assertNotIn("Experiencia laboral", self.motor.html[-1])
+
+
+class AttachmentCacheTests(ImpresionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.server = benchmarks.AttachmentServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.perfil = benchmarks.build_profile(self.server, attachments=3, attachment_size=8192)
+
+    def test_repeat_print_downloads_nothing(self):
+        self.imprimir(self.perfil)
+        enviados = self.server.bytes_sent
+        self.assertGreater(enviados, 0)
+        self.assertEqual(self.imprimir(self.perfil)[2], [])
+        self.assertEqual(self.server.bytes_sent, enviados)
+
+    def test_stale_entries_revalidate_with_304(self):
+        self.imprimir(self.perfil)
+        peticiones, enviados = self.server.requests, self.server.bytes_sent
+        with override_settings(CV_ATTACHMENT_CACHE_TTL=0):
+            self.assertEqual(self.imprimir(self.perfil)[2], [])
+        # Una petición condicional por anexo, ningún cuerpo
+        self.assertEqual(self.server.requests, peticiones + 3)
+        self.assertEqual(self.server.bytes_sent, enviados)
+
+    def test_lru_eviction_under_max_bytes(self):
+        cache = AttachmentCache(max_bytes=250)
+        for i, url in enumerate(["a", "b", "c"]):
+            cache.set(url, bytes(100))
+            os.utime(cache._path(url), (1000 + i, 1000 + i))
+        # c desalojó a a (la más antigua); abrir b la marca como usada
+        self.assertIsNone(cache.open("a"))
+        cache.open("b")[1].close()
+        cache.set("d", bytes(100))
+        self.assertIsNone(cache.open("c"))
+        self.assertEqual(cache.stats()["entries"], 2)
+
+    def test_purge_command(self):
+        cache = AttachmentCache()
+        cache.set("x", b"contenido")
+        salida = io.StringIO()
+        call_command("cv_attachment_cache", "--purge", stdout=salida)
+        self.assertIn("1 entradas eliminadas", salida.getvalue())
+        self.assertEqual(os.listdir(settings.CV_ATTACHMENT_CACHE_DIR), [])
+
+
+class AttachmentDownloadTests(ImpresionTestCase):
+    # Tamaño (identifica el anexo en la concatenación) y retraso de cada sección:
+    # la primera en el orden del CV es la última en descargarse
+    ANEXOS = [(Cursosrealizados, 3000, 0.3), (Experiencialaboral, 5000, 0.2),
+              (Reconocimientos, 7000, 0.1), (Ventagarage, 9000, 0)]
+
+    def setUp(self):
+        super().setUp()
+        self.perfil = crear_perfil(filas=1)
+
+    def anexar(self, server, **extra):
+        for modelo, size, delay in self.ANEXOS:
+            url = f"{server.url(modelo.__name__.lower(), size)}&delay={delay}"
+            modelo.objects.filter(idperfilconqueestaactivo=self.perfil).update(archivo_pdf_url=url, **extra)
+
+    def get(self):
+        return self.client.get(reverse("cv_print", args=[self.perfil.pk]), HTTP_HOST="localhost", secure=True)
+
+    def test_merge_order_ignores_download_order(self):
+        tamanos, append = [], PdfWriter.append
+
+        def registrar(writer, archivo, *args, **kwargs):
+            archivo.seek(0, os.SEEK_END)
+            tamanos.append(archivo.tell())
+            archivo.seek(0)
+            return append(writer, archivo, *args, **kwargs)
+
+        with benchmarks.AttachmentServer() as server, mock.patch.object(PdfWriter, "append", autospec=True, side_effect=registrar):
+            self.anexar(server)
+            self.assertEqual(self.imprimir(self.perfil)[2], [])
+        # Los fragmentos (una página en blanco) van primero; luego cursos → experiencias → reconocimientos → garage
+        anexos = [t for t in tamanos if t > 2000]
+        self.assertEqual(len(anexos), 4)
+        self.assertEqual(anexos, sorted(anexos))
+
+    @override_settings(CV_ATTACHMENT_DEADLINE=0.3)
+    def test_deadline_skips_slow_attachments(self):
+        with benchmarks.AttachmentServer(latency=1.0) as server:
+            self.anexar(server)
+            inicio = time.monotonic()
+            with self.assertLogs("cv.attachments", "WARNING"):
+                response = self.get()
+            self.assertLess(time.monotonic() - inicio, 1.0)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response["X-CV-Skipped-Attachments"].split()), 4)
+        # Incompleto: no se guarda en caché ni lleva ETag
+        self.assertNotIn("ETag", response)
+
+    def test_failed_downloads_are_reported(self):
+        with benchmarks.AttachmentServer(failure_rate=1.0) as server:
+            self.anexar(server)
+            with self.assertLogs("cv.attachments", "WARNING"):
+                response = self.get()
+            paginas = len(PdfReader(io.BytesIO(b"".join(response.streaming_content))).pages)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response["X-CV-Skipped-Attachments"].split()), 4)
+        self.assertEqual(paginas, self.motor.renders)
+
+    @override_settings(CV_ATTACHMENT_PER_HOST=2)
+    def test_per_host_cap(self):
+        with benchmarks.AttachmentServer(latency=0.1) as server:
+            self.anexar(server)
+            self.assertEqual(self.imprimir(self.perfil)[2], [])
+        self.assertEqual(server.requests, 4)
+        self.assertEqual(server.max_concurrent, 2)
+
+
+class RespuestaFalsa:
+    """Respuesta de requests.get(stream=True) que cuenta los bytes que se llegan a leer."""
+
+    def __init__(self, cuerpo, declarado=None, trozo=1024):
+        self.status_code = 200
+        self.headers = {} if declarado is None else {"Content-Length": str(declarado)}
+        self.cuerpo, self.trozo, self.leidos = cuerpo, trozo, 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.cuerpo), self.trozo):
+            trozo = self.cuerpo[i:i + self.trozo]
+            self.leidos += len(trozo)
+            yield trozo
+
+
+@override_settings(STORAGES=STORAGES_TEST, CV_ATTACHMENT_WORKERS=1)
+class AttachmentLimitTests(ImpresionTestCase):
+    def descargar(self, respuestas):
+        with mock.patch("cv.attachments.requests.get", side_effect=lambda url, **kwargs: respuestas[url]):
+            batch = AttachmentBatch(respuestas, cache=False)
+            archivos = batch.results()
+            batch.close()
+        return archivos, batch.skipped
+
+    @override_settings(CV_ATTACHMENT_MAX_BYTES=4096)
+    def test_declared_length_over_cap_is_not_read(self):
+        respuesta = RespuestaFalsa(bytes(100), declarado=10_000)
+        with self.assertLogs("cv.attachments", "WARNING") as logs:
+            archivos, omitidos = self.descargar({"https://anexos.test/a.pdf": respuesta})
+        self.assertEqual((archivos, omitidos), ([None], ["https://anexos.test/a.pdf"]))
+        self.assertEqual(respuesta.leidos, 0)
+        self.assertIn("supera el tope de 4096", logs.output[0])
+
+    @override_settings(CV_ATTACHMENT_MAX_BYTES=4096)
+    def test_streamed_body_is_cut_at_cap(self):
+        # Sin Content-Length: se corta en el trozo que cruza el tope, no al final
+        respuesta = RespuestaFalsa(bytes(100_000))
+        with self.assertLogs("cv.attachments", "WARNING"):
+            archivos, omitidos = self.descargar({"https://anexos.test/a.pdf": respuesta})
+        self.assertEqual((archivos, omitidos), ([None], ["https://anexos.test/a.pdf"]))
+        self.assertEqual(respuesta.leidos, 5 * 1024)
+
+    def test_request_budget_skips_later_attachments(self):
+        perfil = crear_perfil(filas=1)
+        pdf = benchmarks.pdf_de_tamano(6000)
+        respuestas = {"https://anexos.test/curso.pdf": RespuestaFalsa(pdf, declarado=len(pdf)),
+                      "https://anexos.test/experiencia.pdf": RespuestaFalsa(pdf, declarado=len(pdf))}
+        Cursosrealizados.objects.filter(idperfilconqueestaactivo=perfil).update(archivo_pdf_url="https://anexos.test/curso.pdf")
+        Experiencialaboral.objects.filter(idperfilconqueestaactivo=perfil).update(archivo_pdf_url="https://anexos.test/experiencia.pdf")
+
+        with override_settings(CV_PRINT_MAX_BYTES=len(pdf) + 1000), \
+                mock.patch("cv.attachments.requests.get", side_effect=lambda url, **kwargs: respuestas[url]), \
+                self.assertLogs("cv.attachments", "WARNING") as logs:
+            response = self.client.get(reverse("cv_print", args=[perfil.pk]), HTTP_HOST="localhost", secure=True)
+            paginas = len(PdfReader(io.BytesIO(b"".join(response.streaming_content))).pages)
+        self.assertEqual(response.status_code, 200)
+        # Cursos va antes en el CV: entra entero y la experiencia ya no cabe
+        self.assertEqual(response["X-CV-Skipped-Attachments"], "https://anexos.test/experiencia.pdf")
+        self.assertIn("tope de", logs.output[0])
+        self.assertEqual(paginas, self.motor.renders + 1)
+        self.assertNotIn("ETag", response)
+
+
+# ============================================================
+# Versión de contenido del perfil (signals.py) y ETag del PDF
+# ============================================================
+
+@override_settings(STORAGES=STORAGES_TEST)
+class ProfileVersionTests(ImpresionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.perfil = crear_perfil(filas=1)
+
+    def version(self):
+        return Datospersonales.objects.values_list("version", flat=True).get(pk=self.perfil.pk)
+
+    def test_every_model_bumps_on_save_and_delete(self):
+        perfil = Datospersonales.objects.get(pk=self.perfil.pk)
+        antes = self.version()
+        perfil.nombres = "Beatriz"
+        perfil.save()
+        self.assertEqual(self.version(), antes + 1)
+        self.assertEqual(perfil.version, antes + 1)
+
+        for modelo in (Experiencialaboral, Cursosrealizados, Reconocimientos,
+                       Productosacademicos, Productoslaborales, Ventagarage):
+            with self.subTest(modelo=modelo.__name__):
+                fila = modelo.objects.filter(idperfilconqueestaactivo=self.perfil).first()
+                antes = self.version()
+                fila.save()
+                self.assertEqual(self.version(), antes + 1)
+                fila.delete()
+                self.assertEqual(self.version(), antes + 2)
+
+    def test_stale_profile_save_keeps_concurrent_bump(self):
+        # El admin carga el perfil; mientras tanto se edita una sección
+        perfil = Datospersonales.objects.get(pk=self.perfil.pk)
+        curso = Cursosrealizados.objects.filter(idperfilconqueestaactivo=self.perfil).first()
+        curso.nombrecurso = "Curso editado"
+        curso.save()
+        tras_seccion = self.version()
+        perfil.nombres = "Beatriz"
+        perfil.save()
+        # Ni se deshace el incremento ni se reutiliza un número de versión
+        self.assertEqual(self.version(), tras_seccion + 1)
+        self.assertEqual(Datospersonales.objects.get(pk=self.perfil.pk).nombres, "Beatriz")
+
+    def test_pdf_etag_and_304(self):
+        url = reverse("cv_print", args=[self.perfil.pk])
+        primera = self.client.get(url, HTTP_HOST="localhost", secure=True)
+        etag = primera["ETag"]
+        b"".join(primera.streaming_content)
+        response = self.client.get(url, HTTP_HOST="localhost", secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        renders = self.motor.renders
+
+        curso = Cursosrealizados.objects.filter(idperfilconqueestaactivo=self.perfil).first()
+        curso.nombrecurso = "Curso editado"
+        curso.save()
+        response = self.client.get(url, HTTP_HOST="localhost", secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        b"".join(response.streaming_content)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertGreater(self.motor.renders, renders)
+
+    def test_deploy_revision_misses_pdf_cache(self):
+        perfil = Datospersonales.objects.get(pk=self.perfil.pk)
+        self.imprimir(perfil)
+        archivo, _ = PdfCache().get_pdf(perfil, set(SECCIONES_MODAL))
+        archivo.close()
+        renders = self.motor.renders
+
+        # Otro despliegue (p. ej. cambia cv_print.css): ni el PDF ni los fragmentos sirven
+        with mock.patch("cv.revision.revision", return_value="otra"):
+            self.assertIsNone(PdfCache().get_pdf(perfil, set(SECCIONES_MODAL)))
+            self.imprimir(perfil)
+        self.assertGreater(self.motor.renders, renders)
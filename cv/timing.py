@@ -0,0 +1,92 @@
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# Tiempos por etapa (Server-Timing + log + histogramas Prometheus)
+# ============================================================
+# Cada vista decorada con @timed_view abre un registro de etapas; el código
+# del pipeline marca etapas con ``with span("nombre")``. Fuera de una vista
+# decorada (worker, comandos) span() no hace nada. El coste es un par de
+# perf_counter() y un append por etapa, así que se deja siempre activo.
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_current = ContextVar("cv_timing", default=None)
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+@contextmanager
+def span(nombre):
+    spans = _current.get()
+    if spans is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        # Una etapa que se repite (p. ej. un render por fragmento) se acumula
+        spans[nombre] = spans.get(nombre, 0.0) + time.perf_counter() - inicio
+
+
+def observe(vista, etapa, segundos):
+    with _histograms_lock:
+        h = _histograms.get((vista, etapa))
+        if h is None:
+            h = _histograms[(vista, etapa)] = {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0}
+        for i, limite in enumerate(BUCKETS):
+            if segundos <= limite: h["buckets"][i] += 1
+        h["sum"] += segundos
+        h["count"] += 1
+
+
+def timed_view(nombre):
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            spans = {}
+            token = _current.set(spans)
+            inicio = time.perf_counter()
+            try:
+                response = view(request, *args, **kwargs)
+            finally:
+                _current.reset(token)
+            total = time.perf_counter() - inicio
+            spans["total"] = total
+
+            response["Server-Timing"] = ", ".join(f"{n};dur={s * 1000:.1f}" for n, s in spans.items())
+            for etapa, segundos in spans.items():
+                observe(nombre, etapa, segundos)
+            logger.info("cv_timing %s", json.dumps({
+                "view": nombre, "path": request.path, "status": response.status_code,
+                "stages_ms": {n: round(s * 1000, 1) for n, s in spans.items()},
+            }))
+            return response
+        return wrapper
+    return decorator
+
+
+def prometheus_text():
+    lineas = [
+        "# HELP cv_stage_duration_seconds Duración de cada etapa de las vistas del CV (por proceso).",
+        "# TYPE cv_stage_duration_seconds histogram",
+    ]
+    with _histograms_lock:
+        datos = sorted((k, dict(v, buckets=list(v["buckets"]))) for k, v in _histograms.items())
+    for (vista, etapa), h in datos:
+        etiquetas = f'view="{vista}",stage="{etapa}"'
+        for limite, n in zip(BUCKETS, h["buckets"]):
+            lineas.append(f'cv_stage_duration_seconds_bucket{{{etiquetas},le="{limite}"}} {n}')
+        lineas.append(f'cv_stage_duration_seconds_bucket{{{etiquetas},le="+Inf"}} {h["count"]}')
+        lineas.append(f"cv_stage_duration_seconds_sum{{{etiquetas}}} {h['sum']:.6f}")
+        lineas.append(f"cv_stage_duration_seconds_count{{{etiquetas}}} {h['count']}")
+    return "\n".join(lineas) + "\n"
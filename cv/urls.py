@@ -8,10 +8,33 @@ urlpatterns = [
     
     path("sin-datos/", views.sin_datos, name="sin_datos"),
 
+    # Directorio público de perfiles activos
+    path("directory/", views.directory, name="cv_directory"),
+    path("search/", views.search, name="cv_search"),
+
+    # Catálogo de garage de todos los perfiles (HTML y JSON)
+    path("garage/", views.garage_catalog, name="cv_garage"),
+    path("api/garage/", views.garage_catalog_api, name="cv_garage_api"),
+
+    # API JSON de solo lectura
+    path("api/v1/profiles/", views.api_profiles, name="cv_api_profiles"),
+    path("api/v1/profiles/<int:idperfil>/", views.api_profile, name="cv_api_profile"),
+
     # Tus rutas originales (están perfectas, déjalas así)
     path("<int:idperfil>/", views.perfil_detail, name="cv_detail"),
     path("<int:idperfil>/print/", views.cv_print, name="cv_print"),
+    path("print/jobs/<uuid:token>/", views.cv_print_job, name="cv_print_job"),
+
+    # Subidas por partes del admin (solo staff)
+    path("uploads/", views.upload_create, name="cv_upload"),
+    path("uploads/<uuid:token>/", views.upload_chunk, name="cv_upload_chunk"),
+    path("uploads/<uuid:token>/complete/", views.upload_complete, name="cv_upload_complete"),
+
+    # Métricas Prometheus (solo staff)
+    path("metrics/", views.metrics, name="cv_metrics"),
 
     # Redirección de documentos
     path("doc/<str:model>/<int:pk>/", views.doc_redirect, name="cv_doc"),
+    path("thumb/<str:clave>.jpg", views.thumbnail, name="cv_thumb"),
+    path("img/<str:clave>/<int:ancho>.<str:formato>", views.imagen, name="cv_img"),
 ]
\ No newline at end of file
@@ -0,0 +1,76 @@
+import base64
+import hashlib
+import re
+from pathlib import Path
+
+
+# ============================================================
+# Dependencias front-end servidas desde nuestro propio static
+# ============================================================
+# Versiones fijas: "manage.py cv_vendor_assets" las descarga en
+# cv/static/vendor (se commitean) y collectstatic les pone hash en el nombre,
+# las comprime (gzip + brotli) y WhiteNoise las sirve con caché inmutable.
+# Mientras un archivo no esté en cv/static/vendor, las plantillas usan su URL
+# fija del CDN (templatetag vendor_url): collectstatic y el manifest nunca
+# apuntan a un archivo que no existe.
+
+VENDOR_DIR = Path(__file__).resolve().parent / "static" / "vendor"
+
+BOOTSTRAP = "https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist"
+ICONS = "https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.0/font"
+FONTSOURCE = "https://cdn.jsdelivr.net/npm/@fontsource"
+
+# (destino dentro de vendor/, URL, SRI opcional)
+ARCHIVOS = [
+    ("bootstrap/bootstrap.min.css", f"{BOOTSTRAP}/css/bootstrap.min.css",
+     "sha384-QWTKZyjpPEjISv5WaRU9OFeRpok6YctnYmDr5pNlyT2bRjXh0JMhjY6hW+ALEwIH"),
+    ("bootstrap/bootstrap.bundle.min.js", f"{BOOTSTRAP}/js/bootstrap.bundle.min.js",
+     "sha384-YvpcrYf0tY3lHB60NNkmXc5s9fDVZLESaAA55NDzOxhy9GkcIdslK1eN7N6jIeHz"),
+    # El CSS pide ./fonts/bootstrap-icons.woff2: misma estructura de carpetas
+    ("bootstrap-icons/bootstrap-icons.min.css", f"{ICONS}/bootstrap-icons.min.css", None),
+    ("bootstrap-icons/fonts/bootstrap-icons.woff2", f"{ICONS}/fonts/bootstrap-icons.woff2", None),
+    ("bootstrap-icons/fonts/bootstrap-icons.woff", f"{ICONS}/fonts/bootstrap-icons.woff", None),
+    # Solo los pesos que usan base.css y perfil (antes vía Google Fonts), subset latino
+    *[(f"fonts/inter-latin-{peso}-normal.woff2", f"{FONTSOURCE}/inter@5/files/inter-latin-{peso}-normal.woff2", None)
+      for peso in (300, 400, 600)],
+    *[(f"fonts/syne-latin-{peso}-normal.woff2", f"{FONTSOURCE}/syne@5/files/syne-latin-{peso}-normal.woff2", None)
+      for peso in (700, 800)],
+]
+
+# destino -> (URL, SRI): lo que enlazan las plantillas mientras falte el archivo local
+CDN = {destino: (url, integridad) for destino, url, integridad in ARCHIVOS}
+
+# collectstatic (ManifestStaticFilesStorage) falla si un CSS/JS apunta a un
+# .map que no existe; los source maps no se sirven, así que se quita la referencia
+SOURCE_MAP = re.compile(rb"\n?(/\*# sourceMappingURL=[^*]*\*/|//# sourceMappingURL=\S*)\s*$")
+
+
+def local(destino):
+    return (VENDOR_DIR / destino).exists()
+
+
+def faltantes():
+    return [destino for destino, _, _ in ARCHIVOS if not local(destino)]
+
+
+def verificar(data, integridad):
+    """True si ``data`` cumple el hash SRI ``sha384-<base64>`` (o no hay hash que comprobar)."""
+    if not integridad: return True
+    algoritmo, esperado = integridad.split("-", 1)
+    return base64.b64encode(hashlib.new(algoritmo, data).digest()).decode() == esperado
+
+
+def sin_source_map(destino, data):
+    if not destino.endswith((".css", ".js")): return data
+    return SOURCE_MAP.sub(b"\n", data)
+
+
+def check_vendor(app_configs, **kwargs):
+    from django.core.checks import Warning
+
+    if not faltantes(): return []
+    return [Warning(
+        f"Faltan {len(faltantes())} archivos front-end en cv/static/vendor; se sirven desde el CDN.",
+        hint="Ejecuta 'python manage.py cv_vendor_assets' y commitea cv/static/vendor.",
+        id="cv.W001",
+    )]
@@ -1,162 +1,329 @@
-import io
-import requests
+import json
+import logging
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import HttpResponse, Http404
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, Http404, JsonResponse
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.template.loader import render_to_string
-from weasyprint import HTML
-from pypdf import PdfWriter
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date, urlencode
 
-from .models import (
-    Datospersonales, Experiencialaboral, Cursosrealizados,
-    Productosacademicos, Productoslaborales, Reconocimientos, Ventagarage
-)
+from .models import Datospersonales, Subida, Trabajopdf
+from . import api, busqueda, catalogo, directorio, jobs, miniaturas, revision, subidas
+from .enlaces import DOC_MODELOS, resolver_documento
+from .loaders import SECCIONES, load_profile, profile_context
+from .pdf import generate_cv_pdf, parse_secciones
+from .pdf_cache import PdfCache
+from .timing import prometheus_text, span, timed_view
 
-def _get_cloudinary_thumbnail(file_url):
-    if not file_url or "cloudinary" not in file_url: return file_url
-    try:
-        if "/upload/" in file_url:
-            base_part, id_part = file_url.split("/upload/")
-            new_url = f"{base_part}/upload/w_600,q_auto,f_jpg,pg_1/{id_part}"
-            if new_url.lower().endswith(".pdf"):
-                new_url = new_url[:-4] + ".jpg"
-            return new_url
-    except Exception: return file_url
-    return file_url
-
-def _enrich_objects(objects):
-    for obj in objects:
-        url_final = None
-        if obj.archivo_digital: url_final = obj.archivo_digital.url
-        elif getattr(obj, 'rutacertificado', None): url_final = obj.rutacertificado
-
-        if url_final:
-            obj.final_url = url_final
-            obj.is_pdf = url_final.lower().endswith('.pdf')
-            obj.thumbnail = _get_cloudinary_thumbnail(url_final)
-        else:
-            obj.final_url = None
-            obj.is_pdf = False
-            obj.thumbnail = None
-    return objects
+logger = logging.getLogger(__name__)
 
 def doc_redirect(request, model, pk):
-    MODELS = { "exp": Experiencialaboral, "cursos": Cursosrealizados, "rec": Reconocimientos, "garage": Ventagarage }
-    ModelClass = MODELS.get(model)
-    if not ModelClass: raise Http404("Modelo no encontrado")
-    obj = get_object_or_404(ModelClass, pk=pk)
-    if obj.archivo_digital: return redirect(obj.archivo_digital.url)
-    if getattr(obj, 'rutacertificado', None): return redirect(obj.rutacertificado)
-    return redirect('home')
+    if model not in DOC_MODELOS: raise Http404("Modelo no encontrado")
+    url = resolver_documento(model, pk)
+    if url is None: raise Http404("Documento no encontrado")
+    if not url: return redirect('home')
+    response = redirect(url)
+    patch_cache_control(response, public=True, max_age=settings.CV_DOC_MAX_AGE)
+    return response
+
+def _variante(request, clave, ancho, formato, respaldo):
+    url = request.GET.get("u", "")
+    if not url or not constant_time_compare(miniaturas.firma(url), clave): raise Http404("Imagen no encontrada")
+    # Mismo origen, ancho y formato => mismos bytes: se puede cachear como inmutable
+    etag = f'"{clave}-{ancho or settings.CV_THUMB_WIDTH}-{formato}"'
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponseNotModified()
+    else:
+        try:
+            f = miniaturas.obtener(url, ancho=ancho, formato=formato)
+        except Exception as e:
+            logger.warning("No se pudo leer %s para la miniatura: %s", url, e)
+            f = None
+        if f is None:
+            # Sin vista previa (o el origen falló): respaldo, con caché corta
+            response = redirect(respaldo or url)
+            patch_cache_control(response, public=True, max_age=settings.CV_DOC_MAX_AGE)
+            return response
+        response = FileResponse(f, content_type=miniaturas.FORMATOS[formato][1])
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=settings.CV_THUMB_MAX_AGE, immutable=True)
+    return response
+
+def thumbnail(request, clave):
+    return _variante(request, clave, None, "jpg", static("img/documento.svg"))
+
+def imagen(request, clave, ancho, formato):
+    if ancho not in miniaturas.anchos_permitidos() or formato not in miniaturas.FORMATOS: raise Http404("Variante no disponible")
+    # Si el origen no es una imagen se redirige al original (lo mismo que antes)
+    return _variante(request, clave, ancho, formato, None)
 
 def cv_home(request):
-    perfil = Datospersonales.objects.filter(activarparaqueseveaenfront=True).first()
-    if perfil: return redirect("cv_detail", idperfil=perfil.idperfil)
+    # Puntero cacheado al perfil por defecto (signals.py lo invalida)
+    idperfil = directorio.perfil_por_defecto()
+    if idperfil: return redirect("cv_detail", idperfil=idperfil)
     return sin_datos(request)
 
+def directory(request):
+    qs = directorio.filtrar(directorio.perfiles_activos(), request.GET)
+    perfiles, siguiente = directorio.pagina(qs, request.GET.get("cursor"))
+    n, exacto = directorio.total(qs, request.GET)
+
+    # Enlaces que conservan los filtros; solo hay "siguiente" (y volver al inicio)
+    filtros = request.GET.copy()
+    filtros.pop("cursor", None)
+    inicio_url = f"?{filtros.urlencode()}"
+    if siguiente: filtros["cursor"] = siguiente
+    context = {
+        "perfiles": perfiles, "total": n, "total_exacto": exacto,
+        "siguiente_url": f"?{filtros.urlencode()}" if siguiente else None,
+        "inicio_url": inicio_url if request.GET.get("cursor") else None,
+        "nacionalidades": directorio.nacionalidades(),
+        "licencias": Datospersonales.LICENCIA_CHOICES,
+        "secciones": [(clave, related_name.replace("_", " ").capitalize()) for clave, (related_name, *_) in SECCIONES.items()],
+        "filtro": {"nacionalidad": request.GET.get("nacionalidad", ""), "licencia": request.GET.get("licencia", ""),
+                   "con": directorio.secciones_pedidas(request.GET)},
+    }
+    return render(request, "directorio.html", context)
+
 def sin_datos(request):
     return HttpResponse("<div style='text-align:center; padding:50px;'><h1>No hay perfiles activos</h1><a href='/admin'>Ir al Admin</a></div>")
 
-def perfil_detail(request, idperfil):
-    perfil = get_object_or_404(Datospersonales, idperfil=idperfil)
-    experiencias = Experiencialaboral.objects.filter(idperfilconqueestaactivo=perfil, activarparaqueseveaenfront=True).order_by("-fechainiciogestion")
-    cursos = Cursosrealizados.objects.filter(idperfilconqueestaactivo=perfil, activarparaqueseveaenfront=True).order_by("-fechainicio")
-    productos_academicos = Productosacademicos.objects.filter(idperfilconqueestaactivo=perfil, activarparaqueseveaenfront=True).order_by("-idproductoacademico")
-    productos_laborales = Productoslaborales.objects.filter(idperfilconqueestaactivo=perfil, activarparaqueseveaenfront=True).order_by("-fechaproducto")
-    reconocimientos = Reconocimientos.objects.filter(idperfilconqueestaactivo=perfil, activarparaqueseveaenfront=True).order_by("-fechareconocimiento")
-    ventas_garage = Ventagarage.objects.filter(idperfilconqueestaactivo=perfil, activo=True).order_by("-fechapublicacion")
-
-    _enrich_objects(experiencias)
-    _enrich_objects(cursos)
-    _enrich_objects(reconocimientos)
-    _enrich_objects(ventas_garage)
+def _catalogo(request):
+    form = catalogo.CatalogoForm(request.GET)
+    if not form.is_valid(): return form, [], None
+    datos = form.cleaned_data
+    items, siguiente = catalogo.pagina(catalogo.filtrar(catalogo.items_activos(), datos), datos["orden"], datos["cursor"])
+    return form, items, siguiente
+
+def _siguiente_url(request, cursor):
+    params = request.GET.copy()
+    params["cursor"] = cursor
+    return f"?{params.urlencode()}"
+
+def garage_catalog(request):
+    form, items, siguiente = _catalogo(request)
+    return render(request, "garage_catalogo.html", {
+        "form": form, "items": items,
+        "siguiente_url": _siguiente_url(request, siguiente) if siguiente else None,
+        "inicio_url": f"?{urlencode({k: v for k, v in request.GET.items() if k != 'cursor'})}" if request.GET.get("cursor") else None,
+    })
+
+def garage_catalog_api(request):
+    form, items, siguiente = _catalogo(request)
+    if form.errors: return JsonResponse({"errors": form.errors}, status=400)
+    return JsonResponse({
+        "items": [catalogo.item_json(item) for item in items],
+        "next": request.build_absolute_uri(_siguiente_url(request, siguiente)) if siguiente else None,
+    })
 
+def search(request):
+    q = request.GET.get("q", "").strip()[:200]
+    try:
+        page = min(max(int(request.GET.get("page", 1)), 1), settings.CV_SEARCH_MAX_PAGES)
+    except ValueError:
+        page = 1
+    perfiles, hay_mas = busqueda.buscar(q, page) if q else ([], False)
     context = {
-        "perfil": perfil, "experiencias": experiencias, "cursos": cursos,
-        "productos_academicos": productos_academicos, "productos_laborales": productos_laborales,
-        "reconocimientos": reconocimientos, "ventas_garage": ventas_garage,
+        "q": q, "perfiles": perfiles, "page": page,
+        "anterior_url": f"?{urlencode({'q': q, 'page': page - 1})}" if page > 1 else None,
+        "siguiente_url": f"?{urlencode({'q': q, 'page': page + 1})}" if hay_mas and page < settings.CV_SEARCH_MAX_PAGES else None,
     }
-    return render(request, "perfil_detail.html", context)
+    return render(request, "busqueda.html", context)
+
+def _perfil_validadores(idperfil):
+    fila = Datospersonales.objects.filter(idperfil=idperfil).values_list("version", "actualizado").first()
+    if fila is None: raise Http404("Perfil no encontrado")
+    return fila
+
+def _render_perfil_detail(idperfil):
+    with span("queries"):
+        context = profile_context(load_profile(idperfil))
+
+    # Sin request: la página no depende del visitante y se puede cachear entera
+    with span("render"):
+        return render_to_string("perfil_detail.html", context)
+
+def _respuesta_versionada(request, clave, version, actualizado, generar, content_type="text/html; charset=utf-8"):
+    """304 o cuerpo cacheado por ``clave``+``version``; ``generar()`` solo corre en un fallo de caché."""
+    # La revisión del despliegue invalida lo generado con plantillas/estáticos anteriores
+    rev = revision.revision()
+    etag = f'"{clave.replace(":", "-")}-v{version}-{rev}"'
+    last_modified = max(int(actualizado.timestamp()), revision.desplegado())
+
+    # 304 si el visitante (o la CDN) ya tiene esta versión
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        # Cuerpo cacheado por versión: un cambio en el perfil cambia la clave
+        key = f"cv:{clave}:v{version}:{rev}"
+        with span("cache"):
+            body = cache.get(key) if settings.CV_PAGE_CACHE else None
+        if body is None:
+            body = generar()
+            if settings.CV_PAGE_CACHE: cache.set(key, body)
+        response = HttpResponse(body, content_type=content_type)
 
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=settings.CV_PAGE_MAX_AGE)
+    return response
+
+@timed_view("perfil_detail")
+def perfil_detail(request, idperfil):
+    # Validadores: una consulta por PK, sin tocar las tablas de secciones
+    with span("queries"):
+        version, actualizado = _perfil_validadores(idperfil)
+    return _respuesta_versionada(request, f"perfil:{idperfil}", version, actualizado, lambda: _render_perfil_detail(idperfil))
+
+# ============================================================
+# API JSON v1 (solo lectura)
+# ============================================================
+
+def _api_error(mensaje, status):
+    return JsonResponse({"error": mensaje}, status=status)
+
+def api_profile(request, idperfil):
+    try:
+        campos, secciones = api.parse_params(request.GET, tuple(api.CAMPOS_SECCION))
+    except api.ParametrosInvalidos as e:
+        return _api_error(str(e), 400)
+    fila = Datospersonales.objects.filter(idperfil=idperfil, activarparaqueseveaenfront=True).values_list("version", "actualizado").first()
+    if fila is None: return _api_error("Perfil no encontrado", 404)
+
+    def generar():
+        return json.dumps(api.perfil(idperfil, campos, secciones), cls=DjangoJSONEncoder)
+    clave = f"api:perfil:{idperfil}:{api.firma_params(campos, secciones)}"
+    return _respuesta_versionada(request, clave, *fila, generar, content_type="application/json")
+
+def api_profiles(request):
+    try:
+        campos, secciones = api.parse_params(request.GET, ())
+        limit = api.parse_limit(request.GET.get("limit"))
+        perfiles, siguiente = api.lista(campos, secciones, request.GET.get("cursor"), limit)
+    except ValueError as e:
+        return _api_error(str(e), 400)
+    siguiente_url = None
+    if siguiente:
+        params = request.GET.copy()
+        params["cursor"] = siguiente
+        siguiente_url = request.build_absolute_uri(f"?{params.urlencode()}")
+    return JsonResponse({"results": perfiles, "next": siguiente_url})
+
+def _pdf_response(request, pdf_file, etag, filename):
+    # FileResponse envía el archivo por bloques y calcula Content-Length
+    if etag and request.headers.get("If-None-Match") == etag:
+        pdf_file.close()
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(pdf_file, content_type='application/pdf', filename=filename)
+    if etag:
+        response['ETag'] = etag
+        response['Cache-Control'] = "private, no-cache"
+    return response
+
+@timed_view("cv_print")
 def cv_print(request, idperfil):
-    perfil = get_object_or_404(Datospersonales, idperfil=idperfil)
-    
-    # 1. Filtros del Modal (LÓGICA ACTUALIZADA)
-    from_modal = request.GET.get("from_modal") == "true"
-    def check(key): return request.GET.get(key) is not None if from_modal else True
-
-    show_exp = check("exp")
-    show_edu = check("edu")
-    show_acad = check("acad") # ✅ Nuevo filtro
-    show_lab = check("lab")   # ✅ Nuevo filtro
-    show_rec = check("rec")
-    show_garage = check("garage")
-
-    # 2. Consultas Filtradas
-    experiencias = Experiencialaboral.objects.filter(idperfilconqueestaactivo=perfil, activarparaqueseveaenfront=True).order_by("-fechainiciogestion") if show_exp else []
-    cursos = Cursosrealizados.objects.filter(idperfilconqueestaactivo=perfil, activarparaqueseveaenfront=True).order_by("-fechainicio") if show_edu else []
-    
-    # ✅ Filtrado correcto de productos
-    prod_acad = Productosacademicos.objects.filter(idperfilconqueestaactivo=perfil, activarparaqueseveaenfront=True) if show_acad else []
-    prod_lab = Productoslaborales.objects.filter(idperfilconqueestaactivo=perfil, activarparaqueseveaenfront=True) if show_lab else []
-    
-    reconocimientos = Reconocimientos.objects.filter(idperfilconqueestaactivo=perfil, activarparaqueseveaenfront=True) if show_rec else []
-    garage = Ventagarage.objects.filter(idperfilconqueestaactivo=perfil, activo=True) if show_garage else []
-    
-    _enrich_objects(experiencias)
-    _enrich_objects(cursos)
-    _enrich_objects(reconocimientos)
-    _enrich_objects(garage)
-    # 3. Generar PDF Principal
-    context = {
-        "perfil": perfil, "experiencias": experiencias, "cursos": cursos,
-        "productos_academicos": prod_acad, "productos_laborales": prod_lab,
-        "reconocimientos": reconocimientos, "ventas_garage": garage,
-    }
-    
-    html_string = render_to_string('cv_print.html', context)
-    html = HTML(string=html_string, base_url=request.build_absolute_uri('/'))
-    main_buffer = io.BytesIO()
-    html.write_pdf(main_buffer)
-    main_buffer.seek(0)
-
-    # 4. Fusión de Anexos
-    merger = PdfWriter()
-    merger.append(main_buffer)
-
-    def append_attachments(queryset):
-        for item in queryset:
-            url_to_download = None
-            if item.archivo_digital:
-                url_to_download = item.archivo_digital.url
-            elif getattr(item, 'rutacertificado', None):
-                link = item.rutacertificado
-                if link and link.lower().strip().endswith('.pdf'):
-                    url_to_download = link
-
-            if url_to_download:
-                try:
-                    # Descargamos el archivo
-                    response = requests.get(url_to_download, timeout=15)
-                    if response.status_code == 200:
-                        # Lo metemos al merger como PÁGINA NUEVA
-                        remote_pdf = io.BytesIO(response.content)
-                        merger.append(remote_pdf)
-                except Exception as e:
-                    print(f"Error uniendo PDF {url_to_download}: {e}")
-
-    # ✅ Aseguramos que se adjunten archivos de todas las secciones
-    if show_edu: append_attachments(cursos)
-    if show_exp: append_attachments(experiencias)
-    if show_rec: append_attachments(reconocimientos)
-    if show_garage: append_attachments(garage)
-
-    # 5. Salida Final
-    output_buffer = io.BytesIO()
-    merger.write(output_buffer)
-    merger.close()
-    
-    output_buffer.seek(0)
-    response = HttpResponse(output_buffer, content_type='application/pdf')
+    with span("queries"):
+        perfil = get_object_or_404(Datospersonales, idperfil=idperfil)
+
+    # 1. Filtros del Modal + caché de PDFs terminados
+    secciones = parse_secciones(request.GET)
     filename = f"CV_{perfil.nombres}_{perfil.apellidos}.pdf"
-    response['Content-Disposition'] = f'inline; filename="{filename}"'
-    return response
\ No newline at end of file
+    pdf_cache = PdfCache()
+    with span("cache"):
+        cached = pdf_cache.get_pdf(perfil, secciones)
+    if cached:
+        return _pdf_response(request, cached[0], cached[1], filename)
+
+    # 2. Modo asíncrono (opcional): se encola y el cliente consulta el estado
+    if settings.CV_PRINT_ASYNC or request.GET.get("async") == "1":
+        trabajo = jobs.enqueue(perfil, secciones, request.build_absolute_uri('/'))
+        return _job_status_response(request, trabajo, status=202)
+
+    # 3. Modo síncrono
+    pdf_file, etag, omitidos = generate_cv_pdf(perfil, secciones, request.build_absolute_uri('/'), pdf_cache)
+    response = _pdf_response(request, pdf_file, etag, filename)
+    if omitidos:
+        response['X-CV-Skipped-Attachments'] = " ".join(omitidos)
+    return response
+
+def _job_status_response(request, trabajo, status=200):
+    url = request.build_absolute_uri(reverse("cv_print_job", args=[trabajo.token]))
+    data = {"job": url, "estado": trabajo.estado}
+    if trabajo.estado == Trabajopdf.LISTO: data["download"] = f"{url}?download=1"
+    if trabajo.error: data["error"] = trabajo.error
+    response = JsonResponse(data, status=status)
+    response["Location"] = url
+    return response
+
+@staff_member_required
+def metrics(request):
+    return HttpResponse(prometheus_text(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+def cv_print_job(request, token):
+    trabajo = get_object_or_404(Trabajopdf, token=token)
+    # Aunque no haya workers vivos, un trabajo abandonado sin intentos termina en "error"
+    if trabajo.estado == Trabajopdf.PROCESANDO and jobs.expirar_abandonados(): trabajo.refresh_from_db()
+    if trabajo.estado == Trabajopdf.LISTO and request.GET.get("download"):
+        return redirect(trabajo.archivo.url)
+    return _job_status_response(request, trabajo)
+
+
+# ============================================================
+# Subidas por partes del admin (subidas.py)
+# ============================================================
+
+def _subida_json(subida, status=200):
+    data = {"token": str(subida.pk), "recibidos": subida.recibidos, "tamano": subida.tamano, "parte": settings.CV_UPLOAD_CHUNK_BYTES}
+    if subida.archivo: data["archivo"] = subida.archivo
+    return JsonResponse(data, status=status)
+
+@staff_member_required
+def upload_create(request):
+    if request.method != "POST": return _api_error("método no permitido", 405)
+    try:
+        datos = json.loads(request.body)
+    except ValueError:
+        return _api_error("JSON inválido", 400)
+    try:
+        subida = subidas.crear(datos.get("campo"), datos.get("nombre"), datos.get("tamano"))
+    except subidas.SubidaInvalida as e:
+        return _api_error(str(e), e.status)
+    return _subida_json(subida, status=201)
+
+@staff_member_required
+def upload_chunk(request, token):
+    subida = get_object_or_404(Subida, pk=token)
+    if request.method == "GET": return _subida_json(subida)
+    if request.method != "PUT": return _api_error("método no permitido", 405)
+    try:
+        offset = int(request.GET.get("offset", ""))
+        longitud = int(request.headers.get("Content-Length") or 0)
+    except ValueError:
+        return _api_error("offset inválido", 400)
+    try:
+        # request se lee como stream: la parte no se carga entera en memoria
+        subidas.escribir_parte(subida, offset, request, longitud, request.headers.get("X-Chunk-Sha256"))
+    except subidas.SubidaInvalida as e:
+        subida.refresh_from_db()
+        return JsonResponse({"error": str(e), "recibidos": subida.recibidos}, status=e.status)
+    return _subida_json(subida)
+
+@staff_member_required
+def upload_complete(request, token):
+    if request.method != "POST": return _api_error("método no permitido", 405)
+    subida = get_object_or_404(Subida, pk=token)
+    try:
+        subidas.completar(subida)
+    except subidas.SubidaInvalida as e:
+        return _api_error(str(e), e.status)
+    except ValidationError as e:
+        return _api_error(" ".join(e.messages), 400)
+    return _subida_json(subida)
@@ -0,0 +1,10 @@
+# Configuración leída automáticamente por gunicorn desde el directorio de trabajo.
+
+
+def post_worker_init(worker):
+    # Parsea la hoja de estilos del CV y carga fontconfig antes de la primera petición
+    from cv.render import warm_up
+    try:
+        warm_up()
+    except Exception as e:
+        worker.log.warning("No se pudo precalentar el motor de PDF: %s", e)
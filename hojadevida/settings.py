@@ -85,9 +85,17 @@ USE_TZ = True
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# Archivos subidos, nombrados por hash de contenido y deduplicados (cv/storage.py).
+# Producción usa Cloudinary; CV_STORAGE=local (explícito) guarda en MEDIA_ROOT
+# para desarrollo y benchmarks, y /media/ solo se sirve con DEBUG.
+CV_STORAGE = config("CV_STORAGE", default="cloudinary")
 STORAGES = {
-    "default": {"BACKEND": "cloudinary_storage.storage.MediaCloudinaryStorage"},
-    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedStaticFilesStorage"},
+    "default": {"BACKEND": "cv.storage_cloudinary.CloudinaryStorage" if CV_STORAGE == "cloudinary" else "cv.storage.LocalStorage"},
+    # collectstatic pone el hash del contenido en cada nombre (bootstrap.3f2a….css)
+    # y genera .gz y .br (con el paquete brotli); WhiteNoise sirve la versión
+    # comprimida que acepte el navegador y marca los archivos hasheados como
+    # inmutables (Cache-Control: max-age=10 años, immutable).
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
 }
 
 CLOUDINARY_STORAGE = {
@@ -96,9 +104,102 @@ CLOUDINARY_STORAGE = {
 
 
 MEDIA_URL = "/media/"
+MEDIA_ROOT = config("MEDIA_ROOT", default=str(BASE_DIR / "media"))
+
+# ============================================================
+# CACHÉ (páginas de perfil y datos derivados)
+# ============================================================
+# Local en memoria por defecto. En producción con varios workers hace falta
+# una compartida para que las invalidaciones lleguen a todos (check cv.W002),
+# p. ej. CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# CACHE_LOCATION=/var/tmp/hojadevida (o el backend de Redis con su URL).
+CACHES = {
+    "default": {
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("CACHE_LOCATION", default="hojadevida"),
+        "TIMEOUT": config("CACHE_TIMEOUT", default=7 * 24 * 3600, cast=int),
+    }
+}
+# Con la caché local por proceso, lo que depende de una invalidación dura como mucho esto (cv/caches.py)
+CV_LOCAL_CACHE_TTL = config("CV_LOCAL_CACHE_TTL", default=60, cast=int)
+# HTML de /cv/<id>/ cacheado por versión del perfil; max-age para navegadores/CDN
+CV_PAGE_CACHE = config("CV_PAGE_CACHE", default=True, cast=bool)
+CV_PAGE_MAX_AGE = config("CV_PAGE_MAX_AGE", default=0, cast=int)
+# Identificador del despliegue (p. ej. el commit); entra en las ETag y claves de caché (cv/revision.py)
+CV_BUILD_REVISION = config("CV_BUILD_REVISION", default="")
+# doc_redirect: LRU por proceso (entradas/TTL corto) sobre la caché compartida
+CV_DOC_CACHE_ENTRIES = config("CV_DOC_CACHE_ENTRIES", default=2048, cast=int)
+CV_DOC_CACHE_LOCAL_TTL = config("CV_DOC_CACHE_LOCAL_TTL", default=60, cast=int)
+CV_DOC_CACHE_TTL = config("CV_DOC_CACHE_TTL", default=24 * 3600, cast=int)
+CV_DOC_MAX_AGE = config("CV_DOC_MAX_AGE", default=300, cast=int)
+# Directorio /cv/directory/: tamaño de página y conteos acotados/cacheados
+CV_DIRECTORY_PAGE_SIZE = config("CV_DIRECTORY_PAGE_SIZE", default=24, cast=int)
+CV_DIRECTORY_COUNT_CAP = config("CV_DIRECTORY_COUNT_CAP", default=1000, cast=int)
+CV_DIRECTORY_COUNT_TTL = config("CV_DIRECTORY_COUNT_TTL", default=300, cast=int)
+# Perfil de portada (cv_home); con caché por proceso, como mucho CV_LOCAL_CACHE_TTL
+CV_HOME_CACHE_TTL = config("CV_HOME_CACHE_TTL", default=3600, cast=int)
+CV_SEARCH_PAGE_SIZE = config("CV_SEARCH_PAGE_SIZE", default=20, cast=int)
+CV_SEARCH_MAX_PAGES = config("CV_SEARCH_MAX_PAGES", default=50, cast=int)
+CV_CATALOG_PAGE_SIZE = config("CV_CATALOG_PAGE_SIZE", default=24, cast=int)
+CV_API_PAGE_SIZE = config("CV_API_PAGE_SIZE", default=20, cast=int)
+CV_API_MAX_PAGE_SIZE = config("CV_API_MAX_PAGE_SIZE", default=100, cast=int)
+
+# ============================================================
+# CV PRINT (PDF)
+# ============================================================
+CV_ATTACHMENT_WORKERS = config("CV_ATTACHMENT_WORKERS", default=8, cast=int)
+CV_ATTACHMENT_PER_HOST = config("CV_ATTACHMENT_PER_HOST", default=4, cast=int)
+CV_ATTACHMENT_TIMEOUT = config("CV_ATTACHMENT_TIMEOUT", default=15, cast=float)
+CV_ATTACHMENT_DEADLINE = config("CV_ATTACHMENT_DEADLINE", default=25, cast=float)
+CV_ATTACHMENT_MAX_BYTES = config("CV_ATTACHMENT_MAX_BYTES", default=25 * 1024 * 1024, cast=int)
+CV_PRINT_MAX_BYTES = config("CV_PRINT_MAX_BYTES", default=100 * 1024 * 1024, cast=int)
+CV_CERTIFICADO_DPI = config("CV_CERTIFICADO_DPI", default=150, cast=int)
+CV_PRINT_SPOOL_BYTES = config("CV_PRINT_SPOOL_BYTES", default=2 * 1024 * 1024, cast=int)
+CV_ATTACHMENT_CACHE_DIR = config("CV_ATTACHMENT_CACHE_DIR", default=str(BASE_DIR / "cache" / "anexos"))
+CV_ATTACHMENT_CACHE_MAX_BYTES = config("CV_ATTACHMENT_CACHE_MAX_BYTES", default=512 * 1024 * 1024, cast=int)
+CV_ATTACHMENT_CACHE_TTL = config("CV_ATTACHMENT_CACHE_TTL", default=24 * 3600, cast=int)
+CV_PDF_CACHE_DIR = config("CV_PDF_CACHE_DIR", default=str(BASE_DIR / "cache" / "pdf"))
+CV_PDF_CACHE_MAX_BYTES = config("CV_PDF_CACHE_MAX_BYTES", default=256 * 1024 * 1024, cast=int)
+CV_PDF_FRAGMENT_CACHE_DIR = config("CV_PDF_FRAGMENT_CACHE_DIR", default=str(BASE_DIR / "cache" / "fragmentos"))
+CV_PDF_FRAGMENT_CACHE_MAX_BYTES = config("CV_PDF_FRAGMENT_CACHE_MAX_BYTES", default=128 * 1024 * 1024, cast=int)
+# Maquetar cabecera y secciones por separado (solo se rehace la sección editada,
+# pero cada sección empieza en página nueva). Por defecto, un único documento.
+CV_PDF_FRAGMENTS = config("CV_PDF_FRAGMENTS", default=False, cast=bool)
+# Miniaturas locales de certificados fuera de Cloudinary (cv/thumb/)
+CV_THUMB_WIDTH = config("CV_THUMB_WIDTH", default=600, cast=int)
+CV_THUMB_QUALITY = config("CV_THUMB_QUALITY", default=80, cast=int)
+CV_THUMB_CACHE_DIR = config("CV_THUMB_CACHE_DIR", default=str(BASE_DIR / "cache" / "miniaturas"))
+CV_THUMB_CACHE_MAX_BYTES = config("CV_THUMB_CACHE_MAX_BYTES", default=256 * 1024 * 1024, cast=int)
+CV_THUMB_MAX_AGE = config("CV_THUMB_MAX_AGE", default=365 * 24 * 3600, cast=int)
+# Descarga del origen de una miniatura: plazo corto y fallos recordados un rato
+CV_THUMB_FETCH_TIMEOUT = config("CV_THUMB_FETCH_TIMEOUT", default=4, cast=float)
+CV_THUMB_ERROR_TTL = config("CV_THUMB_ERROR_TTL", default=300, cast=int)
+# Variantes responsive (srcset) de fotos de perfil y garage; la de impresión va al PDF
+CV_IMG_WIDTHS = (160, 320, 640, 1280)
+CV_IMG_PRINT_WIDTH = config("CV_IMG_PRINT_WIDTH", default=240, cast=int)
+# Subidas por partes del admin (cv/uploads/); las partes se ensamblan en disco
+CV_UPLOAD_DIR = config("CV_UPLOAD_DIR", default=str(BASE_DIR / "cache" / "subidas"))
+CV_UPLOAD_CHUNK_BYTES = config("CV_UPLOAD_CHUNK_BYTES", default=1024 * 1024, cast=int)
+# Mismo tope que el PDF normalizado: lo que no cabría en cv_print se rechaza antes de subirlo
+CV_UPLOAD_MAX_BYTES = config("CV_UPLOAD_MAX_BYTES", default=CV_ATTACHMENT_MAX_BYTES, cast=int)
+CV_UPLOAD_TTL = config("CV_UPLOAD_TTL", default=24 * 3600, cast=int)
+# Hojas extra para el PDF (p. ej. @font-face con fuentes locales); se parsean una vez por proceso
+CV_PRINT_EXTRA_CSS = []
+# Modo asíncrono: cv_print encola y responde 202 (requiere "manage.py cv_pdf_worker")
+CV_PRINT_ASYNC = config("CV_PRINT_ASYNC", default=False, cast=bool)
+CV_PDF_JOB_TIMEOUT = config("CV_PDF_JOB_TIMEOUT", default=300, cast=int)
+CV_PDF_JOB_MAX_INTENTOS = config("CV_PDF_JOB_MAX_INTENTOS", default=3, cast=int)
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Logs de la app (incluye una línea JSON "cv_timing" por petición a perfil/PDF)
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {"cv": {"handlers": ["console"], "level": config("CV_LOG_LEVEL", default="INFO")}},
+}
+
 if not DEBUG:
     SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
     SECURE_SSL_REDIRECT = True